@@ -11,22 +11,75 @@ Setup:
 - Laser beam on photodetector (nominally constant power)
 - Let laser warm up for 5+ minutes before capturing
 
+The CSV file has the voltages in the first column, as before, and the
+time of each sample (relative to the first) in the second, in both
+acquisition modes. To provide those times, capture_samples() now returns
+(samples, timestamps) instead of just the list of samples.
+
+For long stability runs at higher rates, set ACQUISITION_MODE to
+"continuous". The DAQ's own sample clock then sets the timing, and the
+samples are read from the driver buffer in blocks and written to the
+CSV file as they arrive. With OUTPUT_FORMAT = "binary" the blocks are
+stored in a binary .scan directory instead (see python/scan_storage.py),
+which keeps up with much higher sample rates than text. Only summary
+statistics are kept in memory, so a run can last as long as the disk
+allows; the plots are made afterwards by reading the file block by
+block.
+
 Usage:
     python capture_photodetector_samples.py
+
+Without a DAQ connected (simulated device; see python/simulated_hardware.py):
+    PHYS4430_SIMULATE=1 python capture_photodetector_samples.py
 """
 
-import nidaqmx
-import numpy as np
+import importlib
+import itertools
+import os
+import sys
 import time
 from datetime import datetime
+from math import factorial
+
+import numpy as np
 import matplotlib.pyplot as plt
-from scipy import signal
+
+# Helper modules (storage, spectra, simulated hardware) live in python/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "python"))
+from scan_storage import ScanWriter, iter_chunks
+
+# The FFT lesson's file name starts with a digit, so it cannot be
+# imported with a normal import statement
+fft_analysis = importlib.import_module("03_fft_analysis")
+
+if os.environ.get("PHYS4430_SIMULATE", "0") not in ("", "0"):
+    from simulated_hardware import nidaqmx, AcquisitionType
+    from simulated_hardware import AnalogSingleChannelReader
+    # Simulated time may run faster than real time
+    from simulated_hardware import now as clock, sleep
+else:
+    import nidaqmx
+    from nidaqmx.constants import AcquisitionType
+    from nidaqmx.stream_readers import AnalogSingleChannelReader
+    clock = time.perf_counter
+    sleep = time.sleep
 
 # Configuration
 DAQ_CHANNEL = "Dev2/ai0"
 NUM_SAMPLES = 200  # 5 minutes at 0.1s intervals
 SAMPLE_INTERVAL = 0.1  # seconds between samples
 OUTPUT_FILE = "photodetector_samples.csv"
+SPECTROGRAM_FILE = "photodetector_spectrogram.npy"  # Written by plot_continuous
+
+# Acquisition mode:
+#   "software"   - one read per SAMPLE_INTERVAL, timed by the computer
+#   "continuous" - hardware-timed at CONTINUOUS_SAMPLE_RATE, read in blocks
+ACQUISITION_MODE = "software"
+CONTINUOUS_SAMPLE_RATE = 1000.0  # Hz (USB-6009 maximum: 48000 Hz)
+CONTINUOUS_DURATION = 600.0  # seconds (None: run until Ctrl+C)
+BLOCK_DURATION = 0.5  # seconds of data per block read
+OUTPUT_FORMAT = "csv"  # Continuous mode: "csv" or "binary" (.scan directory)
 
 def capture_samples(channel, num_samples, interval):
     """
@@ -35,8 +88,18 @@ def capture_samples(channel, num_samples, interval):
     Uses single-point reads at timed intervals rather than continuous
     acquisition to match the prelab description of "measurements taken
     at 0.1-second intervals."
+
+    The reads are timed in software, so the operating system can delay
+    any of them. The actual time of every read is recorded as well, so
+    the spectrum can be computed from the true sample times (see
+    lomb_scargle).
+
+    Returns:
+        samples: Voltage array (V)
+        timestamps: Time of each read, relative to the first (s)
     """
     samples = []
+    timestamps = []
 
     print(f"Capturing {num_samples} samples at {interval}s intervals...")
     print(f"Total time: {num_samples * interval:.1f} seconds")
@@ -45,26 +108,382 @@ def capture_samples(channel, num_samples, interval):
     with nidaqmx.Task() as task:
         task.ai_channels.add_ai_voltage_chan(channel)
 
-        start_time = time.time()
+        start_time = clock()
         for i in range(num_samples):
             # Wait until the next sample time
             target_time = start_time + i * interval
-            while time.time() < target_time:
-                time.sleep(0.001)  # Small sleep to avoid busy-waiting
+            while clock() < target_time:
+                sleep(0.001)  # Small sleep to avoid busy-waiting
 
-            # Read single sample
+            # Read single sample, time-stamped at the middle of the read
+            before = clock()
             voltage = task.read()
+            after = clock()
             samples.append(voltage)
+            timestamps.append(0.5 * (before + after))
 
             # Progress indicator
             if (i + 1) % 20 == 0:
                 print(f"  {i + 1}/{num_samples} samples captured...")
 
-    return np.array(samples)
+    timestamps = np.array(timestamps)
+    return np.array(samples), timestamps - timestamps[0]
+
+def capture_continuous(channel, sample_rate, duration, output_file,
+                       block_duration=0.5, output_format="csv"):
+    """
+    Capture a hardware-timed continuous record, saving it block by block.
+
+    The DAQ sample clock fills a buffer in the driver at exactly
+    sample_rate. This function waits (without using the CPU) until a
+    block of samples is available, reads the whole block at once and
+    appends it to the output file, so a crash or Ctrl+C loses at most
+    one block (CSV) or about one second of data (binary).
+
+    The samples are not kept in memory (a long run would not fit), only
+    running statistics. Use read_capture_blocks to go through the data
+    again afterwards.
+
+    Parameters:
+        channel: DAQ channel (e.g. "Dev2/ai0")
+        sample_rate: Samples per second
+        duration: Length of the record in seconds (None: until Ctrl+C)
+        output_file: CSV file, or .scan directory for binary output
+        block_duration: Seconds of data per read
+        output_format: "csv" or "binary" (see python/scan_storage.py)
+
+    Returns:
+        stats: dict with 'num_samples', 'mean', 'std' (sample standard
+            deviation), 'min', 'max' (V), 'first' (array of the first 10
+            samples) and 'duration' (s)
+    """
+    block_size = max(1, int(round(block_duration * sample_rate)))
+    if duration is None:
+        num_blocks = None
+        print(f"Capturing at {sample_rate:g} Hz until Ctrl+C...")
+    else:
+        num_blocks = int(np.ceil(duration * sample_rate / block_size))
+        print(f"Capturing {num_blocks * block_size} samples at "
+              f"{sample_rate:g} Hz ({duration:.1f} s)...")
+    print()
 
-def plot_data(samples, interval):
+    buffer = np.zeros(block_size)
+    count = 0
+    num_blocks_read = 0
+    # Running mean and sum of squared deviations, combined block by
+    # block (Chan et al.), which stays accurate for very long records
+    mean = 0.0
+    m2 = 0.0
+    minimum = np.inf
+    maximum = -np.inf
+    first = np.zeros(0)
+
+    if output_format == "binary":
+        metadata = {
+            "channel": channel,
+            "sample_rate": sample_rate,
+            "block_duration": block_duration,
+            "start": datetime.now().isoformat(timespec="seconds"),
+        }
+        output = ScanWriter(output_file, ["Voltage (V)", "Time (s)"],
+                            metadata=metadata)
+    else:
+        output = open(output_file, 'w')
+
+    with nidaqmx.Task() as task, output:
+        task.ai_channels.add_ai_voltage_chan(channel)
+        # The driver buffer holds several blocks, so a slow write to
+        # disk does not overflow it
+        task.timing.cfg_samp_clk_timing(
+            sample_rate,
+            sample_mode=AcquisitionType.CONTINUOUS,
+            samps_per_chan=10 * block_size
+        )
+        reader = AnalogSingleChannelReader(task.in_stream)
+
+        if output_format != "binary":
+            output.write("Voltage (V),Time (s)\n")
+        task.start()
+        try:
+            while num_blocks is None or num_blocks_read < num_blocks:
+                reader.read_many_sample(
+                    buffer, number_of_samples_per_channel=block_size,
+                    timeout=10 * block_duration
+                )
+                block = buffer
+
+                # Voltage first, as in software-timed captures
+                times = (count + np.arange(block_size)) / sample_rate
+                if output_format == "binary":
+                    output.append(np.column_stack((block, times)))
+                else:
+                    np.savetxt(output, np.column_stack((block, times)),
+                               fmt=['%.5f', '%.6f'], delimiter=',')
+                    output.flush()
+
+                block_mean = np.mean(block)
+                delta = block_mean - mean
+                total = count + block_size
+                mean += delta * block_size / total
+                m2 += (np.sum((block - block_mean) ** 2)
+                       + delta ** 2 * count * block_size / total)
+                minimum = min(minimum, np.min(block))
+                maximum = max(maximum, np.max(block))
+                if len(first) < 10:
+                    first = np.concatenate((first, block[:10 - len(first)]))
+                count = total
+                num_blocks_read += 1
+
+                # Progress indicator (about every 10 s)
+                if num_blocks_read % max(1, int(10 / block_duration)) == 0:
+                    print(f"  {count} samples ({count / sample_rate:.0f} s)"
+                          f" captured...")
+        except KeyboardInterrupt:
+            print("\nCapture stopped by user.")
+        finally:
+            task.stop()
+
+    return {
+        'num_samples': count,
+        'mean': mean,
+        'std': np.sqrt(m2 / (count - 1)) if count > 1 else float('nan'),
+        'min': minimum,
+        'max': maximum,
+        'first': first,
+        'duration': count / sample_rate,
+    }
+
+def read_capture_blocks(output_file, output_format="csv", block_size=100000):
+    """
+    Read a continuous capture back from disk, one block at a time.
+
+    Parameters:
+        output_file: CSV file or .scan directory written by
+            capture_continuous
+        output_format: "csv" or "binary"
+        block_size: Rows per block for CSV files
+
+    Yields:
+        Arrays of voltages (V), in order
+    """
+    if output_format == "binary":
+        for chunk in iter_chunks(output_file):
+            yield np.asarray(chunk[:, 0])
+        return
+
+    with open(output_file) as f:
+        f.readline()  # Header
+        while True:
+            lines = list(itertools.islice(f, block_size))
+            if not lines:
+                return
+            yield np.loadtxt(lines, delimiter=',', ndmin=2)[:, 0]
+
+def _reblock(blocks, size):
+    """Regroup a stream of arrays into consecutive arrays of `size` values."""
+    pending = np.zeros(0)
+    for block in blocks:
+        pending = np.concatenate((pending, block))
+        whole = len(pending) // size * size
+        for start in range(0, whole, size):
+            yield pending[start:start + size]
+        pending = pending[whole:]
+    if len(pending):
+        yield pending
+
+def save_samples(output_file, samples, timestamps):
+    """
+    Save a software-timed capture as CSV.
+
+    Voltage stays in the first column, as in earlier versions of this
+    file; the measured read times are added as a second column.
+    """
+    with open(output_file, 'w') as f:
+        f.write("Voltage (V),Time (s)\n")
+        for t, v in zip(timestamps, samples):
+            f.write(f"{v:.3f},{t:.4f}\n")
+
+def plot_continuous(output_file, output_format, sample_rate, stats,
+                    spectrogram_file=SPECTROGRAM_FILE, num_points=2000):
+    """
+    Plot a continuous capture from its file without loading all of it.
+
+    The file is read block by block (twice): once for the time series
+    (reduced to num_points min/mean/max values) and the histogram, and
+    once for the spectrogram, which is computed with
+    streaming_spectrogram. The power spectrum is the average of the
+    spectrogram rows (Welch's method).
+    """
+    num_samples = stats['num_samples']
+    points_per_bin = max(1, int(np.ceil(num_samples / num_points)))
+    bin_edges = np.linspace(stats['min'], stats['max'], 31)
+    counts = np.zeros(len(bin_edges) - 1)
+    lows, means, highs = [], [], []
+    for piece in _reblock(read_capture_blocks(output_file, output_format),
+                          points_per_bin):
+        lows.append(np.min(piece))
+        means.append(np.mean(piece))
+        highs.append(np.max(piece))
+        counts += np.histogram(piece, bins=bin_edges)[0]
+    bin_times = (np.arange(len(means)) + 0.5) * points_per_bin / sample_rate
+
+    # About 60 s per spectrogram row, and at most ~1000 frequency columns
+    segment_length = min(int(round(60 * sample_rate)), num_samples // 4)
+    bins_per_pixel = max(1, (segment_length // 2 + 1) // 1000)
+    t_spec, f_spec, image = fft_analysis.streaming_spectrogram(
+        read_capture_blocks(output_file, output_format), sample_rate,
+        spectrogram_file, segment_length=segment_length, overlap=0.5,
+        window=('tukey', 0.25), bins_per_pixel=bins_per_pixel,
+        num_samples=num_samples
+    )
+    psd = np.mean(image, axis=0)
+
+    _, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(14, 10))
+
+    ax1.fill_between(bin_times, lows, highs, color='blue', alpha=0.3,
+                     label='Min-max')
+    ax1.plot(bin_times, means, 'b-', linewidth=0.8, label='Mean')
+    ax1.axhline(stats['mean'], color='r', linestyle='--', linewidth=1.5,
+                label=f"Mean = {stats['mean']:.3f} V")
+    ax1.set_xlabel('Time (s)')
+    ax1.set_ylabel('Voltage (V)')
+    ax1.set_title('Photodetector Voltage vs. Time')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    ax2.stairs(counts, bin_edges, fill=True, color='blue', alpha=0.7)
+    ax2.set_xlabel('Voltage (V)')
+    ax2.set_ylabel('Frequency')
+    ax2.set_title('Distribution of Voltage Samples')
+    ax2.grid(True, alpha=0.3, axis='y')
+
+    ax3.loglog(f_spec[1:], psd[1:], 'b-', linewidth=1)
+    ax3.set_xlabel('Frequency (Hz)')
+    ax3.set_ylabel('PSD (V²/Hz)')
+    ax3.set_title('Power Spectral Density (average of spectrogram rows)')
+    ax3.grid(True, alpha=0.3, which='both')
+
+    pcm = ax4.pcolormesh(t_spec, f_spec, 10 * np.log10(image.T + 1e-20),
+                         shading='auto', cmap='viridis')
+    ax4.set_xlabel('Time (s)')
+    ax4.set_ylabel('Frequency (Hz)')
+    ax4.set_title('Spectrogram (Time-Frequency Analysis)')
+    plt.colorbar(pcm, ax=ax4, label='Power (dB)')
+
+    plt.tight_layout()
+    plt.show()
+
+def _extirpolate(x, y, grid_size, order=4):
+    """
+    Spread values y at non-integer positions x onto an integer grid.
+
+    This is the reverse of interpolation: each value is shared among the
+    `order` nearest grid points with Lagrange weights, so that sums of
+    smooth functions (like sines) over the grid equal the sums over the
+    original points.
+    """
+    result = np.zeros(grid_size, dtype=y.dtype)
+
+    # Points that already sit on the grid need no spreading
+    exact = x % 1 == 0
+    np.add.at(result, x[exact].astype(int), y[exact])
+    x, y = x[~exact], y[~exact]
+
+    low = np.clip((x - order // 2).astype(int), 0, grid_size - order)
+    numerator = y * np.prod(x - low - np.arange(order)[:, np.newaxis], axis=0)
+    denominator = factorial(order - 1)
+    for j in range(order):
+        if j > 0:
+            denominator *= j / (j - order)
+        index = low + (order - 1 - j)
+        np.add.at(result, index, numerator / (denominator * (x - index)))
+
+    return result
+
+def _trig_sums(t, h, df, num_freq, f0, oversampling=4, order=4):
+    """
+    Compute sum(h * cos(2 pi f t)) and sum(h * sin(2 pi f t)) for
+    f = f0 + df * k, k = 0..num_freq-1, in O(N log N) time.
+
+    The data are extirpolated onto a regular time grid and the sums for
+    all frequencies are then obtained with one FFT (Press & Rybicki,
+    ApJ 338, 277, 1989).
+    """
+    grid_size = 1 << int(np.ceil(np.log2(oversampling * num_freq)))
+    t0 = t.min()
+
+    # Shift the frequency grid to start at zero
+    h = h * np.exp(2j * np.pi * f0 * (t - t0))
+
+    # Times in units of the grid spacing, wrapped onto the grid
+    t_grid = ((t - t0) * grid_size * df) % grid_size
+    grid = _extirpolate(t_grid, h.astype(complex), grid_size, order)
+
+    sums = np.fft.ifft(grid)[:num_freq] * grid_size
+    sums *= np.exp(2j * np.pi * t0 * (f0 + df * np.arange(num_freq)))
+    return sums.real, sums.imag
+
+def lomb_scargle(times, values, oversampling=5, max_frequency=None):
+    """
+    Lomb-Scargle periodogram for unevenly spaced samples.
+
+    The Lomb-Scargle periodogram is the least-squares fit of a sine wave
+    at each frequency, so it works with the true (jittered) sample times
+    instead of assuming a perfectly uniform spacing like the FFT.
+
+    The trigonometric sums are computed with the fast method of Press &
+    Rybicki, so the cost grows like N log N rather than N times the
+    number of frequencies.
+
+    Parameters:
+        times: Sample times (s)
+        values: Sample values
+        oversampling: Frequency grid points per 1/(record length)
+        max_frequency: Highest frequency (default: Nyquist frequency of
+            the median sample spacing)
+
+    Returns:
+        frequencies: Frequency array (Hz)
+        power: Normalized power (0 to 1; fraction of the variance
+            explained by a sine wave at that frequency)
+    """
+    t = np.asarray(times, dtype=float)
+    y = np.asarray(values, dtype=float)
+    y = y - np.mean(y)
+
+    if max_frequency is None:
+        max_frequency = 0.5 / np.median(np.diff(np.sort(t)))
+    df = 1.0 / (oversampling * (t.max() - t.min()))
+    num_freq = int(max_frequency / df)
+    frequencies = df * (1 + np.arange(num_freq))
+
+    # Equal weights that sum to one
+    w = np.full(len(t), 1.0 / len(t))
+
+    C, S = _trig_sums(t, w * y, df, num_freq, f0=df)
+    C2, S2 = _trig_sums(t, w, 2 * df, num_freq, f0=2 * df)
+
+    # Phase offset tau that makes the sine and cosine terms orthogonal
+    norm = np.hypot(C2, S2)
+    cos_2wt = C2 / norm
+    sin_2wt = S2 / norm
+    cos_wt = np.sqrt(0.5 * (1 + cos_2wt))
+    sin_wt = np.sign(sin_2wt) * np.sqrt(0.5 * (1 - cos_2wt))
+
+    YC = C * cos_wt + S * sin_wt
+    YS = S * cos_wt - C * sin_wt
+    CC = 0.5 * (1 + C2 * cos_2wt + S2 * sin_2wt)
+    SS = 0.5 * (1 - C2 * cos_2wt - S2 * sin_2wt)
+
+    power = (YC ** 2 / CC + YS ** 2 / SS) / np.sum(w * y ** 2)
+    return frequencies, power
+
+def plot_data(samples, interval, timestamps=None):
     """
     Plot voltage samples over time, histogram, FFT analysis, and spectrogram.
+
+    If the actual sample times are given, the Lomb-Scargle periodogram
+    computed from those times is shown as well.
     """
     time_points = np.arange(len(samples)) * interval
     mean = np.mean(samples)
@@ -82,12 +501,14 @@ def plot_data(samples, interval):
 
     # Compute spectrogram
     # Use window size of ~60 seconds to see slow oscillations
-    nperseg = min(600, len(samples) // 4)  # 60s window at 0.1s sampling
-    noverlap = nperseg // 2
-    f_spec, t_spec, Sxx = signal.spectrogram(samples - mean, fs=1/interval,
-                                              nperseg=nperseg, noverlap=noverlap)
+    nperseg = min(int(round(60 / interval)), len(samples) // 4)  # 60s window
+    t_spec, f_spec, image = fft_analysis.streaming_spectrogram(
+        np.asarray(samples, dtype=float), 1 / interval, None,
+        segment_length=nperseg, overlap=0.5, window=('tukey', 0.25)
+    )
+    Sxx = image.T
 
-    _, ((ax1, ax2), (ax3, ax4), (ax5, ax_empty)) = plt.subplots(3, 2, figsize=(14, 14))
+    _, ((ax1, ax2), (ax3, ax4), (ax5, ax6)) = plt.subplots(3, 2, figsize=(14, 14))
 
     # Time series plot
     ax1.plot(time_points, samples, 'b-', linewidth=0.8, alpha=0.7, label='Voltage samples')
@@ -146,8 +567,22 @@ def plot_data(samples, interval):
                     label=f'Dominant: {dominant_freq:.4f} Hz')
     ax5.legend()
 
-    # Hide empty subplot
-    ax_empty.axis('off')
+    # Lomb-Scargle periodogram from the measured sample times
+    if timestamps is not None:
+        ls_freq, ls_power = lomb_scargle(timestamps, samples)
+        ls_peak = ls_freq[np.argmax(ls_power)]
+        jitter = np.std(np.diff(timestamps))
+        ax6.plot(ls_freq, ls_power, 'b-', linewidth=1)
+        ax6.axvline(ls_peak, color='r', linestyle='--', linewidth=1.5,
+                    label=f'Peak: {ls_peak:.4f} Hz\n(T = {1 / ls_peak:.1f} s)')
+        ax6.set_xlim([0, max_freq_display])
+        ax6.set_xlabel('Frequency (Hz)')
+        ax6.set_ylabel('Normalized power')
+        ax6.set_title(f'Lomb-Scargle (measured times, jitter {jitter * 1e3:.1f} ms)')
+        ax6.grid(True, alpha=0.3)
+        ax6.legend()
+    else:
+        ax6.axis('off')
 
     plt.tight_layout()
     plt.show()
@@ -158,6 +593,8 @@ def plot_data(samples, interval):
     print("=" * 60)
     print(f"Dominant frequency: {dominant_freq:.4f} Hz")
     print(f"Dominant period:    {dominant_period:.1f} seconds")
+    if timestamps is not None:
+        print(f"Lomb-Scargle peak:  {ls_peak:.4f} Hz")
     print()
 
 def main():
@@ -166,8 +603,11 @@ def main():
     print("=" * 60)
     print()
     print(f"DAQ Channel: {DAQ_CHANNEL}")
-    print(f"Samples: {NUM_SAMPLES}")
-    print(f"Interval: {SAMPLE_INTERVAL}s")
+    if ACQUISITION_MODE == "continuous":
+        print(f"Mode: continuous, {CONTINUOUS_SAMPLE_RATE:g} Hz")
+    else:
+        print(f"Samples: {NUM_SAMPLES}")
+        print(f"Interval: {SAMPLE_INTERVAL}s")
     print()
 
     # Verify DAQ connection
@@ -186,36 +626,65 @@ def main():
     print()
 
     # Capture samples
-    samples = capture_samples(DAQ_CHANNEL, NUM_SAMPLES, SAMPLE_INTERVAL)
+    output_file = OUTPUT_FILE
+    if ACQUISITION_MODE == "continuous":
+        if OUTPUT_FORMAT == "binary":
+            output_file = os.path.splitext(OUTPUT_FILE)[0] + ".scan"
+        stats = capture_continuous(
+            DAQ_CHANNEL, CONTINUOUS_SAMPLE_RATE, CONTINUOUS_DURATION,
+            output_file, BLOCK_DURATION, OUTPUT_FORMAT
+        )
+        interval_text = (f"{1 / CONTINUOUS_SAMPLE_RATE:.4f} s "
+                         "(hardware sample clock)")
+    else:
+        samples, timestamps = capture_samples(DAQ_CHANNEL, NUM_SAMPLES,
+                                              SAMPLE_INTERVAL)
+        intervals = np.diff(timestamps)
+        stats = {
+            'num_samples': len(samples),
+            'mean': np.mean(samples),
+            'std': np.std(samples, ddof=1),
+            'min': np.min(samples),
+            'max': np.max(samples),
+            'first': samples[:10],
+        }
+        interval_text = (f"{np.mean(intervals):.4f} s "
+                         f"(jitter {np.std(intervals) * 1e3:.2f} ms, "
+                         f"max {np.max(intervals):.4f} s)")
 
     # Display statistics
     print()
     print("=" * 60)
     print("Capture Complete - Statistics")
     print("=" * 60)
-    print(f"Mean voltage:              {np.mean(samples):.3f} V")
-    print(f"Std deviation (single):    {np.std(samples, ddof=1):.4f} V")
-    print(f"Std deviation of mean:     {np.std(samples, ddof=1) / np.sqrt(len(samples)):.5f} V")
-    print(f"Min: {np.min(samples):.3f} V  Max: {np.max(samples):.3f} V")
+    print(f"Mean voltage:              {stats['mean']:.3f} V")
+    print(f"Std deviation (single):    {stats['std']:.4f} V")
+    print(f"Std deviation of mean:     {stats['std'] / np.sqrt(stats['num_samples']):.5f} V")
+    print(f"Min: {stats['min']:.3f} V  Max: {stats['max']:.3f} V")
+    print(f"Sample interval:           {interval_text}")
     print()
     print("First 10 samples (for prelab Method B):")
-    for i, v in enumerate(samples[:10]):
+    for i, v in enumerate(stats['first']):
         print(f"  {v:.3f}", end="")
         if (i + 1) % 5 == 0:
             print()
     print()
 
-    # Save to CSV
-    with open(OUTPUT_FILE, 'w') as f:
-        f.write("Voltage (V)\n")
-        for v in samples:
-            f.write(f"{v:.3f}\n")
+    # Save to CSV (continuous mode has already written it block by block)
+    if ACQUISITION_MODE != "continuous":
+        save_samples(OUTPUT_FILE, samples, timestamps)
 
-    print(f"Data saved to: {OUTPUT_FILE}")
+    print(f"Data saved to: {output_file}")
     print()
 
-    # Plot the data
-    plot_data(samples, SAMPLE_INTERVAL)
+    # Plot the data. Continuous records are read back from the file;
+    # their samples are exactly evenly spaced, so the Lomb-Scargle panel
+    # is only needed for software timing.
+    if ACQUISITION_MODE == "continuous":
+        plot_continuous(output_file, OUTPUT_FORMAT, CONTINUOUS_SAMPLE_RATE,
+                        stats)
+    else:
+        plot_data(samples, SAMPLE_INTERVAL, timestamps)
 
     # Reminder about prelab
     print("=" * 60)
@@ -10,7 +10,7 @@ Topics covered:
 2. Reading a single voltage measurement
 3. Reading multiple samples
 4. Configuring sample rate
-5. Saving data to CSV
+5. Saving data to CSV (or to a binary file for large recordings)
 
 Hardware required:
 - NI USB-6009 (or compatible NI DAQ device)
@@ -18,14 +18,25 @@ Hardware required:
 
 Usage:
     python 01_daq_basics.py
+
+Without a DAQ connected (simulated device; see simulated_hardware.py):
+    PHYS4430_SIMULATE=1 python 01_daq_basics.py
 """
 
-import nidaqmx
-import nidaqmx.system
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 
+from scan_storage import ScanWriter
+
+if os.environ.get("PHYS4430_SIMULATE", "0") not in ("", "0"):
+    from simulated_hardware import nidaqmx
+else:
+    import nidaqmx
+    import nidaqmx.system
+
 
 def list_daq_devices():
     """
@@ -53,17 +64,57 @@ def list_daq_devices():
     return system.devices[0].name
 
 
-def read_single_voltage(device="Dev1", channel="ai0"):
+def open_voltage_task(device="Dev1", channel="ai0"):
+    """
+    Create a DAQ task for single-voltage reads that can be reused.
+
+    Setting up a task takes much longer than the measurement itself, so
+    when you need many single readings, create the task once and pass
+    it to read_single_voltage. Close the task when you are done (or use
+    it in a `with` block).
+
+    Parameters:
+        device: DAQ device name (e.g., "Dev1")
+        channel: Analog input channel (e.g., "ai0")
+
+    Returns:
+        Configured and committed nidaqmx.Task
+
+    Example:
+        with open_voltage_task("Dev1") as task:
+            voltages = [read_single_voltage(task=task) for _ in range(100)]
+    """
+    task = nidaqmx.Task()
+    try:
+        task.ai_channels.add_ai_voltage_chan(
+            f"{device}/{channel}",
+            min_val=-10.0,
+            max_val=10.0
+        )
+        # Reserve and program the hardware now instead of at every read
+        task.control(nidaqmx.constants.TaskMode.TASK_COMMIT)
+    except Exception:
+        task.close()
+        raise
+    return task
+
+
+def read_single_voltage(device="Dev1", channel="ai0", task=None):
     """
     Read a single voltage measurement from the DAQ.
 
     Parameters:
         device: DAQ device name (e.g., "Dev1")
         channel: Analog input channel (e.g., "ai0")
+        task: Optional task from open_voltage_task to reuse (device and
+            channel are then ignored)
 
     Returns:
         Voltage value in volts
     """
+    if task is not None:
+        return task.read()
+
     with nidaqmx.Task() as task:
         # Configure the analog input channel
         task.ai_channels.add_ai_voltage_chan(
@@ -143,6 +194,34 @@ def save_data_to_csv(times, voltages, filename=None):
     return filename
 
 
+def save_data_binary(times, voltages, filename=None, metadata=None):
+    """
+    Save acquired data in binary form (a .scan directory).
+
+    Text files are convenient but slow to write and several times larger
+    than the data. For long recordings, binary storage is much faster;
+    see scan_storage.py for the format and for export_csv, which converts
+    the result to CSV when needed.
+
+    Parameters:
+        times: Array of time values
+        voltages: Array of voltage values
+        filename: Output directory name (auto-generated if None)
+        metadata: dict of settings to store with the data (e.g. sample
+            rate and device name)
+    """
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"daq_data_{timestamp}.scan"
+
+    with ScanWriter(filename, ['Time (s)', 'Voltage (V)'],
+                    metadata=metadata) as writer:
+        writer.append(np.column_stack((times, voltages)))
+
+    print(f"Data saved to: {filename}")
+    return filename
+
+
 def plot_data(times, voltages, title="DAQ Measurement"):
     """
     Create a plot of the acquired data.
@@ -6,22 +6,48 @@ This script demonstrates curve fitting techniques for analyzing
 beam profile data from the knife-edge measurement.
 
 Topics covered:
-1. Loading data from CSV
+1. Loading data from CSV (with a binary cache for large batches)
 2. Defining fit functions (error function for beam profile)
 3. Performing nonlinear fits with scipy.optimize.curve_fit
 4. Extracting parameter uncertainties
 5. Calculating chi-squared
 6. Plotting data, fit, and residuals
+7. Caching fit results so unchanged data is not re-fitted
+8. Multi-start fitting for scans that only partly cover the edge
+9. A compiled (Numba) model for very large datasets
 
 Usage:
     python 02_fitting_example.py
 """
 
+import hashlib
+import json
+import math
+import os
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
+from scipy.optimize import OptimizeWarning, curve_fit
+from scipy.stats import qmc
 from scipy.special import erf
 
+# Optional fast CSV reader (multithreaded). Falls back to np.loadtxt.
+try:
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Optional compiled model for very large datasets. Falls back to NumPy.
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 
 def beam_profile_function(x, amplitude, center, width, offset):
     """
@@ -43,7 +69,257 @@ def beam_profile_function(x, amplitude, center, width, offset):
     return amplitude * erf(np.sqrt(2) * (x - center) / width) + offset
 
 
-def load_beam_data(filename):
+def beam_profile_jacobian(x, amplitude, center, width, offset):
+    """
+    Derivatives of beam_profile_function with respect to its parameters.
+
+    Supplying these to the fit (instead of letting it estimate them by
+    finite differences) saves several model evaluations per iteration.
+
+    Returns:
+        Array of shape (len(x), 4): d/d[amplitude, center, width, offset]
+    """
+    u = np.sqrt(2) * (x - center) / width
+    gaussian = amplitude * (2 / np.sqrt(np.pi)) * np.exp(-u ** 2)
+
+    jac = np.empty((np.size(x), 4))
+    jac[:, 0] = erf(u)
+    jac[:, 1] = -gaussian * np.sqrt(2) / width
+    jac[:, 2] = -gaussian * u / width
+    jac[:, 3] = 1.0
+    return jac
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, cache=True)
+    def _fused_beam_profile_kernel(x, y, weights, amplitude, center, width,
+                                   offset, model, residuals, jac,
+                                   compute_model, compute_residuals,
+                                   compute_jac):
+        """
+        Evaluate model, weighted residuals, chi-squared and Jacobian in
+        a single multithreaded pass over the data.
+
+        Each point is handled completely (erf, exp, derivatives) before
+        moving to the next, so no temporary arrays are created. Outputs
+        that are not requested may be passed as empty arrays.
+        """
+        sqrt2 = math.sqrt(2.0)
+        two_over_sqrt_pi = 2.0 / math.sqrt(math.pi)
+        chi2 = 0.0
+        for i in numba.prange(x.shape[0]):
+            u = sqrt2 * (x[i] - center) / width
+            e = math.erf(u)
+            value = amplitude * e + offset
+            if compute_model:
+                model[i] = value
+            if compute_residuals:
+                r = (y[i] - value) * weights[i]
+                residuals[i] = r
+                chi2 += r * r
+            if compute_jac:
+                gaussian = amplitude * two_over_sqrt_pi * math.exp(-u * u)
+                jac[i, 0] = e
+                jac[i, 1] = -gaussian * sqrt2 / width
+                jac[i, 2] = -gaussian * u / width
+                jac[i, 3] = 1.0
+        return chi2
+
+
+def evaluate_beam_profile(x, params, y=None, y_err=None, jacobian=False,
+                          engine='numpy'):
+    """
+    Evaluate the beam profile model and (optionally) residuals,
+    chi-squared and Jacobian.
+
+    For million-point scans the NumPy expression in beam_profile_function
+    creates several full-size temporary arrays. With engine='numba'
+    everything is computed in one fused, multithreaded loop instead.
+    Both engines give the same results.
+
+    Parameters:
+        x: Position array
+        params: [amplitude, center, width, offset]
+        y: Optional data array; if given, residuals and chi2 are computed
+        y_err: Optional uncertainties; residuals are (y - model) / y_err
+        jacobian: Also compute the Jacobian (see beam_profile_jacobian)
+        engine: 'numpy' (default, like fit_beam_profile), 'numba', or
+            'auto' (Numba if available)
+
+    Returns:
+        model: Model values
+        residuals: Weighted residuals (None if y is None)
+        chi2: Sum of squared weighted residuals (None if y is None)
+        jac: Jacobian, shape (len(x), 4) (None unless jacobian=True)
+    """
+    if engine == 'auto':
+        engine = 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if engine == 'numba' and not NUMBA_AVAILABLE:
+        raise RuntimeError("Numba is not installed (pip install numba)")
+    if engine not in ('numba', 'numpy'):
+        raise ValueError(f"Unknown engine: {engine}")
+
+    amplitude, center, width, offset = (float(p) for p in params)
+    x = np.ascontiguousarray(x, dtype=float)
+    have_data = y is not None
+
+    if engine == 'numpy':
+        model = beam_profile_function(x, amplitude, center, width, offset)
+        residuals = chi2 = jac = None
+        if have_data:
+            residuals = y - model
+            if y_err is not None:
+                residuals = residuals / y_err
+            chi2 = float(np.sum(residuals ** 2))
+        if jacobian:
+            jac = beam_profile_jacobian(x, amplitude, center, width, offset)
+        return model, residuals, chi2, jac
+
+    n = x.shape[0]
+    empty = np.empty(0)
+    if have_data:
+        y = np.ascontiguousarray(y, dtype=float)
+        if y_err is None:
+            weights = np.ones(n)
+        else:
+            weights = 1.0 / np.ascontiguousarray(
+                np.broadcast_to(y_err, (n,)), dtype=float
+            )
+    else:
+        y = weights = empty
+
+    model = np.empty(n)
+    residuals = np.empty(n) if have_data else empty
+    jac = np.empty((n, 4)) if jacobian else np.empty((0, 4))
+
+    chi2 = _fused_beam_profile_kernel(
+        x, y, weights, amplitude, center, width, offset,
+        model, residuals, jac, True, have_data, jacobian
+    )
+
+    return (model,
+            residuals if have_data else None,
+            float(chi2) if have_data else None,
+            jac if jacobian else None)
+
+
+class _CompiledBeamModel:
+    """
+    Model and Jacobian callables for curve_fit backed by the fused kernel.
+
+    The optimizer evaluates the model more often than the Jacobian (every
+    trial step needs the model, only accepted steps need the Jacobian),
+    so each is computed only when asked for. The last Jacobian is kept in
+    case it is requested again at the same parameters, and output
+    buffers are reused between iterations.
+    """
+
+    def __init__(self, x):
+        n = np.size(x)
+        self._model = np.empty(n)
+        self._jac = np.empty((n, 4))
+        self._empty = np.empty(0)
+        self._jac_params = None
+
+    def model(self, x, *params):
+        amplitude, center, width, offset = params
+        _fused_beam_profile_kernel(
+            x, self._empty, self._empty, amplitude, center, width, offset,
+            self._model, self._empty, self._empty.reshape(0, 4),
+            True, False, False
+        )
+        return self._model
+
+    def jacobian(self, x, *params):
+        if params != self._jac_params:
+            amplitude, center, width, offset = params
+            _fused_beam_profile_kernel(
+                x, self._empty, self._empty, amplitude, center, width,
+                offset, self._empty, self._empty, self._jac,
+                False, False, True
+            )
+            self._jac_params = params
+        return self._jac
+
+
+def _sidecar_path(filename):
+    """Path of the binary cache file kept next to a CSV file."""
+    return os.fspath(filename) + '.npz'
+
+
+def _read_csv_columns(filename):
+    """
+    Parse a numeric CSV file (skipping the header row) into a 2D array.
+
+    Uses the multithreaded pyarrow reader when it is installed, since
+    it is much faster than np.loadtxt for large files.
+    """
+    if PYARROW_AVAILABLE:
+        table = pa_csv.read_csv(
+            filename,
+            read_options=pa_csv.ReadOptions(
+                skip_rows=1, autogenerate_column_names=True
+            )
+        )
+        return np.column_stack([
+            column.to_numpy().astype(float) for column in table.columns
+        ])
+    return np.loadtxt(filename, delimiter=',', skiprows=1, ndmin=2)
+
+
+def load_csv_data(filename, use_cache=True):
+    """
+    Load a numeric CSV file (with one header row) as a 2D array.
+
+    Parsing text is slow, so a binary copy of the data is stored next
+    to the CSV (e.g. "scan.csv" -> "scan.csv.npz"). The copy is reused
+    as long as the CSV's modification time and size are unchanged;
+    otherwise the CSV is parsed again and the copy is refreshed.
+
+    Parameters:
+        filename: Path to CSV file
+        use_cache: Read/write the binary sidecar file (default: True)
+
+    Returns:
+        data: 2D array with one column per CSV column
+    """
+    if not use_cache:
+        return _read_csv_columns(filename)
+
+    stat = os.stat(filename)
+    sidecar = _sidecar_path(filename)
+
+    # Use the sidecar if it was made from this exact version of the CSV
+    try:
+        with np.load(sidecar) as cached:
+            if (int(cached['mtime_ns']) == stat.st_mtime_ns
+                    and int(cached['size']) == stat.st_size):
+                return cached['data']
+    except (OSError, KeyError, ValueError):
+        pass  # Missing, stale format, or unreadable - rebuild it
+
+    data = _read_csv_columns(filename)
+
+    # Write to a temporary file and rename, so an interrupted run never
+    # leaves a half-written sidecar behind. Failing to write the cache
+    # (e.g. read-only directory) is not an error.
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            suffix='.npz', dir=os.path.dirname(sidecar) or '.'
+        )
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, data=data, mtime_ns=stat.st_mtime_ns,
+                     size=stat.st_size)
+        os.replace(tmp_path, sidecar)
+    except OSError:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return data
+
+
+def load_beam_data(filename, use_cache=True):
     """
     Load beam profile data from CSV file.
 
@@ -51,18 +327,19 @@ def load_beam_data(filename):
 
     Parameters:
         filename: Path to CSV file
+        use_cache: Reuse a binary copy of the data (see load_csv_data)
 
     Returns:
         x: Position array
         y: Voltage array
     """
-    data = np.loadtxt(filename, delimiter=',', skiprows=1)
+    data = load_csv_data(filename, use_cache=use_cache)
     x = data[:, 0]
     y = data[:, 1]
     return x, y
 
 
-def load_beam_data_with_errors(filename):
+def load_beam_data_with_errors(filename, use_cache=True):
     """
     Load beam profile data with uncertainties from CSV file.
 
@@ -71,20 +348,185 @@ def load_beam_data_with_errors(filename):
 
     Parameters:
         filename: Path to CSV file
+        use_cache: Reuse a binary copy of the data (see load_csv_data)
 
     Returns:
         x: Position array
         y: Voltage array
         y_err: Uncertainty array
     """
-    data = np.loadtxt(filename, delimiter=',', skiprows=1)
+    data = load_csv_data(filename, use_cache=use_cache)
     x = data[:, 0]
     y = data[:, 1]
     y_err = data[:, 2]
     return x, y, y_err
 
 
-def fit_beam_profile(x, y, y_err=None):
+def _to_json(value):
+    """Convert NumPy values in a fit info dict for json.dumps."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in the fit cache")
+
+
+class FitCache:
+    """
+    Persistent cache of fit results, stored as one small .npz file per fit.
+
+    Re-fitting hundreds of profiles every time a report is rebuilt is
+    wasteful when neither the data nor the fit settings have changed.
+    Each entry is keyed on a hash of the data and the fit configuration
+    (see make_key), so any change to either produces a new entry.
+
+    The cache holds at most max_entries fits. When it grows beyond that,
+    the least recently used entries are deleted.
+
+    Example usage:
+        cache = FitCache()
+        popt, perr, pcov = fit_beam_profile(x, y, y_err, cache=cache)
+    """
+
+    def __init__(self, directory=None, max_entries=10000):
+        """
+        Open (or create) a fit cache.
+
+        Parameters:
+            directory: Folder for cache files
+                (default: ~/.cache/phys4430/fits)
+            max_entries: Maximum number of cached fits
+        """
+        if directory is None:
+            directory = os.path.join(
+                os.path.expanduser('~'), '.cache', 'phys4430', 'fits'
+            )
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(self.directory, exist_ok=True)
+        self._num_entries = len(self._entries())
+
+    @staticmethod
+    def make_key(x, y, y_err, model, p0_strategy, weighting, **settings):
+        """
+        Build a cache key from the data and the fit configuration.
+
+        Parameters:
+            x, y, y_err: Data arrays (y_err may be None)
+            model: Name of the model function
+            p0_strategy: Description of how initial guesses are chosen
+            weighting: Description of how the data are weighted
+            **settings: Any other arguments that change the result
+                (e.g. engine, n_starts, seed)
+
+        Returns:
+            Hex string that identifies this fit
+        """
+        h = hashlib.sha256()
+        for name, array in (('x', x), ('y', y), ('y_err', y_err)):
+            h.update(name.encode())
+            if array is None:
+                h.update(b'none')
+            else:
+                array = np.ascontiguousarray(array, dtype=float)
+                h.update(str(array.shape).encode())
+                h.update(array.tobytes())
+        for setting in (model, p0_strategy, weighting):
+            h.update(repr(setting).encode())
+        for name in sorted(settings):
+            h.update(f'{name}={settings[name]!r}'.encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory)
+                if entry.name.endswith('.npz')]
+
+    def get(self, key):
+        """
+        Look up a cached fit.
+
+        Returns:
+            (popt, pcov, info) if the fit is cached, otherwise None.
+            info is the dict stored with the fit (None if there was none).
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as cached:
+                popt, pcov = cached['popt'], cached['pcov']
+                info = (json.loads(str(cached['info']))
+                        if 'info' in cached else None)
+        except (OSError, KeyError, ValueError):
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        if info is not None:
+            # Lists in the stored info were arrays
+            info = {name: np.array(value) if isinstance(value, list) else value
+                    for name, value in info.items()}
+        return popt, pcov, info
+
+    def put(self, key, popt, pcov, info=None):
+        """
+        Store a fit result, evicting old entries if the cache is full.
+
+        Parameters:
+            key: Cache key (see make_key)
+            popt, pcov: Fit result
+            info: Optional dict of fit diagnostics (numbers, strings,
+                None and arrays) returned with the fit by get()
+        """
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix='.npz', dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                if info is None:
+                    np.savez(f, popt=popt, pcov=pcov)
+                else:
+                    info = json.dumps(info, default=_to_json)
+                    np.savez(f, popt=popt, pcov=pcov, info=np.array(info))
+            os.replace(tmp_path, path)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        if is_new:
+            self._num_entries += 1
+        if self._num_entries > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        """Delete the least recently used entries (about 10% of the cache)."""
+        entries = self._entries()
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        target = int(self.max_entries * 0.9)
+        for entry in entries[:max(len(entries) - target, 0)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        self._num_entries = len(self._entries())
+
+    def clear(self):
+        """Delete all cached fits."""
+        for entry in self._entries():
+            os.remove(entry.path)
+        self._num_entries = 0
+
+
+def fit_beam_profile(x, y, y_err=None, cache=None, verbose=True,
+                     full_output=False, n_starts=1, max_workers=None,
+                     seed=None, engine='numpy', executor=None):
     """
     Fit beam profile data to error function model.
 
@@ -92,49 +534,379 @@ def fit_beam_profile(x, y, y_err=None):
         x: Position array
         y: Voltage array
         y_err: Optional uncertainty array for weighted fit
+        cache: Optional FitCache; if this exact fit was done before,
+            the stored result is returned without re-fitting
+        verbose: Print the initial guesses (default: True)
+        full_output: Also return a dict of fit diagnostics
+        n_starts: Number of starting points. If greater than 1, the fit
+            is repeated from many starting points and the best result
+            is kept (see fit_beam_profile_multistart)
+        max_workers: Worker processes for multi-start fits
+        seed: Random seed for multi-start starting points
+        executor: Optional concurrent.futures executor for multi-start
+            fits (see fit_beam_profile_multistart)
+        engine: 'numpy' (default) or 'numba' to use the compiled model
+            with an analytic Jacobian, which is much faster for very
+            large datasets (see evaluate_beam_profile)
 
     Returns:
         popt: Optimal parameters [amplitude, center, width, offset]
         perr: Parameter uncertainties
         pcov: Full covariance matrix
+        info: (only if full_output) dict with 'nfev' (number of model
+            evaluations), 'njev' (Jacobian evaluations, or None if the
+            Jacobian was estimated numerically), 'message' and 'cached'.
+            Multi-start fits also report 'n_starts', 'n_converged',
+            'n_agree' and the per-start results (see
+            fit_beam_profile_multistart). A cached fit returns the info
+            stored with it, with 'cached' set to True.
     """
+    if n_starts > 1:
+        p0_strategy = f'latin-hypercube-{n_starts}-seed-{seed}'
+    else:
+        p0_strategy = 'heuristic'
+
+    if cache is not None:
+        cache_key = FitCache.make_key(
+            x, y, y_err,
+            model=beam_profile_function.__name__,
+            p0_strategy=p0_strategy,
+            weighting='absolute_sigma' if y_err is not None else 'unweighted',
+            engine=engine, n_starts=n_starts, seed=seed
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            popt, pcov, info = cached
+            if verbose:
+                print("Using cached fit result")
+            perr = np.sqrt(np.diag(pcov))
+            if full_output:
+                if info is None:
+                    info = {'nfev': 0, 'njev': 0, 'message': 'cached'}
+                info['cached'] = True
+                return popt, perr, pcov, info
+            return popt, perr, pcov
+
+    if n_starts > 1:
+        popt, perr, pcov, info = fit_beam_profile_multistart(
+            x, y, y_err, n_starts=n_starts, max_workers=max_workers,
+            seed=seed, verbose=verbose, engine=engine, executor=executor
+        )
+        if cache is not None:
+            cache.put(cache_key, popt, pcov, info)
+        if full_output:
+            return popt, perr, pcov, info
+        return popt, perr, pcov
+
     # Initial parameter guesses
-    y_min, y_max = np.min(y), np.max(y)
-    amplitude_guess = (y_max - y_min) / 2
-    offset_guess = (y_max + y_min) / 2
-    center_guess = x[np.argmin(np.abs(y - offset_guess))]
-    width_guess = (x[-1] - x[0]) / 10  # Rough guess
+    p0 = initial_guess(x, y)
+    amplitude_guess, center_guess, width_guess, offset_guess = p0
 
-    p0 = [amplitude_guess, center_guess, width_guess, offset_guess]
+    if verbose:
+        print("Initial guesses:")
+        print(f"  Amplitude: {amplitude_guess:.4f}")
+        print(f"  Center: {center_guess:.6f}")
+        print(f"  Width: {width_guess:.6f}")
+        print(f"  Offset: {offset_guess:.4f}")
 
-    print("Initial guesses:")
-    print(f"  Amplitude: {amplitude_guess:.4f}")
-    print(f"  Center: {center_guess:.6f}")
-    print(f"  Width: {width_guess:.6f}")
-    print(f"  Offset: {offset_guess:.4f}")
+    x, model, jac = _fit_model(x, engine)
 
     # Perform the fit
     if y_err is not None:
         # Weighted fit using uncertainties
-        popt, pcov = curve_fit(
-            beam_profile_function, x, y,
+        popt, pcov, infodict, message, _ = curve_fit(
+            model, x, y,
             p0=p0,
             sigma=y_err,
-            absolute_sigma=True
+            absolute_sigma=True,
+            jac=jac,
+            full_output=True
         )
     else:
         # Unweighted fit
-        popt, pcov = curve_fit(
-            beam_profile_function, x, y,
-            p0=p0
+        popt, pcov, infodict, message, _ = curve_fit(
+            model, x, y,
+            p0=p0,
+            jac=jac,
+            full_output=True
         )
 
     # Extract uncertainties from covariance matrix
     perr = np.sqrt(np.diag(pcov))
 
+    info = {'nfev': int(infodict['nfev']),
+            'njev': int(infodict['njev']) if 'njev' in infodict else None,
+            'message': message,
+            'cached': False}
+    if cache is not None:
+        cache.put(cache_key, popt, pcov, info)
+
+    if full_output:
+        return popt, perr, pcov, info
     return popt, perr, pcov
 
 
+def _fit_model(x, engine):
+    """
+    Model and Jacobian functions for curve_fit for the chosen engine.
+
+    Returns:
+        x: Positions as the model expects them
+        model: Model function
+        jac: Jacobian function, or None to estimate it numerically
+    """
+    if engine == 'numba':
+        if not NUMBA_AVAILABLE:
+            raise RuntimeError("Numba is not installed (pip install numba)")
+        x = np.ascontiguousarray(x, dtype=float)
+        compiled = _CompiledBeamModel(x)
+        return x, compiled.model, compiled.jacobian
+    if engine == 'numpy':
+        return x, beam_profile_function, None
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def initial_guess(x, y):
+    """
+    Estimate starting parameters for the beam profile fit from the data.
+
+    Returns:
+        p0: [amplitude, center, width, offset]
+    """
+    y_min, y_max = np.min(y), np.max(y)
+    amplitude_guess = (y_max - y_min) / 2
+    offset_guess = (y_max + y_min) / 2
+    center_guess = x[np.argmin(np.abs(y - offset_guess))]
+    width_guess = (x[-1] - x[0]) / 10  # Rough guess
+
+    return [amplitude_guess, center_guess, width_guess, offset_guess]
+
+
+def _standardize_solution(popt, pcov):
+    """
+    Flip the sign of a solution with negative width.
+
+    The model is unchanged by (amplitude, width) -> (-amplitude, -width),
+    so fits can converge to either. Reporting positive widths makes
+    solutions from different starting points comparable.
+    """
+    if popt[2] >= 0:
+        return popt, pcov
+    signs = np.array([-1.0, 1.0, -1.0, 1.0])
+    return popt * signs, pcov * np.outer(signs, signs)
+
+
+# Multi-start fits on fewer points than this run in the calling process.
+# Each start then takes only a few milliseconds, so all of them together
+# take less time than starting the worker processes (which on Windows
+# also re-import this module).
+MULTISTART_SERIAL_POINTS = 2000
+
+# Worker processes shared by all multi-start fits (see _multistart_pool)
+_pool = None
+_pool_workers = 0
+
+
+def _multistart_pool(max_workers):
+    """
+    Process pool for multi-start fits, created on first use and reused.
+
+    Starting worker processes takes much longer than a typical fit, so
+    the pool is kept between calls. It is replaced only if a different
+    number of workers is requested.
+    """
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != max_workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=max_workers)
+        _pool_workers = max_workers
+    return _pool
+
+
+def _fit_from_starts(x, y, y_err, starts, engine):
+    """
+    Run one local fit from each starting point.
+
+    All starts of a batch share one copy of the data, so the data are
+    sent to a worker process once per batch rather than once per start.
+
+    Returns:
+        List with (popt, pcov, chi2, nfev) for each start, or None where
+        the fit failed
+    """
+    x, model, jac = _fit_model(x, engine)
+    results = []
+    for p0 in starts:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', OptimizeWarning)
+                popt, pcov, infodict, _, _ = curve_fit(
+                    model, x, y,
+                    p0=p0,
+                    sigma=y_err,
+                    absolute_sigma=y_err is not None,
+                    jac=jac,
+                    full_output=True
+                )
+        except (RuntimeError, ValueError):
+            results.append(None)
+            continue
+
+        residuals = infodict['fvec']  # Already divided by y_err if given
+        chi2 = float(np.sum(residuals ** 2))
+        popt, pcov = _standardize_solution(popt, pcov)
+        results.append((popt, pcov, chi2, int(infodict['nfev'])))
+    return results
+
+
+def multistart_points(x, y, n_starts, seed=None):
+    """
+    Draw starting points from a Latin hypercube over (center, width).
+
+    A Latin hypercube spreads the points evenly over both parameters.
+    Centers are drawn from the scanned range plus a margin on each side
+    (the edge may lie just outside a scan), and widths are drawn
+    uniformly in log space from the point spacing up to the full range.
+    Amplitude and offset use the usual data-based guesses, since the fit
+    finds those easily once center and width are close.
+
+    Parameters:
+        x, y: Data arrays
+        n_starts: Number of starting points
+        seed: Random seed (for reproducible starting points)
+
+    Returns:
+        Array of shape (n_starts, 4) of starting parameters
+    """
+    amplitude_guess, _, _, offset_guess = initial_guess(x, y)
+
+    x_min, x_max = np.min(x), np.max(x)
+    span = x_max - x_min
+    spacing = span / max(len(x) - 1, 1)
+
+    sampler = qmc.LatinHypercube(d=2, seed=seed)
+    unit = sampler.random(n_starts)
+
+    centers = x_min - 0.25 * span + unit[:, 0] * 1.5 * span
+    log_widths = (np.log(spacing)
+                  + unit[:, 1] * (np.log(span) - np.log(spacing)))
+    widths = np.exp(log_widths)
+
+    starts = np.empty((n_starts, 4))
+    starts[:, 0] = amplitude_guess
+    starts[:, 1] = centers
+    starts[:, 2] = widths
+    starts[:, 3] = offset_guess
+    return starts
+
+
+def fit_beam_profile_multistart(x, y, y_err=None, n_starts=16,
+                                max_workers=None, seed=None, verbose=True,
+                                engine='numpy', executor=None):
+    """
+    Fit a beam profile from many starting points and keep the best fit.
+
+    Scans that start or end in the middle of the edge can send a single
+    fit to a wrong local minimum, or make it fail. Here the fit is run
+    from n_starts starting points (see multistart_points) in parallel
+    worker processes, and the solution with the lowest chi-squared wins.
+    The worker processes are kept for the next call; small datasets
+    (fewer than MULTISTART_SERIAL_POINTS points) are fitted in this
+    process, where that is faster.
+
+    The number of starts that reached the same answer (center and width
+    within one standard error of the best fit) indicates how trustworthy
+    the result is: if only one or two starts agree, the data probably
+    do not constrain the fit well.
+
+    Parameters:
+        x: Position array
+        y: Voltage array
+        y_err: Optional uncertainty array for weighted fit
+        n_starts: Number of starting points
+        max_workers: Number of worker processes (default: CPU count;
+            1 runs all fits in this process)
+        seed: Random seed for the starting points
+        verbose: Print a summary of the starts
+        engine: 'numpy' or 'numba' (see fit_beam_profile)
+        executor: Optional concurrent.futures executor to run the fits
+            in instead of the shared process pool; the starts are split
+            into max_workers batches
+
+    Returns:
+        popt: Best parameters [amplitude, center, width, offset]
+        perr: Parameter uncertainties
+        pcov: Full covariance matrix
+        info: dict with 'n_starts', 'n_converged', 'n_agree', 'nfev',
+            'njev', 'message' and 'cached', and the per-start results
+            'start_points' (n_starts x 4), 'start_popt' (n_starts x 4,
+            NaN where the fit failed) and 'start_chi2' (NaN where the
+            fit failed)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if y_err is not None:
+        y_err = np.asarray(y_err, dtype=float)
+
+    starts = multistart_points(x, y, n_starts, seed=seed)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, n_starts)
+    if executor is None and len(x) >= MULTISTART_SERIAL_POINTS \
+            and max_workers > 1:
+        executor = _multistart_pool(max_workers)
+
+    if executor is None:
+        results = _fit_from_starts(x, y, y_err, starts, engine)
+    else:
+        # One batch per worker, so each worker receives the data once
+        futures = [
+            executor.submit(_fit_from_starts, x, y, y_err, batch, engine)
+            for batch in np.array_split(starts, max_workers)
+        ]
+        results = [result for future in futures
+                   for result in future.result()]
+
+    converged = [result for result in results if result is not None]
+    if not converged:
+        raise RuntimeError(
+            f"All {n_starts} starting points failed to converge"
+        )
+
+    popt, pcov, _, _ = min(converged, key=lambda result: result[2])
+    perr = np.sqrt(np.diag(pcov))
+
+    # Count starts that found the same center and width as the best fit
+    tolerance = np.where(np.isfinite(perr[1:3]) & (perr[1:3] > 0),
+                         perr[1:3], 1e-6 * np.abs(popt[1:3]))
+    n_agree = sum(
+        np.all(np.abs(result[0][1:3] - popt[1:3]) <= tolerance)
+        for result in converged
+    )
+
+    failed = (np.full(4, np.nan), None, np.nan, 0)
+    info = {'n_starts': n_starts,
+            'n_converged': len(converged),
+            'n_agree': int(n_agree),
+            'nfev': sum(result[3] for result in converged),
+            'njev': None,
+            'message': f'{n_agree} of {n_starts} starts agree',
+            'cached': False,
+            'start_points': starts,
+            'start_popt': np.array([(result or failed)[0]
+                                    for result in results]),
+            'start_chi2': np.array([(result or failed)[2]
+                                    for result in results])}
+
+    if verbose:
+        print(f"Multi-start fit: {len(converged)} of {n_starts} starts "
+              f"converged, {n_agree} agree with the best fit")
+
+    return popt, perr, pcov, info
+
+
 def calculate_chi_squared(y_data, y_fit, y_err, num_params):
     """
     Calculate chi-squared and reduced chi-squared.
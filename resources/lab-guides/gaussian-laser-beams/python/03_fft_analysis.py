@@ -11,35 +11,115 @@ Topics covered:
 3. Interpreting the spectrum
 4. Real-time spectral analysis
 5. Nyquist frequency and aliasing
+6. Fast real-input transforms for long or batched records
+7. Averaged (Welch) power spectral density for noise measurements
+8. Sliding DFT: updating a few frequency bins sample by sample
+9. Goertzel detection of a few known frequencies
+10. Zoom FFT (chirp-z transform) for high resolution in a narrow band
+11. Multitaper power spectral density for short, noisy records
+12. Spectrograms of very long recordings, computed piece by piece
 
 Usage:
     python 03_fft_analysis.py
 """
 
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import numpy as np
 import matplotlib.pyplot as plt
+import scipy.fft
+import scipy.signal
+
+# Batches of records with at least this many samples in total are
+# transformed on all CPU cores. scipy.fft threads split the work by
+# record, so a single 1D record always runs on one core.
+PARALLEL_FFT_SIZE = 2 ** 16
+
+
+def fast_fft_length(n):
+    """
+    Smallest length >= n that the FFT can transform quickly.
+
+    FFTs are fastest for lengths whose only prime factors are small
+    (2, 3, 5, ...). A prime length such as 10007 can be many times
+    slower than 10240.
+    """
+    return scipy.fft.next_fast_len(n, real=True)
+
+
+def real_spectrum(signal, sample_rate, axis=-1, pad_to_fast_length=False,
+                  workers=None):
+    """
+    One-sided FFT of a real signal using a real-input transform.
 
+    For real signals, the negative-frequency half of the FFT is just the
+    complex conjugate of the positive half, so rfft computes only the
+    N/2 + 1 unique values - about half the work and memory of np.fft.fft.
 
-def compute_fft(signal, sample_rate):
+    Parameters:
+        signal: Array of signal values. May hold several records, one
+            per row (or along any other axis)
+        sample_rate: Sampling rate in Hz
+        axis: Axis along which time runs (default: last)
+        pad_to_fast_length: Zero-pad to the next fast FFT length
+        workers: Number of threads (default: all cores for large
+            batches of records; threads only help with batches)
+
+    Returns:
+        frequencies: Array of positive frequency values (Hz)
+        fft_result: Complex one-sided FFT along `axis`
+        n: Number of samples before padding (for normalization)
+    """
+    signal = np.asarray(signal, dtype=float)
+    n = signal.shape[axis]
+    n_fft = fast_fft_length(n) if pad_to_fast_length else n
+
+    if workers is None:
+        batched = signal.size > n
+        workers = -1 if batched and signal.size >= PARALLEL_FFT_SIZE else 1
+
+    fft_result = scipy.fft.rfft(signal, n=n_fft, axis=axis, workers=workers)
+    frequencies = scipy.fft.rfftfreq(n_fft, d=1/sample_rate)
+
+    return frequencies, fft_result, n
+
+
+def compute_fft(signal, sample_rate, axis=-1, pad_to_fast_length=False,
+                workers=None):
     """
     Compute the Fast Fourier Transform of a signal.
 
     Parameters:
-        signal: 1D array of signal values
+        signal: 1D array of signal values (or several records; see axis)
         sample_rate: Sampling rate in Hz
+        axis: Axis along which time runs (default: last)
+        pad_to_fast_length: Zero-pad to the next fast FFT length
+        workers: Number of threads (default: all cores for large
+            batches of records; threads only help with batches)
 
     Returns:
         frequencies: Array of frequency values (Hz)
         magnitude: Array of magnitude values
         phase: Array of phase values (radians)
     """
-    n = len(signal)
-
-    # Compute FFT
-    fft_result = np.fft.fft(signal)
+    _, half, n = real_spectrum(signal, sample_rate, axis=axis,
+                               pad_to_fast_length=pad_to_fast_length,
+                               workers=workers)
+    half = np.moveaxis(half, axis, -1)
+    n_fft = fast_fft_length(n) if pad_to_fast_length else n
+
+    # Rebuild the negative frequencies from the positive ones:
+    # X[N - k] = conj(X[k]) for real signals
+    negative = np.conj(half[..., 1:(n_fft + 1) // 2][..., ::-1])
+    fft_result = np.moveaxis(np.concatenate((half, negative), axis=-1),
+                             -1, axis)
 
     # Compute frequency axis
-    frequencies = np.fft.fftfreq(n, d=1/sample_rate)
+    frequencies = np.fft.fftfreq(n_fft, d=1/sample_rate)
 
     # Get magnitude and phase
     magnitude = np.abs(fft_result) / n  # Normalize by number of points
@@ -48,7 +128,8 @@ def compute_fft(signal, sample_rate):
     return frequencies, magnitude, phase
 
 
-def compute_power_spectrum(signal, sample_rate):
+def compute_power_spectrum(signal, sample_rate, axis=-1,
+                           pad_to_fast_length=False, workers=None):
     """
     Compute the one-sided power spectrum of a signal.
 
@@ -56,34 +137,492 @@ def compute_power_spectrum(signal, sample_rate):
     need the positive frequency half.
 
     Parameters:
-        signal: 1D array of signal values
+        signal: 1D array of signal values (or several records; see axis)
         sample_rate: Sampling rate in Hz
+        axis: Axis along which time runs (default: last)
+        pad_to_fast_length: Zero-pad to the next fast FFT length
+        workers: Number of threads (default: all cores for large
+            batches of records; threads only help with batches)
 
     Returns:
         frequencies: Array of positive frequency values (Hz)
         power: Array of power values
     """
-    n = len(signal)
-
-    # Compute FFT
-    fft_result = np.fft.fft(signal)
-
     # One-sided spectrum (positive frequencies only)
     # For N points, we get N/2 + 1 unique frequencies
-    n_unique = n // 2 + 1
-
-    frequencies = np.fft.fftfreq(n, d=1/sample_rate)[:n_unique]
-    frequencies = np.abs(frequencies)  # Make all positive
+    frequencies, fft_result, n = real_spectrum(
+        signal, sample_rate, axis=axis,
+        pad_to_fast_length=pad_to_fast_length, workers=workers
+    )
 
     # Power spectrum (magnitude squared)
-    power = (np.abs(fft_result[:n_unique]) / n) ** 2
+    power = (np.abs(fft_result) / n) ** 2
 
     # Double the power for frequencies that appear twice (all except DC and Nyquist)
-    power[1:-1] *= 2
+    power = np.moveaxis(power, axis, -1)
+    power[..., 1:-1] *= 2
+    power = np.moveaxis(power, -1, axis)
+
+    return frequencies, power
+
+
+class WelchAccumulator:
+    """
+    Averaged power spectral density (Welch's method), built up chunk by
+    chunk.
+
+    A single periodogram (compute_power_spectrum) of a noisy signal is
+    itself very noisy: the scatter at each frequency is as large as the
+    value. Welch's method splits the record into overlapping segments,
+    applies a window to each, and averages their spectra. Averaging K
+    segments reduces the scatter by about sqrt(K).
+
+    Data can be added in chunks of any size with update(), so an hour of
+    DAQ data can be reduced to a smooth PSD without ever holding the
+    whole record in memory: only one partial segment is kept between
+    chunks.
+
+    The result is a density in V^2/Hz (if the signal is in volts), so
+    its integral over frequency equals the signal variance.
+
+    Example usage:
+        welch = WelchAccumulator(sample_rate=10000, segment_length=4096)
+        for chunk in chunks:
+            welch.update(chunk)
+        frequencies, psd = welch.result()
+    """
+
+    def __init__(self, sample_rate, segment_length=1024, overlap=0.5,
+                 window='hann', detrend=True):
+        """
+        Parameters:
+            sample_rate: Sampling rate in Hz
+            segment_length: Samples per segment (sets the frequency
+                resolution: sample_rate / segment_length)
+            overlap: Fraction of each segment shared with the next
+                (0 <= overlap < 1; 0.5 is standard for a Hann window)
+            window: Window name (see scipy.signal.get_window)
+            detrend: Subtract each segment's mean before the FFT
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError("overlap must be between 0 and 1")
+
+        self.sample_rate = sample_rate
+        self.segment_length = segment_length
+        self.step = segment_length - int(overlap * segment_length)
+        self.window = scipy.signal.get_window(window, segment_length)
+        self.detrend = detrend
+
+        self.frequencies = scipy.fft.rfftfreq(segment_length,
+                                              d=1/sample_rate)
+        self._power_sum = np.zeros(len(self.frequencies))
+        self._leftover = np.empty(0)
+        self.num_segments = 0
+
+    def update(self, chunk):
+        """Add a chunk of samples and process every complete segment."""
+        data = np.concatenate((self._leftover, np.asarray(chunk, float)))
+        if len(data) < self.segment_length:
+            self._leftover = data
+            return
+
+        # All complete segments in one 2D array (a view, not a copy)
+        segments = np.lib.stride_tricks.sliding_window_view(
+            data, self.segment_length
+        )[::self.step]
+        if self.detrend:
+            segments = segments - segments.mean(axis=1, keepdims=True)
+
+        spectra = scipy.fft.rfft(segments * self.window, axis=1)
+        self._power_sum += np.sum(np.abs(spectra) ** 2, axis=0)
+        self.num_segments += len(segments)
+
+        # Keep the samples that the next segment will start with
+        self._leftover = data[len(segments) * self.step:].copy()
+
+    def result(self):
+        """
+        Return the averaged one-sided PSD of all data added so far.
+
+        Returns:
+            frequencies: Array of positive frequency values (Hz)
+            psd: Power spectral density (signal units^2 per Hz)
+        """
+        if self.num_segments == 0:
+            raise ValueError("Not enough data for one segment yet")
+
+        # Scale so the PSD integrates to the signal variance
+        scale = 1.0 / (self.sample_rate * np.sum(self.window ** 2))
+        psd = self._power_sum / self.num_segments * scale
+
+        # Double all frequencies that appear twice (all except DC and,
+        # for even lengths, Nyquist)
+        if self.segment_length % 2 == 0:
+            psd[1:-1] *= 2
+        else:
+            psd[1:] *= 2
+
+        return self.frequencies, psd
+
+
+def compute_welch_psd(signal, sample_rate, segment_length=1024,
+                      overlap=0.5, window='hann'):
+    """
+    Compute an averaged power spectral density with Welch's method.
+
+    Parameters:
+        signal: 1D array (or list) of signal values, or an iterable of
+            chunks (e.g. successive DAQ reads), which are processed one
+            at a time
+        sample_rate: Sampling rate in Hz
+        segment_length: Samples per segment
+        overlap: Fraction of overlap between segments
+        window: Window name (see scipy.signal.get_window)
+
+    Returns:
+        frequencies: Array of positive frequency values (Hz)
+        psd: Power spectral density (signal units^2 per Hz)
+    """
+    welch = WelchAccumulator(sample_rate, segment_length=segment_length,
+                             overlap=overlap, window=window)
+
+    # A sequence of numbers is one record; anything else holds chunks
+    if isinstance(signal, np.ndarray) or (
+            isinstance(signal, (list, tuple)) and len(signal) > 0
+            and np.ndim(signal[0]) == 0):
+        welch.update(signal)
+    else:
+        for chunk in signal:
+            welch.update(chunk)
+
+    return welch.result()
+
+
+@lru_cache(maxsize=32)
+def _zoom_fft_plan(n, f_start, f_stop, num_bins, sample_rate):
+    """
+    Set up (and remember) a chirp-z transform for one record length and
+    band, so repeated spectra of same-length records skip the setup.
+    """
+    return scipy.signal.ZoomFFT(n, [f_start, f_stop], num_bins,
+                                fs=sample_rate, endpoint=True)
+
+
+def compute_zoom_spectrum(signal, sample_rate, f_start, f_stop,
+                          num_bins=1000, axis=-1):
+    """
+    Power spectrum evaluated only in the band f_start to f_stop.
+
+    To see closely spaced lines clearly, the spectrum must be sampled
+    on a fine frequency grid. Zero-padding does that for the whole
+    0 to Nyquist range, so a fine grid means a huge FFT. The zoom FFT
+    (chirp-z transform) computes the same values only on num_bins
+    frequencies spread over the band of interest. Its cost grows with
+    the record length and the number of bins, not with the padding.
+
+    Note that a finer grid shows the shape of the spectrum in more
+    detail, but the true resolution is still about 1 / (record length).
+
+    Parameters:
+        signal: Array of signal values (several records along `axis` OK)
+        sample_rate: Sampling rate in Hz
+        f_start, f_stop: Band of interest in Hz (both included)
+        num_bins: Number of frequencies in the band
+        axis: Axis along which time runs (default: last)
+
+    Returns:
+        frequencies: Array of frequency values (Hz)
+        power: Power at each frequency, normalized as in
+            compute_power_spectrum
+    """
+    signal = np.asarray(signal)
+    n = signal.shape[axis]
+
+    plan = _zoom_fft_plan(n, float(f_start), float(f_stop), int(num_bins),
+                          float(sample_rate))
+    values = plan(signal, axis=axis)
+    frequencies = np.linspace(f_start, f_stop, num_bins)
+
+    # Same one-sided normalization as compute_power_spectrum: positive
+    # frequencies other than Nyquist also stand for their negative twin
+    power = (np.abs(values) / n) ** 2
+    doubled = (frequencies > 0) & (frequencies < sample_rate / 2)
+    shape = [1] * power.ndim
+    shape[axis] = num_bins
+    power = power * np.where(doubled, 2.0, 1.0).reshape(shape)
 
     return frequencies, power
 
 
+@lru_cache(maxsize=16)
+def dpss_tapers(n, nw, num_tapers):
+    """
+    Discrete prolate spheroidal (Slepian) tapers, cached.
+
+    Computing the tapers is much more expensive than the FFTs that use
+    them, so they are kept for each (n, nw, num_tapers) and reused.
+    The returned arrays are read-only because they are shared.
+
+    Returns:
+        tapers: Array of shape (num_tapers, n), each with unit energy
+        ratios: Fraction of each taper's energy inside the band +-nw/n
+            (close to 1 for a good taper)
+    """
+    tapers, ratios = scipy.signal.windows.dpss(n, nw, Kmax=num_tapers,
+                                               return_ratios=True)
+    tapers.setflags(write=False)
+    ratios.setflags(write=False)
+    return tapers, ratios
+
+
+def compute_multitaper_psd(signal, sample_rate, nw=4, num_tapers=None,
+                           adaptive=True, max_iterations=100):
+    """
+    Power spectral density by the multitaper method.
+
+    For a short record, a single windowed FFT is both noisy (large
+    scatter at each frequency) and leaky (strong peaks spill into
+    neighboring frequencies). The multitaper method multiplies the
+    record by several orthogonal "Slepian" tapers, each with very low
+    leakage, and averages the resulting spectra. Because the tapers are
+    orthogonal, the spectra are nearly independent and averaging K of
+    them reduces the scatter by about sqrt(K), without cutting the
+    record into shorter pieces as Welch's method does.
+
+    The price is a frequency resolution of about 2 * nw / T (T is the
+    record length).
+
+    With adaptive=True, the higher tapers (which leak more) are given
+    less weight at frequencies where the spectrum is weak (Thomson's
+    adaptive weighting).
+
+    Parameters:
+        signal: 1D array of signal values (or several records along the
+            first axes, with time along the last axis)
+        sample_rate: Sampling rate in Hz
+        nw: Time-bandwidth product (typically 2 to 4)
+        num_tapers: Number of tapers (default: 2 * nw - 1)
+        adaptive: Use adaptive weighting (default: True)
+        max_iterations: Iteration limit for the adaptive weights
+
+    Returns:
+        frequencies: Array of positive frequency values (Hz)
+        psd: Power spectral density (signal units^2 per Hz)
+    """
+    signal = np.asarray(signal, dtype=float)
+    n = signal.shape[-1]
+    if num_tapers is None:
+        num_tapers = max(1, int(2 * nw) - 1)
+
+    tapers, ratios = dpss_tapers(n, float(nw), int(num_tapers))
+
+    # Remove the mean, then transform all tapered copies in one batch
+    signal = signal - signal.mean(axis=-1, keepdims=True)
+    tapered = signal[..., np.newaxis, :] * tapers
+    _, spectra, _ = real_spectrum(tapered, sample_rate)
+    eigenspectra = np.abs(spectra) ** 2  # Shape (..., tapers, frequencies)
+
+    if adaptive and num_tapers > 1:
+        # Thomson's adaptive weights, iterated to self-consistency:
+        #   d_k = S / (lambda_k S + (1 - lambda_k) sigma^2)
+        #   S = sum(lambda_k d_k^2 |Y_k|^2) / sum(lambda_k d_k^2)
+        variance = np.mean(signal ** 2, axis=-1)[..., np.newaxis]
+        lam = ratios[:, np.newaxis]
+        estimate = np.mean(eigenspectra[..., :2, :], axis=-2)
+        for _ in range(max_iterations):
+            d = estimate[..., np.newaxis, :] / (
+                lam * estimate[..., np.newaxis, :]
+                + (1 - lam) * variance[..., np.newaxis]
+            )
+            weights = lam * d ** 2
+            new_estimate = (np.sum(weights * eigenspectra, axis=-2)
+                            / np.sum(weights, axis=-2))
+            converged = np.allclose(new_estimate, estimate, rtol=1e-6,
+                                    atol=0)
+            estimate = new_estimate
+            if converged:
+                break
+        power = estimate
+    else:
+        power = np.mean(eigenspectra, axis=-2)
+
+    # Tapers have unit energy, so |Y|^2 / sample_rate is a density.
+    # Double all frequencies that appear twice (all except DC and Nyquist)
+    psd = power / sample_rate
+    psd[..., 1:] *= 2
+    if n % 2 == 0:
+        psd[..., -1] /= 2
+
+    frequencies = scipy.fft.rfftfreq(n, d=1/sample_rate)
+    return frequencies, psd
+
+
+def _spectrogram_pixels(data, num_pixels, sample_rate, window, step,
+                        frames_per_pixel, freq_starts):
+    """
+    Compute num_pixels rows of a downsampled spectrogram.
+
+    data must start at the first sample of the first frame. Each row is
+    the average PSD of frames_per_pixel consecutive frames, and adjacent
+    frequency bins are averaged in groups starting at freq_starts.
+    """
+    segment_length = len(window)
+    num_frames = num_pixels * frames_per_pixel
+    frames = np.lib.stride_tricks.sliding_window_view(
+        data[:(num_frames - 1) * step + segment_length], segment_length
+    )[::step]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+
+    power = np.abs(scipy.fft.rfft(frames * window, axis=1)) ** 2
+    power /= sample_rate * np.sum(window ** 2)
+    power[:, 1:] *= 2
+    if segment_length % 2 == 0:
+        power[:, -1] /= 2
+
+    # Average frames in time, then bins in frequency
+    power = power.reshape(num_pixels, frames_per_pixel, -1).mean(axis=1)
+    counts = np.diff(np.append(freq_starts, power.shape[1]))
+    return np.add.reduceat(power, freq_starts, axis=1) / counts
+
+
+def streaming_spectrogram(source, sample_rate, output_file,
+                          segment_length=1024, overlap=0.5, window='hann',
+                          frames_per_pixel=1, bins_per_pixel=1,
+                          pixels_per_block=256, num_samples=None,
+                          max_workers=None):
+    """
+    Spectrogram of a recording too long to hold in memory.
+
+    The record is processed in blocks of consecutive frames (short-time
+    FFTs with a fixed overlap). Each block is reduced to a few rows of a
+    downsampled time-frequency image, which is written straight into an
+    .npy file on disk. Memory use therefore depends only on the block
+    size, not on the record length. For file or array sources the
+    blocks are independent and are computed in parallel threads.
+
+    Parameters:
+        source: One of
+            - path to a .npy file (memory-mapped, not loaded),
+            - path to a raw binary file of float64 samples,
+            - a 1D array or np.memmap,
+            - an iterable of 1D chunks (requires num_samples)
+        sample_rate: Sampling rate in Hz
+        output_file: Path of the .npy file for the image, or None to
+            keep the image in memory (for records that fit in memory)
+        segment_length: Samples per FFT frame
+        overlap: Fraction of overlap between frames
+        window: Window name (see scipy.signal.get_window)
+        frames_per_pixel: Frames averaged into each image row
+        bins_per_pixel: Frequency bins averaged into each image column
+        pixels_per_block: Image rows computed per block
+        num_samples: Total number of samples (needed for iterables)
+        max_workers: Threads for parallel blocks (default: CPU count)
+
+    Returns:
+        times: Time at the center of each image row (s)
+        frequencies: Frequency of each image column (Hz)
+        image: Read-only memory-mapped PSD image, shape
+            (len(times), len(frequencies)), in signal units^2 per Hz
+            (an ordinary array if output_file is None)
+
+    When output_file is given, the times and frequencies are also saved
+    next to the image, in a file ending in "_axes.npz".
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be between 0 and 1")
+
+    # Open the source without reading it into memory
+    chunks = None
+    if isinstance(source, (str, os.PathLike)):
+        if os.fspath(source).endswith('.npy'):
+            data = np.load(source, mmap_mode='r')
+        else:
+            data = np.memmap(source, dtype=np.float64, mode='r')
+    elif isinstance(source, np.ndarray):
+        data = source
+    else:
+        if num_samples is None:
+            raise ValueError("num_samples is required for an iterable source")
+        chunks = iter(source)
+        data = None
+    if data is not None:
+        num_samples = len(data)
+
+    window = scipy.signal.get_window(window, segment_length)
+    step = segment_length - int(overlap * segment_length)
+    num_frames = (num_samples - segment_length) // step + 1
+    num_pixels = num_frames // frames_per_pixel
+    if num_pixels < 1:
+        raise ValueError("Record is too short for one image row")
+
+    all_frequencies = scipy.fft.rfftfreq(segment_length, d=1/sample_rate)
+    freq_starts = np.arange(0, len(all_frequencies), bins_per_pixel)
+    frequencies = np.add.reduceat(all_frequencies, freq_starts) \
+        / np.diff(np.append(freq_starts, len(all_frequencies)))
+
+    pixel_step = frames_per_pixel * step  # Samples between image rows
+    pixel_span = (frames_per_pixel - 1) * step + segment_length
+    times = (np.arange(num_pixels) * pixel_step + pixel_span / 2) / sample_rate
+
+    shape = (num_pixels, len(frequencies))
+    if output_file is None:
+        image = np.empty(shape, dtype=np.float32)
+    else:
+        image = np.lib.format.open_memmap(output_file, mode='w+',
+                                          dtype=np.float32, shape=shape)
+
+    def block_samples(num_rows):
+        return (num_rows * frames_per_pixel - 1) * step + segment_length
+
+    block_starts = range(0, num_pixels, pixels_per_block)
+
+    if data is not None:
+        # Independent blocks, computed in parallel
+        def compute_block(first_pixel):
+            rows = min(pixels_per_block, num_pixels - first_pixel)
+            start = first_pixel * pixel_step
+            block = np.asarray(data[start:start + block_samples(rows)],
+                               dtype=float)
+            image[first_pixel:first_pixel + rows] = _spectrogram_pixels(
+                block, rows, sample_rate, window, step, frames_per_pixel,
+                freq_starts
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(compute_block, block_starts))
+    else:
+        # Chunks arrive in order: collect just enough samples for each
+        # block, then discard the ones no later block needs
+        buffer = np.empty(0)
+        for first_pixel in block_starts:
+            rows = min(pixels_per_block, num_pixels - first_pixel)
+            needed = block_samples(rows)
+            while len(buffer) < needed:
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    raise ValueError("Source ended before num_samples")
+                buffer = np.concatenate((buffer, np.asarray(chunk, float)))
+            image[first_pixel:first_pixel + rows] = _spectrogram_pixels(
+                buffer, rows, sample_rate, window, step, frames_per_pixel,
+                freq_starts
+            )
+            buffer = buffer[rows * pixel_step:]
+
+    if output_file is None:
+        image.setflags(write=False)
+        return times, frequencies, image
+
+    image.flush()
+
+    axes_file = os.path.splitext(os.fspath(output_file))[0] + '_axes.npz'
+    np.savez(axes_file, times=times, frequencies=frequencies)
+
+    # Reopen read-only; this also releases the writable map
+    image = np.load(output_file, mmap_mode='r')
+    return times, frequencies, image
+
+
 def generate_test_signal(duration, sample_rate, frequencies, amplitudes):
     """
     Generate a test signal with multiple frequency components.
@@ -108,7 +647,8 @@ def generate_test_signal(duration, sample_rate, frequencies, amplitudes):
     return t, signal
 
 
-def plot_signal_and_spectrum(t, signal, sample_rate, title="Signal Analysis"):
+def plot_signal_and_spectrum(t, signal, sample_rate, title="Signal Analysis",
+                             zoom_band=None, zoom_bins=2000):
     """
     Create a two-panel plot showing time domain and frequency domain.
 
@@ -117,9 +657,18 @@ def plot_signal_and_spectrum(t, signal, sample_rate, title="Signal Analysis"):
         signal: Signal array
         sample_rate: Sampling rate in Hz
         title: Plot title
+        zoom_band: Optional (f_start, f_stop) in Hz; if given, the
+            spectrum is computed finely in this band only
+            (see compute_zoom_spectrum)
+        zoom_bins: Number of frequencies in the zoomed band
     """
     # Compute spectrum
-    frequencies, power = compute_power_spectrum(signal, sample_rate)
+    if zoom_band is None:
+        frequencies, power = compute_power_spectrum(signal, sample_rate)
+    else:
+        frequencies, power = compute_zoom_spectrum(
+            signal, sample_rate, zoom_band[0], zoom_band[1], zoom_bins
+        )
 
     # Create figure
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
@@ -142,9 +691,12 @@ def plot_signal_and_spectrum(t, signal, sample_rate, title="Signal Analysis"):
     ax2.set_title(f'{title} - Frequency Domain (Power Spectrum)')
     ax2.grid(True, alpha=0.3)
 
-    # Set x-axis limit to Nyquist frequency
+    # Set x-axis limit to Nyquist frequency (or the zoomed band)
     nyquist = sample_rate / 2
-    ax2.set_xlim(0, nyquist)
+    if zoom_band is None:
+        ax2.set_xlim(0, nyquist)
+    else:
+        ax2.set_xlim(*zoom_band)
 
     plt.tight_layout()
     plt.show()
@@ -202,80 +754,509 @@ def demonstrate_aliasing(signal_freq, sample_rate):
     plt.show()
 
 
-def real_time_fft_demo(duration=5, sample_rate=1000, update_interval=0.1):
+class RingBuffer:
+    """
+    Fixed-size buffer that always holds the most recent samples.
+
+    Appending to a Python list and slicing off the old samples copies the
+    whole window on every update. Here the memory is allocated once and
+    new samples overwrite the oldest ones in place.
+
+    Every sample is stored twice, at position i and i + capacity. That
+    way the latest `capacity` samples always sit next to each other in
+    memory, and view() can return them, oldest first, without copying.
+
+    The buffer is filled by one thread (the acquisition loop) and read by
+    others, so readers should hold `lock` while using view().
+
+    Example usage:
+        buffer = RingBuffer(capacity=10000)
+        buffer.extend(chunk)
+        with buffer.lock:
+            spectrum = np.fft.rfft(buffer.view())
+    """
+
+    def __init__(self, capacity):
+        """
+        Parameters:
+            capacity: Number of most recent samples to keep
+        """
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity)
+        self._write_index = 0   # Where the next sample goes
+        self.size = 0           # Number of valid samples (<= capacity)
+        self.total_samples = 0  # Number of samples ever added
+        self.lock = threading.Lock()
+
+    def extend(self, chunk):
+        """Add samples, overwriting the oldest ones when full."""
+        chunk = np.asarray(chunk, dtype=float)
+        added = len(chunk)
+        if added > self.capacity:
+            chunk = chunk[-self.capacity:]
+        n = len(chunk)
+        capacity = self.capacity
+
+        with self.lock:
+            i = self._write_index
+            first = min(n, capacity - i)   # Samples before wrapping
+            rest = n - first
+            self._data[i:i + first] = chunk[:first]
+            self._data[i + capacity:i + capacity + first] = chunk[:first]
+            self._data[:rest] = chunk[first:]
+            self._data[capacity:capacity + rest] = chunk[first:]
+
+            self._write_index = (i + n) % capacity
+            self.size = min(self.size + n, capacity)
+            self.total_samples += added
+
+    def view(self):
+        """Most recent samples, oldest first (a view, not a copy)."""
+        end = self._write_index + self.capacity
+        return self._data[end - self.size:end]
+
+
+class SlidingDFT:
+    """
+    Spectrum of a sliding window, updated as each new chunk arrives.
+
+    Recomputing the FFT of the whole window costs O(N log N) per update.
+    If only a few hundred frequency bins are of interest, each bin can
+    instead be updated as samples enter and leave the window:
+
+        S_k  ->  (S_k + x_new - x_old) * exp(2j*pi*k/N)
+
+    which costs O(number of bins) per sample. A chunk of m samples is
+    applied in one vectorized step.
+
+    Rounding errors slowly accumulate in this recursion, so every
+    resync_interval samples the bins are recomputed exactly from the
+    stored window.
+
+    The bins match np.fft.rfft(window)[bins], with the oldest sample
+    first in the window.
+
+    Example usage:
+        sdft = SlidingDFT(window_size=10000, sample_rate=10000,
+                          frequencies=np.arange(0, 300, 1.0))
+        for chunk in chunks:
+            sdft.update(chunk)
+            frequencies, power = sdft.power_spectrum()
+    """
+
+    def __init__(self, window_size, sample_rate, frequencies=None,
+                 bins=None, resync_interval=None):
+        """
+        Parameters:
+            window_size: Number of samples in the window (N)
+            sample_rate: Sampling rate in Hz
+            frequencies: Frequencies of interest (Hz); each is rounded to
+                the nearest bin, a multiple of sample_rate / window_size
+            bins: Bin indices (0 to N/2) instead of frequencies
+            resync_interval: Samples between exact recomputations
+                (default: 10 windows)
+        """
+        if bins is None:
+            if frequencies is None:
+                raise ValueError("Give either frequencies or bins")
+            bins = np.round(np.asarray(frequencies) * window_size
+                            / sample_rate)
+        self.bins = np.unique(np.asarray(bins, dtype=int))
+        if np.any(self.bins < 0) or np.any(self.bins > window_size // 2):
+            raise ValueError("Bins must be between 0 and window_size / 2")
+
+        self.window_size = window_size
+        self.sample_rate = sample_rate
+        self.frequencies = self.bins * sample_rate / window_size
+        self.resync_interval = (10 * window_size if resync_interval is None
+                                else resync_interval)
+
+        self._history = RingBuffer(window_size)
+        self._spectrum = np.zeros(len(self.bins), dtype=complex)
+        self._since_resync = 0
+
+    def _window(self):
+        """Current window, oldest first, with zeros before the first sample."""
+        data = self._history.view()
+        missing = self.window_size - len(data)
+        if missing:
+            return np.concatenate((np.zeros(missing), data))
+        return data
+
+    def resync(self):
+        """Recompute the bins exactly from the current window."""
+        self._spectrum = scipy.fft.rfft(self._window())[self.bins]
+        self._since_resync = 0
+
+    def update(self, chunk):
+        """Slide the window forward over a chunk of new samples."""
+        chunk = np.asarray(chunk, dtype=float)
+        m = len(chunk)
+        if m == 0:
+            return
+        n_win = self.window_size
+
+        if m >= n_win:
+            # The whole window is replaced; start over from scratch
+            self._history.extend(chunk)
+            self.resync()
+            return
+
+        # Samples leaving the window are its oldest m samples
+        leaving = self._window()[:m]
+        change = chunk - leaving
+
+        # Applying the one-sample update m times gives
+        #   S_k * z^m + sum_i change[i] * z^(m - i),  z = exp(2j*pi*k/N)
+        # Exponents are reduced modulo N so the phases stay accurate.
+        k = self.bins[:, np.newaxis]
+        exponents = m - np.arange(m)
+        phase = 2 * np.pi * ((k * exponents) % n_win) / n_win
+        shift = 2 * np.pi * ((self.bins * m) % n_win) / n_win
+        self._spectrum = (self._spectrum * np.exp(1j * shift)
+                          + np.exp(1j * phase) @ change)
+
+        self._history.extend(chunk)
+        self._since_resync += m
+        if self._since_resync >= self.resync_interval:
+            self.resync()
+
+    def spectrum(self):
+        """
+        Returns:
+            frequencies: Bin frequencies (Hz)
+            values: Complex DFT values (same scaling as np.fft.rfft)
+        """
+        return self.frequencies, self._spectrum.copy()
+
+    def power_spectrum(self):
+        """
+        Power in each bin, normalized like compute_power_spectrum.
+
+        Returns:
+            frequencies: Bin frequencies (Hz)
+            power: Array of power values
+        """
+        power = (np.abs(self._spectrum) / self.window_size) ** 2
+        # Double all bins except DC and Nyquist, as compute_power_spectrum does
+        last_bin = self.window_size // 2
+        power[(self.bins != 0) & (self.bins != last_bin)] *= 2
+        return self.frequencies, power
+
+
+class GoertzelDetector:
+    """
+    Amplitude and phase at a few known frequencies, block by block.
+
+    Often only a handful of frequencies matter - a chopper reference,
+    60 Hz mains pickup - and computing the full spectrum is wasted
+    work. The Goertzel algorithm computes the Fourier component at one
+    frequency with a simple recursive filter,
+
+        s[n] = x[n] + 2 cos(w) s[n-1] - s[n-2],    w = 2 pi f / fs
+
+    which costs the same small, fixed amount per sample for each
+    frequency. Unlike FFT bins, the frequencies can be anything (they
+    need not be multiples of fs / N).
+
+    Here the equivalent complex form of the recursion,
+
+        s[n] = x[n] + exp(1j w) s[n-1],
+
+    is run for all frequencies (and channels) together. Applying it to a
+    chunk of m samples at once is one matrix product, so there is no
+    Python loop over frequencies or samples.
+
+    Data can be passed in chunks of any size; the filter state carries
+    over between chunks, and a result is produced each time block_size
+    samples have been collected. Several DAQ channels can be processed
+    at once by passing chunks of shape (channels, samples).
+
+    Example usage:
+        detector = GoertzelDetector(sample_rate=10000,
+                                    frequencies=[60, 120, 1000],
+                                    block_size=10000)
+        for chunk in chunks:
+            amplitudes, phases = detector.update(chunk)
+            for block_amplitudes in amplitudes:
+                print(block_amplitudes)
+    """
+
+    def __init__(self, sample_rate, frequencies, block_size):
+        """
+        Parameters:
+            sample_rate: Sampling rate in Hz
+            frequencies: Frequencies to detect (Hz)
+            block_size: Samples per result (longer blocks give narrower
+                frequency resolution, about sample_rate / block_size)
+        """
+        self.sample_rate = sample_rate
+        self.frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+        self.block_size = block_size
+
+        self._omega = 2 * np.pi * self.frequencies / sample_rate
+
+        # Sinusoid amplitude is 2|X|/N, except at DC and Nyquist
+        edge = (self.frequencies == 0) | (self.frequencies == sample_rate / 2)
+        self._scale = np.where(edge, 1.0, 2.0) / block_size
+
+        self._state = None   # s[n] per channel and frequency
+        self._count = 0      # Samples collected in the current block
+
+    def reset(self):
+        """Discard the partial block."""
+        self._state = None
+        self._count = 0
+
+    def _block_result(self):
+        """Amplitude and phase of the block that just finished."""
+        # s[N-1] = sum x[n] exp(1j w (N-1-n)), so
+        # X(w) = sum x[n] exp(-1j w n) over the block
+        value = self._state * np.exp(-1j * self._omega * (self.block_size - 1))
+        return np.abs(value) * self._scale, np.angle(value)
+
+    def update(self, chunk):
+        """
+        Add a chunk of samples.
+
+        Parameters:
+            chunk: Array of shape (samples,) or (channels, samples)
+
+        Returns:
+            amplitudes: Array of shape (blocks, [channels,] frequencies),
+                one row for each block completed by this chunk (often 0)
+            phases: Phases (radians) of the same shape, for a cosine
+                starting at the beginning of the block
+        """
+        chunk = np.asarray(chunk, dtype=float)
+        channel_shape = chunk.shape[:-1]
+        if self._state is None:
+            self._state = np.zeros(channel_shape + (len(self.frequencies),),
+                                   dtype=complex)
+
+        amplitudes = []
+        phases = []
+        position = 0
+        num_samples = chunk.shape[-1]
+
+        while position < num_samples:
+            take = min(self.block_size - self._count, num_samples - position)
+            segment = chunk[..., position:position + take]
+
+            # Applying the one-sample step `take` times gives
+            #   s * z^take + sum_i segment[i] * z^(take-1-i),  z = exp(1j w)
+            exponents = take - 1 - np.arange(take)
+            powers = np.exp(1j * exponents[:, np.newaxis] * self._omega)
+            self._state = (self._state * np.exp(1j * take * self._omega)
+                           + segment @ powers)
+
+            position += take
+            self._count += take
+            if self._count == self.block_size:
+                amplitude, phase = self._block_result()
+                amplitudes.append(amplitude)
+                phases.append(phase)
+                self._state[...] = 0
+                self._count = 0
+
+        result_shape = (0,) + channel_shape + (len(self.frequencies),)
+        if not amplitudes:
+            return np.empty(result_shape), np.empty(result_shape)
+        return np.array(amplitudes), np.array(phases)
+
+
+def goertzel(signal, sample_rate, frequencies):
+    """
+    Amplitude and phase of a signal at a few chosen frequencies.
+
+    Parameters:
+        signal: Array of shape (samples,) or (channels, samples)
+        sample_rate: Sampling rate in Hz
+        frequencies: Frequencies to detect (Hz)
+
+    Returns:
+        amplitudes: Sinusoid amplitude at each frequency
+        phases: Phase (radians) of a cosine starting at the first sample
+    """
+    signal = np.asarray(signal, dtype=float)
+    detector = GoertzelDetector(sample_rate, frequencies, signal.shape[-1])
+    amplitudes, phases = detector.update(signal)
+    return amplitudes[0], phases[0]
+
+
+def real_time_fft_demo(duration=5, sample_rate=1000, update_interval=0.1,
+                       window_duration=1.0, frame_rate=20,
+                       sliding_frequencies=None):
     """
     Demonstrate real-time FFT analysis with simulated data.
 
     In actual lab use, this would read from the DAQ instead
     of generating synthetic data.
 
+    Three things run at their own pace:
+    - an acquisition thread adds each chunk of data to a RingBuffer,
+    - an analysis thread recomputes the spectrum every update_interval,
+    - the main thread redraws the plot about frame_rate times a second.
+
+    If sliding_frequencies is given, only those frequencies are shown,
+    and a SlidingDFT updates them after every chunk instead of the
+    periodic full FFT.
+
+    Redrawing the whole figure is slow, so the plot uses "blitting": the
+    axes, labels and grid are drawn once and saved as an image, and each
+    frame only redraws the two data lines on top of that image. The
+    axes are fully redrawn only when the data no longer fit.
+
     Parameters:
         duration: Total duration in seconds
         sample_rate: Sample rate in Hz
-        update_interval: Time between plot updates (seconds)
+        update_interval: Time between spectrum updates (seconds)
+        window_duration: Length of data shown and analyzed (seconds)
+        frame_rate: Target display frames per second
+        sliding_frequencies: Optional frequencies (Hz) to track with a
+            sliding DFT
     """
     print("\nReal-time FFT Demo (with synthetic data)")
     print("Press Ctrl+C to stop early\n")
 
-    # Set up interactive plotting
-    plt.ion()
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+    window_size = int(window_duration * sample_rate)
+    chunk_size = max(1, int(0.01 * sample_rate))  # 10 ms of data per read
+    max_points_drawn = 2000  # Enough to look continuous on screen
+
+    buffer = RingBuffer(window_size)
+    stop = threading.Event()
+    latest = {'spectrum': None}
 
-    # Initialize empty plots
-    line1, = ax1.plot([], [], 'b-', linewidth=0.5)
-    line2, = ax2.plot([], [], 'r-', linewidth=1)
+    sliding = None
+    if sliding_frequencies is not None:
+        sliding = SlidingDFT(window_size, sample_rate,
+                             frequencies=sliding_frequencies)
+
+    def acquire():
+        """Simulate the DAQ (in real lab, a blocking task.read)."""
+        start = time.perf_counter()
+        while not stop.is_set():
+            # Signal: 50 Hz + 120 Hz with some noise
+            t_chunk = (buffer.total_samples + np.arange(chunk_size)) / sample_rate
+            chunk = (np.sin(2 * np.pi * 50 * t_chunk) +
+                     0.5 * np.sin(2 * np.pi * 120 * t_chunk) +
+                     0.2 * np.random.randn(chunk_size))
+            buffer.extend(chunk)
+
+            # Sliding DFT: update the tracked bins with every chunk
+            if sliding is not None:
+                sliding.update(chunk)
+                latest['spectrum'] = sliding.power_spectrum()
+
+            # Deliver data at the real sample rate, like a DAQ would
+            next_time = start + buffer.total_samples / sample_rate
+            stop.wait(max(0.0, next_time - time.perf_counter()))
+
+    def analyze():
+        """Recompute the spectrum of the current window periodically."""
+        while not stop.wait(update_interval):
+            with buffer.lock:
+                if buffer.size <= 10:
+                    continue
+                latest['spectrum'] = compute_power_spectrum(buffer.view(),
+                                                            sample_rate)
+
+    # Set up the figure. Lines are "animated" so they are left out of the
+    # saved background image and drawn separately each frame.
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+    line1, = ax1.plot([], [], 'b-', linewidth=0.5, animated=True)
+    line2, = ax2.plot([], [], 'r-', linewidth=1, animated=True)
 
     ax1.set_xlabel('Time (s)')
     ax1.set_ylabel('Amplitude')
-    ax1.set_title('Time Domain (last 1 second)')
+    ax1.set_title(f'Time Domain (last {window_duration:g} seconds)')
     ax1.grid(True, alpha=0.3)
+    ax1.set_xlim(0, window_duration)
+    ax1.set_ylim(-2, 2)
 
     ax2.set_xlabel('Frequency (Hz)')
     ax2.set_ylabel('Power')
     ax2.set_title('Frequency Domain')
     ax2.grid(True, alpha=0.3)
     ax2.set_xlim(0, sample_rate / 2)
+    ax2.set_ylim(0, 1)
+
+    plt.show(block=False)
+    plt.pause(0.1)
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+
+    def limits_changed(ax, low, high, margin):
+        """Update the y-limits if the data no longer fit nicely."""
+        y_min, y_max = ax.get_ylim()
+        too_small = low < y_min or high > y_max
+        too_large = (high - low) < 0.25 * (y_max - y_min)
+        if too_small or too_large:
+            ax.set_ylim(low - margin, high + margin)
+            return True
+        return False
+
+    threads = [threading.Thread(target=acquire, daemon=True)]
+    if sliding is None:
+        threads.append(threading.Thread(target=analyze, daemon=True))
+    else:
+        ax2.set_xlim(sliding.frequencies[0], sliding.frequencies[-1])
+    for thread in threads:
+        thread.start()
 
-    samples_per_update = int(update_interval * sample_rate)
-    window_size = int(1.0 * sample_rate)  # 1 second window
-
-    all_data = []
+    frame_interval = 1.0 / frame_rate
+    start = time.perf_counter()
+    frames = 0
 
     try:
-        for i in range(int(duration / update_interval)):
-            # Simulate acquiring data (in real lab, read from DAQ)
-            # Signal: 50 Hz + 120 Hz with some noise
-            t_chunk = np.arange(samples_per_update) / sample_rate
-            chunk = (np.sin(2 * np.pi * 50 * (i * update_interval + t_chunk)) +
-                     0.5 * np.sin(2 * np.pi * 120 * (i * update_interval + t_chunk)) +
-                     0.2 * np.random.randn(samples_per_update))
-
-            all_data.extend(chunk)
-
-            # Keep only last window_size samples
-            if len(all_data) > window_size:
-                all_data = all_data[-window_size:]
-
-            data_array = np.array(all_data)
-
-            # Update time domain plot
-            t_plot = np.arange(len(data_array)) / sample_rate
-            line1.set_data(t_plot, data_array)
-            ax1.set_xlim(0, max(t_plot[-1], 0.1))
-            ax1.set_ylim(np.min(data_array) - 0.5, np.max(data_array) + 0.5)
-
-            # Update frequency domain plot
-            if len(data_array) > 10:
-                frequencies, power = compute_power_spectrum(data_array, sample_rate)
-                line2.set_data(frequencies, power)
-                ax2.set_ylim(0, max(power) * 1.1 + 0.001)
-
-            plt.pause(update_interval * 0.8)
+        while time.perf_counter() - start < duration and plt.fignum_exists(fig.number):
+            frame_start = time.perf_counter()
+
+            # Copy only the (decimated) points that will be drawn
+            with buffer.lock:
+                data = buffer.view()
+                stride = max(1, len(data) // max_points_drawn)
+                shown = data[::stride].copy()
+            t_plot = np.arange(len(shown)) * stride / sample_rate
+            line1.set_data(t_plot, shown)
+
+            spectrum = latest['spectrum']
+            if spectrum is not None:
+                line2.set_data(*spectrum)
+
+            # Full redraw only when the axes limits must change
+            rescaled = False
+            if len(shown) > 0:
+                rescaled |= limits_changed(ax1, np.min(shown), np.max(shown), 0.5)
+            if spectrum is not None:
+                rescaled |= limits_changed(ax2, 0, np.max(spectrum[1]) * 1.1 + 0.001, 0)
+            if rescaled:
+                fig.canvas.draw()
+                background = fig.canvas.copy_from_bbox(fig.bbox)
+
+            # Blit: restore the background and draw just the lines
+            fig.canvas.restore_region(background)
+            ax1.draw_artist(line1)
+            ax2.draw_artist(line2)
+            fig.canvas.blit(fig.bbox)
+            fig.canvas.flush_events()
+            frames += 1
+
+            time.sleep(max(0.0, frame_interval - (time.perf_counter() - frame_start)))
 
     except KeyboardInterrupt:
         print("\nStopped by user")
 
-    plt.ioff()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+    print(f"Displayed {frames / elapsed:.1f} frames per second, "
+          f"acquired {buffer.total_samples / elapsed:.0f} samples per second")
+
+    # Leave the final frame on screen
+    line1.set_animated(False)
+    line2.set_animated(False)
     plt.show()
 
 
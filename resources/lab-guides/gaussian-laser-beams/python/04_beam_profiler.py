@@ -64,15 +64,26 @@ Automation Explorer).
 Usage:
     python 04_beam_profiler.py
 
+Without the instruments (simulated stage, DAQ and beam; see
+simulated_hardware.py):
+    PHYS4430_SIMULATE=1 python 04_beam_profiler.py
+
 The script will prompt for:
 1. Motor serial number (from KST101 display)
 2. Step size in mm (default: 0.05 mm)
 3. Wait time after each step in ms (default: 500 ms)
 4. Scan direction (forward/backward)
+5. Scan mode: a uniform step scan, an adaptive scan that fits the
+   edge as it goes and measures only where it improves the fit, or a
+   fly scan that records continuously while the stage moves
 
 Output:
 - CSV file: beam_profile_YYYYMMDD_HHMMSS.csv (position and voltage data)
+  or, if chosen, a binary beam_profile_YYYYMMDD_HHMMSS.scan directory
+  with the scan settings (see scan_storage.py; export_csv converts it)
 - PNG plot: beam_profile_YYYYMMDD_HHMMSS.png (beam profile visualization)
+- Adaptive scans: beam_profile_adaptive_YYYYMMDD_HHMMSS.csv (or .scan) and .png
+- Fly scans: beam_profile_fly_YYYYMMDD_HHMMSS.csv (or .scan) and .png
 - Real-time plot during measurement
 
 TROUBLESHOOTING:
@@ -97,47 +108,328 @@ Motor positions in wrong units:
 Author: PHYS 4430
 """
 
+import asyncio
 import time
 import csv
+import functools
+import importlib
+import os
+import queue
+import threading
 import traceback
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime
 
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy import stats
 
-# Thorlabs Kinesis imports (requires pythonnet and Kinesis SDK)
-try:
-    import clr
-    clr.AddReference(
-        "C:\\Program Files\\Thorlabs\\Kinesis\\"
-        "Thorlabs.MotionControl.DeviceManagerCLI.dll"
-    )
-    clr.AddReference(
-        "C:\\Program Files\\Thorlabs\\Kinesis\\"
-        "Thorlabs.MotionControl.GenericMotorCLI.dll"
-    )
-    clr.AddReference(
-        "C:\\Program Files\\Thorlabs\\Kinesis\\"
-        "Thorlabs.MotionControl.KCube.StepperMotorCLI.dll"
+from scan_storage import ScanWriter
+
+# The fitting lesson's file name starts with a digit, so it cannot be
+# imported with a normal import statement
+fitting = importlib.import_module("02_fitting_example")
+
+# Set PHYS4430_SIMULATE=1 to run without instruments, using the simulated
+# stage and DAQ from simulated_hardware.py
+SIMULATE = os.environ.get("PHYS4430_SIMULATE", "0") not in ("", "0")
+
+if SIMULATE:
+    from simulated_hardware import (
+        DeviceManagerCLI, DeviceConfiguration, MotorDirection, KCubeStepper,
+        Action, Decimal, UInt64, nidaqmx, AcquisitionType, TaskMode
     )
-    from Thorlabs.MotionControl.DeviceManagerCLI import DeviceManagerCLI
-    from Thorlabs.MotionControl.DeviceManagerCLI import DeviceConfiguration
-    from Thorlabs.MotionControl.GenericMotorCLI import MotorDirection
-    from Thorlabs.MotionControl.KCube.StepperMotorCLI import KCubeStepper
-    from System import Decimal
+    # Time as seen by the simulated hardware, which may run faster than
+    # real time (PHYS4430_SIMULATE_SPEED)
+    from simulated_hardware import now as clock, sleep
+    print("Using simulated motor and DAQ (PHYS4430_SIMULATE is set)")
     THORLABS_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: Thorlabs libraries not available: {e}")
-    print("Motor control will not work without Kinesis SDK installed.")
-    THORLABS_AVAILABLE = False
-
-# NI-DAQmx imports
-try:
-    import nidaqmx
     NIDAQMX_AVAILABLE = True
-except ImportError:
-    print("Warning: nidaqmx not available. DAQ functions will not work.")
-    NIDAQMX_AVAILABLE = False
+else:
+    clock = time.perf_counter
+    sleep = time.sleep
+
+    # Thorlabs Kinesis imports (requires pythonnet and Kinesis SDK)
+    try:
+        import clr
+        clr.AddReference(
+            "C:\\Program Files\\Thorlabs\\Kinesis\\"
+            "Thorlabs.MotionControl.DeviceManagerCLI.dll"
+        )
+        clr.AddReference(
+            "C:\\Program Files\\Thorlabs\\Kinesis\\"
+            "Thorlabs.MotionControl.GenericMotorCLI.dll"
+        )
+        clr.AddReference(
+            "C:\\Program Files\\Thorlabs\\Kinesis\\"
+            "Thorlabs.MotionControl.KCube.StepperMotorCLI.dll"
+        )
+        from Thorlabs.MotionControl.DeviceManagerCLI import DeviceManagerCLI
+        from Thorlabs.MotionControl.DeviceManagerCLI import DeviceConfiguration
+        from Thorlabs.MotionControl.GenericMotorCLI import MotorDirection
+        from Thorlabs.MotionControl.KCube.StepperMotorCLI import KCubeStepper
+        from System import Action, Decimal, UInt64
+        THORLABS_AVAILABLE = True
+    except Exception as e:
+        print(f"Warning: Thorlabs libraries not available: {e}")
+        print("Motor control will not work without Kinesis SDK installed.")
+        THORLABS_AVAILABLE = False
+
+    # NI-DAQmx imports
+    try:
+        import nidaqmx
+        from nidaqmx.constants import AcquisitionType, TaskMode
+        NIDAQMX_AVAILABLE = True
+    except ImportError:
+        print("Warning: nidaqmx not available. DAQ functions will not work.")
+        NIDAQMX_AVAILABLE = False
+
+
+# Safe travel range of the stage (mm). Scans never move outside it.
+TRAVEL_LIMITS_MM = (-12.0, 12.0)
+
+
+def within_travel(position_mm):
+    """True if position_mm is inside TRAVEL_LIMITS_MM."""
+    low, high = TRAVEL_LIMITS_MM
+    return low <= position_mm <= high
+
+
+def check_scan_range(start_mm, stop_mm):
+    """Raise ValueError if a scan range leaves TRAVEL_LIMITS_MM."""
+    low, high = TRAVEL_LIMITS_MM
+    for position in (start_mm, stop_mm):
+        if not within_travel(position):
+            raise ValueError(
+                f"Scan position {position} mm is outside the travel range "
+                f"{low} to {high} mm"
+            )
+
+
+def _to_float(value):
+    """Convert a .NET Decimal (or number) from Kinesis to a float."""
+    try:
+        return float(str(value))
+    except ValueError:
+        return float(value.ToDouble(None))
+
+
+def summarize_samples(samples, estimator='mean', trim=0.1):
+    """
+    Reduce a burst of voltage samples to one value and its uncertainty.
+
+    Parameters:
+        samples: Array of voltage samples (V)
+        estimator: 'mean', 'median' or 'trimmed' (trimmed mean, which
+            ignores the largest and smallest `trim` fraction of samples,
+            e.g. occasional spikes)
+        trim: Fraction cut from each end for the trimmed mean
+
+    Returns:
+        value: Estimated voltage (V)
+        stderr: Standard error of that estimate (V)
+    """
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    if n < 2:
+        return float(samples[0]), float('nan')
+
+    std_error = np.std(samples, ddof=1) / np.sqrt(n)
+    if estimator == 'mean':
+        return float(np.mean(samples)), float(std_error)
+    if estimator == 'median':
+        # For Gaussian noise the median scatters sqrt(pi/2) times more
+        # than the mean
+        return float(np.median(samples)), float(np.sqrt(np.pi / 2) * std_error)
+    if estimator == 'trimmed':
+        return (float(stats.trim_mean(samples, trim)),
+                float(stats.mstats.trimmed_stde(samples, limits=(trim, trim))))
+    raise ValueError(f"Unknown estimator: {estimator}")
+
+
+def choose_scan_positions(x, popt, sigma, candidates, num_points=1,
+                          new_sigma=None):
+    """
+    Pick the knife-edge positions that most improve the beam fit.
+
+    For the current fit parameters, each measured point adds j j^T / sigma^2
+    to the Fisher information matrix F, where j holds the derivatives of
+    the model at that position. The parameter covariance is C = F^-1.
+    One more point at a candidate position lowers the variance of
+    parameter k by
+        (C j)_k^2 / (sigma^2 + j^T C j)
+    (Sherman-Morrison formula), so the best candidate is the one with the
+    largest drop in var(center) + var(width). Points on the flat plateaus
+    have j ~ 0 for center and width, so they are never chosen.
+
+    Parameters:
+        x: Positions measured so far
+        popt: Current fit [amplitude, center, width, offset]
+        sigma: Voltage uncertainty of the measured points (scalar or array)
+        candidates: Positions that may be chosen
+        num_points: How many positions to choose; after each choice C is
+            updated as if that point had been measured
+        new_sigma: Uncertainty expected for new points (default: median
+            of sigma)
+
+    Returns:
+        positions: Chosen positions (in the order they were chosen)
+        covariance: Predicted parameter covariance after measuring them
+    """
+    x = np.asarray(x, dtype=float)
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), x.shape)
+    if new_sigma is None:
+        new_sigma = float(np.median(sigma))
+
+    J = fitting.beam_profile_jacobian(x, *popt)
+    covariance = np.linalg.pinv(J.T @ (J / sigma[:, np.newaxis] ** 2))
+
+    candidates = np.asarray(candidates, dtype=float)
+    J_candidates = fitting.beam_profile_jacobian(candidates, *popt)
+    chosen = []
+    for _ in range(num_points):
+        CJ = J_candidates @ covariance
+        denominator = new_sigma ** 2 + np.einsum('ij,ij->i', CJ, J_candidates)
+        gain = (CJ[:, 1] ** 2 + CJ[:, 2] ** 2) / denominator
+        best = np.argmax(gain)
+        chosen.append(candidates[best])
+        covariance = covariance - np.outer(CJ[best], CJ[best]) / denominator[best]
+
+    return np.array(chosen), covariance
+
+
+def interpolate_positions(poll_times, poll_positions, sample_times):
+    """
+    Stage position at each DAQ sample time during a continuous move.
+
+    The controller reports a new position once per polling interval, so
+    polling it faster returns the same value several times. Only the
+    first time each value is seen is kept (the closest to when it was
+    measured). The first value is the stage at rest before the move, so
+    the move is known only from the first change onwards; samples taken
+    before the first or after the last change are dropped.
+
+    Parameters:
+        poll_times: Times at which the position was read (s)
+        poll_positions: Positions read (mm)
+        sample_times: Times of the DAQ samples (s, same clock)
+
+    Returns:
+        positions: Interpolated positions of the kept samples (mm)
+        keep: Boolean mask selecting the kept samples
+    """
+    poll_times = np.asarray(poll_times, dtype=float)
+    poll_positions = np.asarray(poll_positions, dtype=float)
+    sample_times = np.asarray(sample_times, dtype=float)
+
+    changed = np.r_[True, np.diff(poll_positions) != 0]
+    times = poll_times[changed][1:]
+    positions = poll_positions[changed][1:]
+    if len(times) < 2:
+        raise RuntimeError("Stage position did not change during the scan")
+
+    keep = (sample_times >= times[0]) & (sample_times <= times[-1])
+    return np.interp(sample_times[keep], times, positions), keep
+
+
+class DAQSession:
+    """
+    A DAQ task that is configured once and reused for many reads.
+
+    Creating an nidaqmx.Task, adding a channel and releasing it again
+    takes tens of milliseconds. Doing that for every scan point adds up.
+    A session creates the task once and commits it (reserves the
+    hardware and programs the device), so each read only costs the
+    actual conversion time.
+
+    With num_samples > 1 the task is set up for hardware-timed bursts:
+    each call to read_samples() returns num_samples samples taken at
+    exactly sample_rate by the DAQ clock.
+
+    Example usage:
+        with DAQSession("Dev1/ai0") as session:
+            for i in range(100):
+                voltage = session.read()
+
+        with DAQSession("Dev1/ai0", num_samples=100) as session:
+            samples = session.read_samples()
+    """
+
+    def __init__(self, channel, min_val=-10.0, max_val=10.0,
+                 num_samples=1, sample_rate=1000.0):
+        """
+        Parameters:
+            channel: Physical channel (e.g. "Dev1/ai0")
+            min_val, max_val: Expected voltage range (V)
+            num_samples: Samples per burst (1: single software-timed reads)
+            sample_rate: Burst sample rate in Hz
+        """
+        self.channel = channel
+        self.min_val = min_val
+        self.max_val = max_val
+        self.num_samples = num_samples
+        self.sample_rate = sample_rate
+        self.task = None
+
+    def open(self):
+        """Create, configure and commit the task."""
+        if not NIDAQMX_AVAILABLE:
+            raise RuntimeError("NI-DAQmx not available")
+
+        self.task = nidaqmx.Task()
+        try:
+            self.task.ai_channels.add_ai_voltage_chan(
+                self.channel, min_val=self.min_val, max_val=self.max_val
+            )
+            if self.num_samples > 1:
+                self.task.timing.cfg_samp_clk_timing(
+                    self.sample_rate,
+                    sample_mode=AcquisitionType.FINITE,
+                    samps_per_chan=self.num_samples
+                )
+            self.task.control(TaskMode.TASK_COMMIT)
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def close(self):
+        """Release the task and the hardware."""
+        if self.task is not None:
+            self.task.close()
+            self.task = None
+
+    def read(self):
+        """Read one voltage sample (V)."""
+        if self.num_samples > 1:
+            return self.read_samples()[0]
+        voltage = self.task.read()
+        if isinstance(voltage, list):
+            return voltage[0]
+        return voltage
+
+    def read_samples(self):
+        """Acquire one hardware-timed burst; returns an array of samples (V)."""
+        if self.num_samples == 1:
+            return np.array([self.read()])
+
+        timeout = 10.0 + self.num_samples / self.sample_rate
+        self.task.start()
+        try:
+            samples = self.task.read(
+                number_of_samples_per_channel=self.num_samples,
+                timeout=timeout
+            )
+        finally:
+            self.task.stop()
+        return np.asarray(samples, dtype=float)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
 
 
 class BeamProfiler:
@@ -162,9 +454,24 @@ class BeamProfiler:
         profiler.home()
         positions, voltages = profiler.run_scan(step_size_mm=0.05)
         profiler.disconnect()
+
+    For many individual reads outside a scan, keep one DAQ task open:
+        with profiler.daq_session():
+            voltages = [profiler.read_voltage() for _ in range(100)]
+
+    To average many samples at every scan position (and record the
+    uncertainty of each point):
+        profiler.run_scan(step_size_mm=0.05, samples_per_point=200)
+
+    To do something else while the stage moves, start the move and wait
+    for it later:
+        move = profiler.start_move(2.0)
+        ...
+        print(move.result()['latency'])
     """
 
-    def __init__(self, serial_number, daq_device="Dev1", daq_channel="ai0"):
+    def __init__(self, serial_number, daq_device="Dev1", daq_channel="ai0",
+                 polling_ms=250, use_callbacks=True):
         """
         Initialize the beam profiler.
 
@@ -172,13 +479,26 @@ class BeamProfiler:
             serial_number: Thorlabs motor controller serial number
             daq_device: NI DAQ device name (default: "Dev1")
             daq_channel: Analog input channel (default: "ai0")
+            polling_ms: How often the controller reports its position
+                and status (ms); see set_polling
+            use_callbacks: Let Kinesis report the end of each move
+                (falls back to polling the status if not supported)
         """
         self.serial_number = serial_number
         self.daq_device = daq_device
         self.daq_channel = daq_channel
+        self.polling_ms = polling_ms
+        self.use_callbacks = use_callbacks
         self.device = None
+        self.session = None
         self.positions = []
         self.voltages = []
+        self.uncertainties = []
+        self.move_history = []
+        self._data_lock = threading.Lock()
+        # Watches the status of moves when callbacks are not available
+        # (created by connect, shut down by disconnect)
+        self._monitor = None
 
     def get_stage_configuration(self):
         """
@@ -256,7 +576,10 @@ class BeamProfiler:
         # Create and connect device
         self.device = KCubeStepper.CreateKCubeStepper(self.serial_number)
         self.device.Connect(self.serial_number)
-        time.sleep(0.5)
+        self._monitor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"monitor-{self.serial_number}"
+        )
+        sleep(0.5)
 
         # Wait for settings to initialize
         if not self.device.IsSettingsInitialized():
@@ -264,12 +587,12 @@ class BeamProfiler:
             self.device.WaitForSettingsInitialized(5000)
 
         # Start polling
-        self.device.StartPolling(250)
-        time.sleep(0.25)
+        self.device.StartPolling(self.polling_ms)
+        sleep(self.polling_ms / 1000)
 
         # Enable device
         self.device.EnableDevice()
-        time.sleep(0.5)
+        sleep(0.5)
 
         # Load motor configuration
         # The configuration contains stage-specific parameters (steps/rev,
@@ -328,13 +651,156 @@ class BeamProfiler:
             self.device.StopPolling()
             self.device.Disconnect()
             print("Motor disconnected")
+        if self._monitor is not None:
+            # A move still being watched ends with an error once the
+            # controller is gone; don't wait for it
+            self._monitor.shutdown(wait=False)
+            self._monitor = None
 
     def get_position(self):
         """Get current motor position in mm."""
+        return _to_float(self.device.Position)
+
+    def set_polling(self, interval_ms):
+        """
+        Change how often the controller reports position and status.
+
+        Position readings, and the end of a move when it is detected by
+        polling, are at most this old. Shorter intervals reduce the wait
+        after each step but mean more USB traffic.
+
+        Parameters:
+            interval_ms: Polling interval in milliseconds
+        """
+        self.polling_ms = interval_ms
+        if self.device is not None:
+            self.device.StopPolling()
+            self.device.StartPolling(interval_ms)
+
+    def expected_move_time(self, distance_mm):
+        """
+        Time a move of distance_mm should take with the current velocity
+        and acceleration settings (trapezoidal velocity profile), in s.
+        """
+        params = self.device.GetVelocityParams()
+        velocity = _to_float(params.MaxVelocity)
+        acceleration = _to_float(params.Acceleration)
+        if distance_mm >= velocity ** 2 / acceleration:
+            return distance_mm / velocity + velocity / acceleration
+        # Short moves never reach full velocity
+        return float(2 * np.sqrt(distance_mm / acceleration))
+
+    def start_move(self, position_mm, timeout_ms=60000):
+        """
+        Start a move to an absolute position and return immediately.
+
+        Parameters:
+            position_mm: Target position in mm
+            timeout_ms: Time allowed for the move in milliseconds
+
+        Returns:
+            concurrent.futures.Future that is done when the stage has
+            stopped. Its result() is a dict with:
+                'target': Target position (mm)
+                'elapsed': Time from the command to the end of the move (s)
+                'expected': Time the move itself takes (s)
+                'latency': elapsed - expected, the time lost waiting
+                    for the controller to report the end of the move
+                'method': 'callback' or 'polling'
+        """
+        distance = abs(position_mm - self.get_position())
+        return self._start_motion(
+            lambda arg: self.device.MoveTo(Decimal(position_mm), arg),
+            position_mm, self.expected_move_time(distance), timeout_ms,
+            'IsMoving'
+        )
+
+    def start_home(self, timeout_ms=60000):
+        """
+        Start homing and return immediately.
+
+        Returns:
+            concurrent.futures.Future (see start_move; 'target',
+            'expected' and 'latency' are None because the home switch
+            position and the homing speed are set by the controller)
+        """
+        return self._start_motion(lambda arg: self.device.Home(arg), None,
+                                  None, timeout_ms, 'IsHoming')
+
+    def _start_motion(self, command, target, expected, timeout_ms, flag):
+        """
+        Issue a Kinesis move command and return a Future for its end.
+
+        command(arg) sends the command; arg is either a completion
+        callback or 0 (return at once, completion found by polling
+        Status.<flag>).
+        """
+        future = Future()
+        start = clock()
+
+        def finish(method):
+            elapsed = clock() - start
+            result = {
+                'target': target,
+                'elapsed': elapsed,
+                'expected': expected,
+                'latency': None if expected is None else elapsed - expected,
+                'method': method,
+            }
+            self.move_history.append(result)
+            try:
+                future.set_result(result)
+            except InvalidStateError:
+                # The caller stopped waiting and cancelled the future
+                # (e.g. asyncio.wait_for timed out); nobody needs the result
+                pass
+
+        if self.use_callbacks:
+            try:
+                command(Action[UInt64](lambda task_id: finish('callback')))
+                return future
+            except TypeError as e:
+                # Older Kinesis versions have no MoveTo/Home overload
+                # with a callback
+                print(f"Move callbacks not available ({e}); "
+                      "polling status instead")
+                self.use_callbacks = False
+
+        command(0)
+        self._monitor.submit(self._wait_for_motion, future, finish, start,
+                             target, timeout_ms, flag)
+        return future
+
+    def _wait_for_motion(self, future, finish, start, target, timeout_ms,
+                         flag):
+        """
+        Monitor thread: poll the status until the motion has ended.
+
+        The status is only refreshed once per polling interval, so it is
+        checked twice per interval. Just after the command the status
+        may still show the stage at rest; a stopped stage only counts
+        as done once it is at the target or one polling interval has
+        passed. Homing has no target (the stage may already be at
+        zero before it starts), so only Status.IsHoming is used.
+        """
+        interval = self.polling_ms / 1000
         try:
-            return float(str(self.device.Position))
-        except:
-            return float(self.device.Position.ToDouble(None))
+            while True:
+                sleep(max(interval / 2, 0.005))
+                elapsed = clock() - start
+                if not getattr(self.device.Status, flag):
+                    if elapsed >= interval or (
+                            target is not None
+                            and abs(self.get_position() - target) < 1e-3):
+                        finish('polling')
+                        return
+                if elapsed > timeout_ms / 1000:
+                    raise TimeoutError(
+                        f"Motion did not finish within {timeout_ms} ms"
+                    )
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
 
     def move_to(self, position_mm, timeout_ms=60000):
         """
@@ -343,29 +809,77 @@ class BeamProfiler:
         Parameters:
             position_mm: Target position in mm
             timeout_ms: Timeout in milliseconds
+
+        Returns:
+            dict with the timing of the move (see start_move)
         """
         print(f"Moving to {position_mm:.4f} mm...")
-        self.device.MoveTo(Decimal(position_mm), timeout_ms)
-
-        # Wait for move to complete
-        while self.device.Status.IsMoving:
-            time.sleep(0.01)
+        return self.start_move(position_mm, timeout_ms).result(
+            timeout=timeout_ms / 1000
+        )
 
     def home(self, timeout_ms=60000):
         """Home the motor (move to reference position)."""
         print("Homing motor...")
-        self.device.Home(timeout_ms)
-
-        while self.device.Status.IsHoming:
-            time.sleep(0.1)
+        self.start_home(timeout_ms).result(timeout=timeout_ms / 1000)
 
         print(f"Homing complete. Position: {self.get_position():.4f} mm")
 
+    def report_move_latency(self):
+        """
+        Print how long moves took compared to the motion itself.
+
+        A large latency means time is lost waiting for the controller;
+        try a shorter polling interval (set_polling).
+        """
+        latencies = [m['latency'] for m in self.move_history
+                     if m['latency'] is not None]
+        if not latencies:
+            print("No moves recorded.")
+            return
+        elapsed = [m['elapsed'] for m in self.move_history
+                   if m['latency'] is not None]
+        print(f"Moves: {len(latencies)} "
+              f"({self.move_history[-1]['method']}, "
+              f"polling every {self.polling_ms} ms)")
+        print(f"  Mean move time: {1000 * np.mean(elapsed):.1f} ms")
+        print(f"  Latency: mean {1000 * np.mean(latencies):.1f} ms, "
+              f"max {1000 * np.max(latencies):.1f} ms")
+
+    @contextmanager
+    def daq_session(self, num_samples=1, sample_rate=1000.0):
+        """
+        Keep one DAQ task open for all reads inside a `with` block.
+
+        While the session is open, read_voltage and read_voltage_averaged
+        reuse its task instead of creating a new one for every read.
+        Nested sessions reuse the outer one.
+
+        Parameters:
+            num_samples: Samples per burst for read_voltage_averaged
+            sample_rate: Burst sample rate in Hz
+        """
+        if self.session is not None:
+            yield self.session
+            return
+
+        with DAQSession(f"{self.daq_device}/{self.daq_channel}",
+                        num_samples=num_samples,
+                        sample_rate=sample_rate) as session:
+            self.session = session
+            try:
+                yield session
+            finally:
+                self.session = None
+
     def read_voltage(self):
         """Read voltage from DAQ."""
         if not NIDAQMX_AVAILABLE:
             raise RuntimeError("NI-DAQmx not available")
 
+        if self.session is not None:
+            return self.session.read()
+
         with nidaqmx.Task() as task:
             task.ai_channels.add_ai_voltage_chan(
                 f"{self.daq_device}/{self.daq_channel}"
@@ -375,16 +889,212 @@ class BeamProfiler:
                 return voltage[0]
             return voltage
 
+    def read_voltage_averaged(self, num_samples=100, sample_rate=1000.0,
+                              estimator='mean'):
+        """
+        Read a hardware-timed burst of samples and average them.
+
+        Averaging N samples reduces random noise by sqrt(N), and the
+        scatter of the samples gives the uncertainty of the result, which
+        can be used as y_err when fitting.
+
+        Parameters:
+            num_samples: Samples in the burst
+            sample_rate: Burst sample rate in Hz (the burst takes
+                num_samples / sample_rate seconds)
+            estimator: 'mean', 'median' or 'trimmed' (see summarize_samples)
+
+        Returns:
+            voltage: Averaged voltage (V)
+            uncertainty: Standard error of the average (V)
+        """
+        samples = self.read_samples(num_samples, sample_rate)
+        return summarize_samples(samples, estimator)
+
+    def read_samples(self, num_samples=100, sample_rate=1000.0):
+        """
+        Read a hardware-timed burst of voltage samples.
+
+        Uses the open DAQ session if it is set up for bursts of the same
+        length; otherwise a task is created just for this burst.
+
+        Parameters:
+            num_samples: Samples in the burst
+            sample_rate: Burst sample rate in Hz
+
+        Returns:
+            Array of voltages (V)
+        """
+        if not NIDAQMX_AVAILABLE:
+            raise RuntimeError("NI-DAQmx not available")
+
+        session = self.session
+        if session is not None and session.num_samples == num_samples:
+            return session.read_samples()
+
+        with DAQSession(f"{self.daq_device}/{self.daq_channel}",
+                        num_samples=num_samples,
+                        sample_rate=sample_rate) as burst:
+            return burst.read_samples()
+
+    def _acquisition_loop(self, records, stop, errors, step, max_steps,
+                          wait_time_ms, samples_per_point, sample_rate,
+                          estimator):
+        """
+        Producer thread of run_scan: move, settle and read at each step.
+
+        Each point is put on the records queue as (step_num, position,
+        voltage, uncertainty, read_time); None marks the end of the scan.
+        Errors are stored in `errors` for run_scan to raise.
+        """
+        try:
+            with self.daq_session(samples_per_point, sample_rate):
+                for step_num in range(max_steps):
+                    if stop.is_set():
+                        break
+
+                    # Get current position and voltage
+                    position = self.get_position()
+                    read_time = time.time()
+                    if samples_per_point > 1:
+                        voltage, uncertainty = self.read_voltage_averaged(
+                            samples_per_point, sample_rate, estimator
+                        )
+                    else:
+                        voltage = self.read_voltage()
+                        uncertainty = None
+
+                    records.put((step_num, position, voltage, uncertainty,
+                                 read_time))
+
+                    # Move to next position
+                    next_position = position + step
+
+                    # Check if within safe range
+                    if not within_travel(next_position):
+                        print("Reached travel limit. Stopping scan.")
+                        break
+
+                    if stop.is_set():
+                        break
+                    self.move_to(next_position)
+
+                    # Wait for vibrations to settle
+                    sleep(wait_time_ms / 1000)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            records.put(None)
+
+    def _storage_loop(self, records, stop, errors, filename, averaged,
+                      metadata):
+        """
+        Consumer thread of run_scan: save and report each point.
+
+        The output file stays open for the whole scan and is flushed
+        regularly, so the data on disk is complete even if the program
+        crashes. If saving fails, the scan is stopped.
+        """
+        try:
+            if metadata is None:
+                self._store_records(records, filename, averaged)
+            else:
+                self._store_records_binary(records, filename, averaged,
+                                           metadata)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            # Keep emptying the queue so the acquisition thread can finish
+            while records.get() is not None:
+                pass
+
+    def _store_records(self, records, filename, averaged):
+        """Write records from the queue to the CSV file until None arrives."""
+        with open(filename, 'a', newline='') as f:
+            writer = csv.writer(f)
+            while True:
+                record = records.get()
+                if record is None:
+                    break
+                step_num, position, voltage, uncertainty, _ = record
+
+                # Save to file immediately
+                if averaged:
+                    writer.writerow([position, voltage, uncertainty])
+                else:
+                    writer.writerow([position, voltage])
+                f.flush()
+
+                self._add_point(step_num, position, voltage, uncertainty)
+
+    def _store_records_binary(self, records, filename, averaged, metadata):
+        """Write records from the queue to a .scan directory (see scan_storage)."""
+        columns = ['Position (mm)', 'Voltage (V)']
+        if averaged:
+            columns.append('Uncertainty (V)')
+        columns.append('Time (s)')
+
+        with ScanWriter(filename, columns, metadata) as writer:
+            while True:
+                record = records.get()
+                if record is None:
+                    break
+                step_num, position, voltage, uncertainty, read_time = record
+
+                # Time is measured from the start of the scan
+                row = [position, voltage]
+                if averaged:
+                    row.append(uncertainty)
+                row.append(read_time - metadata['start_time'])
+                writer.append(row)
+
+                self._add_point(step_num, position, voltage, uncertainty)
+
+    def _add_point(self, step_num, position, voltage, uncertainty):
+        """Keep a saved point for the plot and the caller, and report it."""
+        with self._data_lock:
+            self.positions.append(position)
+            self.voltages.append(voltage)
+            if uncertainty is not None:
+                self.uncertainties.append(uncertainty)
+
+        # Print progress
+        if uncertainty is not None:
+            print(f"Step {step_num + 1}: Position = {position:.4f} mm, "
+                  f"Voltage = {voltage:.4f} ± {uncertainty:.4f} V")
+        else:
+            print(f"Step {step_num + 1}: Position = {position:.4f} mm, "
+                  f"Voltage = {voltage:.4f} V")
+
     def run_scan(self, step_size_mm=0.05, wait_time_ms=500,
-                 direction='forward', max_steps=100):
+                 direction='forward', max_steps=100, samples_per_point=1,
+                 sample_rate=1000.0, estimator='mean', queue_size=1000,
+                 display_rate=10, storage='csv'):
         """
         Run automated beam profile scan.
 
+        Motion and acquisition, saving to disk, and live plotting run in
+        separate threads connected by a queue, so the scan time depends
+        only on motion, settling and reading. The live plot is refreshed
+        at most display_rate times per second and simply skips ahead if
+        drawing is slow.
+
         Parameters:
             step_size_mm: Step size in mm
             wait_time_ms: Wait time after each step in ms
             direction: 'forward' or 'backward'
             max_steps: Maximum number of steps (safety limit)
+            samples_per_point: DAQ samples averaged at each position. With
+                more than one, the CSV gets an 'Uncertainty (V)' column
+                (readable with load_beam_data_with_errors).
+            sample_rate: Sample rate for the averaged bursts (Hz)
+            estimator: 'mean', 'median' or 'trimmed' (see summarize_samples)
+            queue_size: Points that may wait for storage before the
+                acquisition pauses
+            display_rate: Maximum live plot refreshes per second
+            storage: 'csv' (text file) or 'binary' (a .scan directory that
+                also stores the settings and the time of every point; see
+                scan_storage.py, and export_csv to convert it)
 
         Returns:
             positions: List of positions (mm)
@@ -392,6 +1102,8 @@ class BeamProfiler:
         """
         self.positions = []
         self.voltages = []
+        self.uncertainties = []
+        averaged = samples_per_point > 1
 
         # Determine movement direction
         if direction == 'forward':
@@ -411,62 +1123,286 @@ class BeamProfiler:
         ax.grid(True, alpha=0.3)
 
         # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"beam_profile_{timestamp}.csv"
-
-        # Create CSV file with header
-        with open(filename, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Position (mm)', 'Voltage (V)'])
+        start = datetime.now()
+        timestamp = start.strftime("%Y%m%d_%H%M%S")
+
+        if storage == 'binary':
+            filename = f"beam_profile_{timestamp}.scan"
+            metadata = {
+                'start_time': start.timestamp(),
+                'start': start.isoformat(timespec='seconds'),
+                'step_size_mm': step_size_mm,
+                'wait_time_ms': wait_time_ms,
+                'direction': direction,
+                'samples_per_point': samples_per_point,
+                'sample_rate': sample_rate,
+                'estimator': estimator,
+                'motor_serial': self.serial_number,
+                'daq_device': self.daq_device,
+                'daq_channel': self.daq_channel,
+            }
+        else:
+            filename = f"beam_profile_{timestamp}.csv"
+            metadata = None
+
+            # Create CSV file with header
+            with open(filename, 'w', newline='') as f:
+                writer = csv.writer(f)
+                if averaged:
+                    writer.writerow(['Position (mm)', 'Voltage (V)',
+                                     'Uncertainty (V)'])
+                else:
+                    writer.writerow(['Position (mm)', 'Voltage (V)'])
 
         print("\n" + "=" * 50)
         print("Starting Beam Profile Measurement")
         print("=" * 50)
         print(f"Step size: {step_size_mm} mm")
         print(f"Wait time: {wait_time_ms} ms")
+        if averaged:
+            print(f"Samples per point: {samples_per_point} at "
+                  f"{sample_rate:g} Hz ({estimator})")
         print(f"Direction: {direction}")
         print(f"Output file: {filename}")
         print("\nPress Ctrl+C to stop early")
         print("=" * 50 + "\n")
 
+        # The scan runs as a pipeline: the acquisition thread moves and
+        # reads, the storage thread writes each point to disk, and this
+        # (main) thread redraws the plot whenever it has time. A slow
+        # redraw therefore never delays the next motor step.
+        records = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        errors = []
+
+        acquisition = threading.Thread(
+            target=self._acquisition_loop,
+            args=(records, stop, errors, step, max_steps, wait_time_ms,
+                  samples_per_point, sample_rate, estimator),
+            name="scan-acquisition", daemon=True
+        )
+        storage_thread = threading.Thread(
+            target=self._storage_loop,
+            args=(records, stop, errors, filename, averaged, metadata),
+            name="scan-storage", daemon=True
+        )
+        acquisition.start()
+        storage_thread.start()
+
         try:
-            for step_num in range(max_steps):
-                # Get current position and voltage
-                position = self.get_position()
-                voltage = self.read_voltage()
+            shown = 0
+            while storage_thread.is_alive():
+                # Show whatever has arrived since the last frame; points
+                # that arrive during a redraw appear in the next one
+                with self._data_lock:
+                    positions = list(self.positions)
+                    voltages = list(self.voltages)
+                if len(positions) > shown:
+                    shown = len(positions)
+                    line.set_data(positions, voltages)
+                    ax.set_xlim(min(positions) - 0.1, max(positions) + 0.1)
+                    ax.set_ylim(min(voltages) - 0.1, max(voltages) + 0.1)
+                    fig.canvas.draw_idle()
+                plt.pause(1 / display_rate)
+        except KeyboardInterrupt:
+            print("\n\nScan stopped by user")
+            stop.set()
 
-                # Store data
-                self.positions.append(position)
-                self.voltages.append(voltage)
+        acquisition.join()
+        storage_thread.join()
+        if errors:
+            raise errors[0]
 
-                # Save to file immediately
-                with open(filename, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([position, voltage])
+        plt.ioff()
 
-                # Print progress
-                print(f"Step {step_num + 1}: Position = {position:.4f} mm, "
-                      f"Voltage = {voltage:.4f} V")
+        # Final plot
+        fig, ax = plt.subplots(figsize=(10, 6))
+        if averaged:
+            ax.errorbar(self.positions, self.voltages, yerr=self.uncertainties,
+                        fmt='b-o', markersize=4, capsize=2)
+        else:
+            ax.plot(self.positions, self.voltages, 'b-o', markersize=4)
+        ax.set_xlabel('Position (mm)')
+        ax.set_ylabel('Voltage (V)')
+        ax.set_title('Beam Profile Measurement Results')
+        ax.grid(True, alpha=0.3)
+
+        # Save plot
+        plot_filename = os.path.splitext(filename)[0] + '.png'
+        plt.savefig(plot_filename, dpi=300, bbox_inches='tight')
+        print(f"\nPlot saved to: {plot_filename}")
 
-                # Update plot
-                line.set_data(self.positions, self.voltages)
-                ax.set_xlim(min(self.positions) - 0.1, max(self.positions) + 0.1)
-                ax.set_ylim(min(self.voltages) - 0.1, max(self.voltages) + 0.1)
-                plt.draw()
-                plt.pause(0.01)
+        plt.show()
 
-                # Move to next position
-                next_position = position + step
+        print(f"\nData saved to: {filename}")
+        print(f"Total points: {len(self.positions)}")
 
-                # Check if within safe range
-                if next_position < -12 or next_position > 12:
-                    print("Reached travel limit. Stopping scan.")
-                    break
+        return self.positions, self.voltages
+
+    def run_adaptive_scan(self, start_mm, stop_mm, target_precision=0.01,
+                          coarse_points=15, batch_size=5, max_points=100,
+                          wait_time_ms=500, samples_per_point=1,
+                          sample_rate=1000.0, estimator='mean',
+                          storage='csv'):
+        """
+        Knife-edge scan that puts its points where they matter.
+
+        A uniform scan spends most of its points on the flat parts of the
+        S-curve, which say almost nothing about the beam width. This scan
+        instead:
+        1. measures a coarse uniform pass to find the edge,
+        2. fits the error function to all points so far,
+        3. picks the next batch of positions that most reduce the
+           uncertainty of the center and width (choose_scan_positions),
+        4. repeats 2-3 until both uncertainties are below
+           target_precision times the fitted width, or max_points have
+           been measured.
+
+        Parameters:
+            start_mm, stop_mm: Scan range (mm); must contain the edge and
+                lie inside TRAVEL_LIMITS_MM
+            target_precision: Required uncertainty of center and width,
+                as a fraction of the width (0.01 = 1%)
+            coarse_points: Points in the first, uniform pass
+            batch_size: Points measured between fits
+            max_points: Maximum total number of points
+            wait_time_ms: Wait time after each move in ms
+            samples_per_point, sample_rate, estimator: Averaging at each
+                position (see run_scan)
+            storage: 'csv' or 'binary' (see run_scan)
+
+        Returns:
+            positions: List of positions (mm), in the order measured
+            voltages: List of voltages (V)
+            popt: Final fit [amplitude, center, width, offset], or None
+                if no fit succeeded
+            perr: Uncertainties of popt
+        """
+        check_scan_range(start_mm, stop_mm)
+        self.positions = []
+        self.voltages = []
+        self.uncertainties = []
+        averaged = samples_per_point > 1
+        candidates = np.linspace(start_mm, stop_mm, 501)
+
+        columns = ['Position (mm)', 'Voltage (V)']
+        if averaged:
+            columns.append('Uncertainty (V)')
+        start = datetime.now()
+        timestamp = start.strftime("%Y%m%d_%H%M%S")
+        if storage == 'binary':
+            filename = f"beam_profile_adaptive_{timestamp}.scan"
+            columns.append('Time (s)')
+            metadata = {
+                'start': start.isoformat(timespec='seconds'),
+                'start_mm': start_mm,
+                'stop_mm': stop_mm,
+                'target_precision': target_precision,
+                'coarse_points': coarse_points,
+                'batch_size': batch_size,
+                'wait_time_ms': wait_time_ms,
+                'samples_per_point': samples_per_point,
+                'sample_rate': sample_rate,
+                'estimator': estimator,
+                'motor_serial': self.serial_number,
+                'daq_device': self.daq_device,
+                'daq_channel': self.daq_channel,
+            }
+        else:
+            filename = f"beam_profile_adaptive_{timestamp}.csv"
 
-                self.move_to(next_position)
+        print("\n" + "=" * 50)
+        print("Starting Adaptive Beam Profile Measurement")
+        print("=" * 50)
+        print(f"Range: {start_mm} to {stop_mm} mm")
+        print(f"Target precision: {target_precision:.1%} of the width")
+        print(f"Output file: {filename}")
+        print("\nPress Ctrl+C to stop early")
+        print("=" * 50 + "\n")
 
-                # Wait for vibrations to settle
-                time.sleep(wait_time_ms / 1000)
+        plt.ion()
+        fig, ax = plt.subplots(figsize=(10, 6))
+        points, = ax.plot([], [], 'bo', markersize=4, label='Data')
+        curve, = ax.plot([], [], 'r-', label='Fit')
+        ax.set_xlim(min(start_mm, stop_mm), max(start_mm, stop_mm))
+        ax.set_xlabel('Position (mm)')
+        ax.set_ylabel('Voltage (V)')
+        ax.set_title('Adaptive Beam Profile Measurement (in progress)')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+
+        popt = None
+        perr = np.full(4, np.inf)
+        planned = np.linspace(start_mm, stop_mm, coarse_points)
+        start_time = time.time()
+
+        @contextmanager
+        def scan_output():
+            """Open the data file; yields a function that saves one row."""
+            if storage == 'binary':
+                with ScanWriter(filename, columns, metadata) as output:
+                    def save(row):
+                        # Time is measured from the start of the scan
+                        output.append(row + [time.time() - start_time])
+                    yield save
+            else:
+                with open(filename, 'w', newline='') as output:
+                    writer = csv.writer(output)
+                    writer.writerow(columns)
+
+                    def save(row):
+                        writer.writerow(row)
+                        output.flush()
+                    yield save
+
+        try:
+            # The file is opened only once the DAQ session is ready
+            with self.daq_session(samples_per_point, sample_rate), \
+                    scan_output() as save:
+                while True:
+                    # Measure the planned batch, starting from the nearer end
+                    current = self.get_position()
+                    if abs(planned[-1] - current) < abs(planned[0] - current):
+                        planned = planned[::-1]
+                    for target in planned:
+                        self.move_to(target)
+                        sleep(wait_time_ms / 1000)
+                        position = self.get_position()
+                        if averaged:
+                            voltage, uncertainty = self.read_voltage_averaged(
+                                samples_per_point, sample_rate, estimator
+                            )
+                            self.uncertainties.append(uncertainty)
+                            save([position, voltage, uncertainty])
+                        else:
+                            voltage = self.read_voltage()
+                            save([position, voltage])
+                        self.positions.append(position)
+                        self.voltages.append(voltage)
+
+                    points.set_data(self.positions, self.voltages)
+                    ax.set_ylim(min(self.voltages) - 0.1,
+                                max(self.voltages) + 0.1)
+
+                    num_left = max_points - len(self.positions)
+                    planned, popt, perr = self._plan_adaptive_batch(
+                        candidates, min(batch_size, num_left), averaged
+                    )
+                    if popt is not None:
+                        curve.set_data(candidates, fitting.beam_profile_function(
+                            candidates, *popt))
+                        print(f"  {len(self.positions)} points: "
+                              f"center = {popt[1]:.4f} ± {perr[1]:.4f} mm, "
+                              f"width = {popt[2]:.4f} ± {perr[2]:.4f} mm")
+                    plt.pause(0.01)
+
+                    if popt is not None and \
+                            max(perr[1], perr[2]) <= target_precision * abs(popt[2]):
+                        print("Target precision reached.")
+                        break
+                    if num_left <= 0:
+                        print("Maximum number of points reached.")
+                        break
 
         except KeyboardInterrupt:
             print("\n\nScan stopped by user")
@@ -475,23 +1411,403 @@ class BeamProfiler:
 
         # Final plot
         fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(self.positions, self.voltages, 'b-o', markersize=4)
+        if averaged:
+            ax.errorbar(self.positions, self.voltages, yerr=self.uncertainties,
+                        fmt='bo', markersize=4, capsize=2, label='Data')
+        else:
+            ax.plot(self.positions, self.voltages, 'bo', markersize=4,
+                    label='Data')
+        if popt is not None:
+            ax.plot(candidates, fitting.beam_profile_function(candidates, *popt),
+                    'r-', label=f'Fit: w = {popt[2]:.4f} ± {perr[2]:.4f} mm')
         ax.set_xlabel('Position (mm)')
         ax.set_ylabel('Voltage (V)')
-        ax.set_title('Beam Profile Measurement Results')
+        ax.set_title('Adaptive Beam Profile Measurement Results')
         ax.grid(True, alpha=0.3)
+        ax.legend()
 
-        # Save plot
-        plot_filename = filename.replace('.csv', '.png')
+        plot_filename = os.path.splitext(filename)[0] + '.png'
         plt.savefig(plot_filename, dpi=300, bbox_inches='tight')
         print(f"\nPlot saved to: {plot_filename}")
 
         plt.show()
 
         print(f"\nData saved to: {filename}")
-        print(f"Total points: {len(self.positions)}")
+        print(f"Total points: {len(self.positions)} "
+              f"in {time.time() - start_time:.1f} s")
+
+        return self.positions, self.voltages, popt, perr
+
+    def _plan_adaptive_batch(self, candidates, num_points, averaged):
+        """
+        Fit the points measured so far and choose the next positions.
+
+        Returns:
+            planned: Positions to measure next (sorted)
+            popt: Current fit, or None if the fit failed
+            perr: Uncertainties of popt from the Fisher information
+        """
+        order = np.argsort(self.positions)
+        x = np.array(self.positions)[order]
+        y = np.array(self.voltages)[order]
+        y_err = np.array(self.uncertainties)[order] if averaged else None
+
+        try:
+            popt, _, _ = fitting.fit_beam_profile(x, y, y_err, verbose=False)
+        except (RuntimeError, ValueError):
+            popt = None
+
+        if popt is None or not np.all(np.isfinite(popt)):
+            # No usable fit yet (e.g. the edge fell between two coarse
+            # points): measure halfway across the steepest steps instead
+            steepest = np.argsort(np.abs(np.diff(y)))[::-1][:num_points]
+            planned = 0.5 * (x[steepest] + x[steepest + 1])
+            return np.sort(planned), None, np.full(4, np.inf)
+
+        if averaged:
+            sigma = y_err
+        else:
+            # Estimate the noise from the scatter about the fit
+            residuals = y - fitting.beam_profile_function(x, *popt)
+            sigma = np.sqrt(np.sum(residuals ** 2) / max(len(x) - 4, 1))
+
+        # Choosing zero points returns the covariance of the current data
+        _, covariance = choose_scan_positions(x, popt, sigma, candidates, 0)
+        perr = np.sqrt(np.diag(covariance))
+        planned, _ = choose_scan_positions(x, popt, sigma, candidates,
+                                           num_points)
+        return np.sort(planned), popt, perr
+
+    def run_fly_scan(self, start_mm, stop_mm, velocity_mm_s=0.25,
+                     sample_rate=1000.0, poll_interval_ms=10,
+                     storage='csv'):
+        """
+        Knife-edge scan with the stage moving continuously.
+
+        A step scan spends most of its time starting, stopping and
+        settling the stage. In a fly scan the stage moves from start_mm
+        to stop_mm at a constant, slow velocity while the DAQ records
+        continuously on its sample clock. The stage position is polled
+        (with timestamps) during the move, and the position at each
+        sample is found by interpolation (interpolate_positions).
+
+        The number of points per mm is sample_rate / velocity_mm_s
+        (4000/mm with the defaults). The detector must be fast enough
+        that the voltage follows the edge: the beam crosses the edge in
+        about width / velocity_mm_s seconds.
+
+        Parameters:
+            start_mm, stop_mm: Scan range (mm), inside TRAVEL_LIMITS_MM
+            velocity_mm_s: Stage velocity during the scan (mm/s)
+            sample_rate: DAQ sample rate (Hz)
+            poll_interval_ms: Controller status update interval during
+                the scan (the usual 250 ms is too coarse for timing)
+            storage: 'csv' or 'binary' (see run_scan)
+
+        Returns:
+            positions: Array of positions (mm)
+            voltages: Array of voltages (V)
+        """
+        if not NIDAQMX_AVAILABLE:
+            raise RuntimeError("NI-DAQmx not available")
+        check_scan_range(start_mm, stop_mm)
+        if velocity_mm_s <= 0:
+            raise ValueError("velocity_mm_s must be positive")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if storage == 'binary':
+            filename = f"beam_profile_fly_{timestamp}.scan"
+        else:
+            filename = f"beam_profile_fly_{timestamp}.csv"
+        distance = abs(stop_mm - start_mm)
+
+        print("\n" + "=" * 50)
+        print("Starting Fly Scan Beam Profile Measurement")
+        print("=" * 50)
+        print(f"Range: {start_mm} to {stop_mm} mm at {velocity_mm_s} mm/s")
+        print(f"Sample rate: {sample_rate:g} Hz "
+              f"({sample_rate / velocity_mm_s:.0f} points/mm)")
+        print(f"Expected duration: {distance / velocity_mm_s:.1f} s")
+        print(f"Output file: {filename}")
+        print("=" * 50 + "\n")
+
+        self.move_to(start_mm)
+
+        block_size = max(1, int(round(0.1 * sample_rate)))
+        blocks = []
+        stop = threading.Event()
+        errors = []
+        poll_times = []
+        poll_positions = []
+
+        old_velocity = self.device.GetVelocityParams()
+        try:
+            # Slow the stage down and poll it often; both are restored
+            # in the finally block, whatever happens during the scan
+            vel_params = self.device.GetVelocityParams()
+            vel_params.MaxVelocity = Decimal(velocity_mm_s)
+            self.device.SetVelocityParams(vel_params)
+            self.device.StopPolling()
+            self.device.StartPolling(poll_interval_ms)
+
+            with nidaqmx.Task() as task:
+                task.ai_channels.add_ai_voltage_chan(
+                    f"{self.daq_device}/{self.daq_channel}"
+                )
+                task.timing.cfg_samp_clk_timing(
+                    sample_rate,
+                    sample_mode=AcquisitionType.CONTINUOUS,
+                    samps_per_chan=10 * block_size
+                )
+                task.control(TaskMode.TASK_COMMIT)
+
+                reader = threading.Thread(
+                    target=self._fly_scan_reader,
+                    args=(task, block_size, blocks, stop, errors),
+                    daemon=True
+                )
+                start_before = clock()
+                task.start()
+                start_after = clock()
+                reader.start()
+
+                try:
+                    self.device.MoveTo(Decimal(stop_mm), 0)
+                    deadline = (clock()
+                                + 2 * distance / velocity_mm_s + 10)
+                    while not errors:
+                        before = clock()
+                        position = self.get_position()
+                        poll_times.append(0.5 * (before + clock()))
+                        poll_positions.append(position)
+                        if (abs(position - stop_mm) < 1e-3
+                                and not self.device.Status.IsMoving):
+                            break
+                        if before > deadline:
+                            raise TimeoutError("Fly scan move did not finish")
+                        sleep(poll_interval_ms / 2000)
+                finally:
+                    stop.set()
+                    reader.join()
+                    task.stop()
+
+        except KeyboardInterrupt:
+            print("\n\nScan stopped by user")
+            self.device.StopImmediate()
+
+        finally:
+            self.device.SetVelocityParams(old_velocity)
+            self.set_polling(self.polling_ms)
+
+        if errors:
+            raise errors[0]
+        if not blocks:
+            raise RuntimeError("No data acquired")
+
+        # The DAQ returns a block as soon as its last sample is taken
+        # (plus USB latency), so the earliest return time of any block
+        # gives the best estimate of when sampling started.
+        count = 0
+        start_time = start_after
+        for read_time, block in blocks:
+            count += len(block)
+            start_time = min(start_time, read_time - (count - 1) / sample_rate)
+        start_time = max(start_time, start_before)
+
+        voltages = np.concatenate([block for _, block in blocks])
+        sample_times = start_time + np.arange(len(voltages)) / sample_rate
+        positions, keep = interpolate_positions(poll_times, poll_positions,
+                                                sample_times)
+        voltages = voltages[keep]
+        times = sample_times[keep] - start_time
+
+        if storage == 'binary':
+            metadata = {
+                'start': datetime.fromtimestamp(
+                    time.time() - (clock() - start_time)
+                ).isoformat(timespec='seconds'),
+                'start_mm': start_mm,
+                'stop_mm': stop_mm,
+                'velocity_mm_s': velocity_mm_s,
+                'sample_rate': sample_rate,
+                'poll_interval_ms': poll_interval_ms,
+                'motor_serial': self.serial_number,
+                'daq_device': self.daq_device,
+                'daq_channel': self.daq_channel,
+            }
+            with ScanWriter(filename, ['Position (mm)', 'Voltage (V)',
+                                       'Time (s)'], metadata) as writer:
+                writer.append(np.column_stack((positions, voltages, times)))
+        else:
+            np.savetxt(filename, np.column_stack((positions, voltages)),
+                       fmt=['%.6f', '%.5f'], delimiter=',',
+                       header='Position (mm),Voltage (V)', comments='')
+
+        self.positions = list(positions)
+        self.voltages = list(voltages)
+
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(positions, voltages, 'b-', linewidth=0.8)
+        ax.set_xlabel('Position (mm)')
+        ax.set_ylabel('Voltage (V)')
+        ax.set_title('Fly Scan Beam Profile Measurement Results')
+        ax.grid(True, alpha=0.3)
+
+        plot_filename = os.path.splitext(filename)[0] + '.png'
+        plt.savefig(plot_filename, dpi=300, bbox_inches='tight')
+        print(f"\nPlot saved to: {plot_filename}")
+
+        plt.show()
+
+        print(f"\nData saved to: {filename}")
+        print(f"Total points: {len(positions)} "
+              f"from {len(set(poll_positions))} stage positions")
+
+        return positions, voltages
+
+    def _fly_scan_reader(self, task, block_size, blocks, stop, errors):
+        """
+        Reader thread of run_fly_scan: collect (read_time, block) pairs.
+
+        Reads whole blocks until `stop` is set, so the driver buffer never
+        overflows while the main thread polls the stage.
+        """
+        try:
+            while not stop.is_set():
+                block = task.read(number_of_samples_per_channel=block_size,
+                                  timeout=10.0)
+                blocks.append((clock(),
+                               np.asarray(block, dtype=float)))
+        except Exception as e:
+            errors.append(e)
 
-        return self.positions, self.voltages
+
+class AsyncBeamProfiler:
+    """
+    asyncio interface to a BeamProfiler.
+
+    The Kinesis and DAQmx calls block until the hardware is done, so
+    each instrument gets its own worker thread: one for the motor and
+    one for the DAQ. The methods of this class run the blocking calls
+    in those threads and can be awaited, which lets one program do
+    several things at once, for example read a reference signal while
+    the stage moves, fit the previous scan, or drive two stages.
+
+    Calls to the same instrument still run one at a time, in the order
+    they were made, so the SDKs are never used from two threads at once.
+
+    Example usage:
+        async def measure():
+            async with AsyncBeamProfiler(BeamProfiler("26002448")) as stage:
+                await stage.home()
+                # Move and read a reference level at the same time
+                _, reference = await asyncio.gather(
+                    stage.move_to(1.0), stage.read_voltage()
+                )
+                voltage, error = await stage.read_voltage_averaged(200)
+
+        asyncio.run(measure())
+    """
+
+    def __init__(self, profiler):
+        """
+        Parameters:
+            profiler: BeamProfiler to control
+        """
+        self.profiler = profiler
+        self._motor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"motor-{profiler.serial_number}"
+        )
+        self._daq = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix=f"daq-{profiler.daq_device}"
+        )
+
+    async def _call(self, executor, function, *args, **kwargs):
+        """Run a blocking call in an instrument's thread and await it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(function, *args, **kwargs)
+        )
+
+    async def connect(self):
+        """Connect to the motor controller."""
+        await self._call(self._motor, self.profiler.connect)
+
+    async def disconnect(self):
+        """Disconnect from the motor controller."""
+        await self._call(self._motor, self.profiler.disconnect)
+
+    async def get_position(self):
+        """Current motor position in mm."""
+        return await self._call(self._motor, self.profiler.get_position)
+
+    async def move_to(self, position_mm, timeout_ms=60000):
+        """
+        Move to an absolute position (mm); returns when the move is done.
+
+        The motor thread is only busy while the move is started, so
+        e.g. get_position can be awaited during the move. Returns the
+        timing of the move (see BeamProfiler.start_move).
+        """
+        future = await self._call(self._motor, self.profiler.start_move,
+                                  position_mm, timeout_ms)
+        return await asyncio.wait_for(asyncio.wrap_future(future),
+                                      timeout_ms / 1000)
+
+    async def home(self, timeout_ms=60000):
+        """Home the motor; returns when homing is done."""
+        future = await self._call(self._motor, self.profiler.start_home,
+                                  timeout_ms)
+        await asyncio.wait_for(asyncio.wrap_future(future), timeout_ms / 1000)
+
+    async def read_voltage(self):
+        """Read one voltage sample (V)."""
+        return await self._call(self._daq, self.profiler.read_voltage)
+
+    async def read_voltage_averaged(self, num_samples=100, sample_rate=1000.0,
+                                    estimator='mean'):
+        """Averaged burst read; returns (voltage, uncertainty) in V."""
+        return await self._call(self._daq, self.profiler.read_voltage_averaged,
+                                num_samples, sample_rate, estimator)
+
+    async def acquire(self, num_samples=100, sample_rate=1000.0):
+        """Hardware-timed burst; returns an array of voltages (V)."""
+        return await self._call(self._daq, self.profiler.read_samples,
+                                num_samples, sample_rate)
+
+    @asynccontextmanager
+    async def daq_session(self, num_samples=1, sample_rate=1000.0):
+        """Keep one DAQ task open (see BeamProfiler.daq_session)."""
+        session = self.profiler.daq_session(num_samples, sample_rate)
+        await self._call(self._daq, session.__enter__)
+        try:
+            yield self
+        finally:
+            await self._call(self._daq, session.__exit__, None, None, None)
+
+    async def close(self):
+        """Disconnect and stop the worker threads."""
+        try:
+            if self.profiler.device is not None:
+                await self.disconnect()
+        finally:
+            self._motor.shutdown()
+            self._daq.shutdown()
+
+    async def __aenter__(self):
+        try:
+            await self.connect()
+        except BaseException:
+            # __aexit__ is not called if __aenter__ fails
+            self._motor.shutdown()
+            self._daq.shutdown()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.close()
 
 
 def get_available_daq_devices():
@@ -565,6 +1881,22 @@ def main():
     if direction not in ['forward', 'backward']:
         direction = 'forward'
 
+    samples_per_point = input("Enter samples to average per point (default 1): ").strip()
+    samples_per_point = int(samples_per_point) if samples_per_point else 1
+
+    storage = input("Save as CSV or binary .scan? (csv/binary, default csv): ").strip()
+    if storage not in ['csv', 'binary']:
+        storage = 'csv'
+
+    # An adaptive scan fits as it goes and puts its points on the edge;
+    # a fly scan records while the stage moves at constant velocity
+    mode = input("Scan mode (step/adaptive/fly, default step): ").strip()
+    if mode not in ['step', 'adaptive', 'fly']:
+        mode = 'step'
+    if mode == 'fly':
+        velocity = input("Enter fly scan velocity in mm/s (default 0.25): ").strip()
+        velocity = float(velocity) if velocity else 0.25
+
     # Create profiler with detected DAQ device
     profiler = BeamProfiler(serial_number, daq_device=daq_device)
 
@@ -586,15 +1918,38 @@ def main():
             start_pos = float(input("Enter start position (mm): "))
             profiler.move_to(start_pos)
 
+        if mode in ['adaptive', 'fly']:
+            start_pos = profiler.get_position()
+            stop_pos = float(input("Enter scan end position (mm): "))
+
         # Confirm ready
         input("\nPress Enter to start the scan...")
 
         # Run scan
-        profiler.run_scan(
-            step_size_mm=step_size,
-            wait_time_ms=wait_time,
-            direction=direction
-        )
+        if mode == 'adaptive':
+            profiler.run_adaptive_scan(
+                start_pos, stop_pos,
+                wait_time_ms=wait_time,
+                samples_per_point=samples_per_point,
+                storage=storage
+            )
+        elif mode == 'fly':
+            profiler.run_fly_scan(
+                start_pos, stop_pos,
+                velocity_mm_s=velocity,
+                storage=storage
+            )
+        else:
+            profiler.run_scan(
+                step_size_mm=step_size,
+                wait_time_ms=wait_time,
+                direction=direction,
+                samples_per_point=samples_per_point,
+                storage=storage
+            )
+
+        print()
+        profiler.report_move_latency()
 
     except Exception as e:
         print(f"\nError: {e}")
@@ -0,0 +1,302 @@
+"""
+Fitting Benchmark - Speed and Robustness of Beam Profile Fits
+=============================================================
+
+This script measures how fast and how reliably fit_beam_profile (from
+02_fitting_example.py) recovers the parameters of synthetic knife-edge
+data. It builds error-function datasets over a grid of:
+
+- noise levels (relative to the amplitude)
+- number of points (30 to 100,000)
+- beam width relative to the scan range
+
+and, for every fit variant, records:
+
+- fit time (median and minimum over repeats)
+- number of model evaluations and iterations
+- number of failed fits
+- bias and scatter of the fitted center and width
+
+Results are written as JSON, so two runs (e.g. before and after a code
+change) can be compared number by number.
+
+Usage:
+    python benchmark_fitting.py
+    python benchmark_fitting.py --quick --output quick.json
+    python benchmark_fitting.py --variants weighted --repeats 10
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import scipy
+
+# The lesson scripts start with a digit, so they cannot be imported with
+# a normal import statement.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+fitting = importlib.import_module("02_fitting_example")
+
+# Benchmark grid
+NOISE_LEVELS = [0.005, 0.02, 0.1]       # Noise sigma / amplitude
+POINT_COUNTS = [30, 100, 1000, 10000, 100000]
+WIDTH_RATIOS = [0.02, 0.1, 0.3]         # Beam width / scan range
+REPEATS = 5
+
+# Smaller grid for a quick check
+QUICK_NOISE_LEVELS = [0.02]
+QUICK_POINT_COUNTS = [30, 1000]
+QUICK_WIDTH_RATIOS = [0.1]
+QUICK_REPEATS = 3
+
+# Synthetic beam (positions in mm, voltages in V)
+SCAN_RANGE = 10.0
+AMPLITUDE = 1.5
+OFFSET = 1.5
+
+
+def make_dataset(num_points, noise_level, width_ratio, rng):
+    """
+    Generate a synthetic knife-edge dataset.
+
+    The beam center is placed near the middle of the scan with a small
+    random shift, so repeated datasets are not identical.
+
+    Parameters:
+        num_points: Number of positions in the scan
+        noise_level: Noise standard deviation relative to the amplitude
+        width_ratio: Beam width divided by the scan range
+        rng: numpy random Generator
+
+    Returns:
+        x: Position array (mm)
+        y: Voltage array (V)
+        y_err: Uncertainty array (V)
+        true_params: [amplitude, center, width, offset]
+    """
+    width = width_ratio * SCAN_RANGE
+    center = SCAN_RANGE / 2 + rng.uniform(-0.1, 0.1) * SCAN_RANGE
+    true_params = [AMPLITUDE, center, width, OFFSET]
+
+    x = np.linspace(0, SCAN_RANGE, num_points)
+    sigma = noise_level * AMPLITUDE
+    y = fitting.beam_profile_function(x, *true_params)
+    y = y + rng.normal(0, sigma, num_points)
+    y_err = np.full(num_points, sigma)
+
+    return x, y, y_err, true_params
+
+
+def fit_weighted(x, y, y_err):
+    """Weighted fit using the known uncertainties."""
+    return fitting.fit_beam_profile(x, y, y_err, verbose=False,
+                                    full_output=True)
+
+
+def fit_unweighted(x, y, y_err):
+    """Unweighted fit (uncertainties ignored)."""
+    return fitting.fit_beam_profile(x, y, verbose=False, full_output=True)
+
+
+def fit_multistart(x, y, y_err):
+    """Weighted multi-start fit (16 starts, all CPU cores)."""
+    return fitting.fit_beam_profile(x, y, y_err, verbose=False,
+                                    full_output=True, n_starts=16, seed=0)
+
+
+def fit_compiled(x, y, y_err):
+    """Weighted fit using the compiled (Numba) model and Jacobian."""
+    return fitting.fit_beam_profile(x, y, y_err, verbose=False,
+                                    full_output=True, engine='numba')
+
+
+# Fit variants to benchmark. Each takes (x, y, y_err) and returns
+# (popt, perr, pcov, info) like fit_beam_profile(..., full_output=True).
+VARIANTS = {
+    'weighted': fit_weighted,
+    'unweighted': fit_unweighted,
+    'multistart': fit_multistart,
+}
+if fitting.NUMBA_AVAILABLE:
+    VARIANTS['compiled'] = fit_compiled
+
+
+def run_case(fit_function, num_points, noise_level, width_ratio, repeats,
+             seed):
+    """
+    Fit `repeats` independent datasets with one variant and summarize.
+
+    Parameters:
+        fit_function: One of the VARIANTS functions
+        num_points, noise_level, width_ratio: Grid point
+        repeats: Number of datasets to fit
+        seed: Random seed (the same seed gives the same datasets)
+
+    Returns:
+        dict of timing, evaluation count, failure and bias statistics
+    """
+    rng = np.random.default_rng(seed)
+    times = []
+    nfevs = []
+    iterations = []
+    center_errors = []
+    width_errors = []
+    failures = 0
+
+    for _ in range(repeats):
+        x, y, y_err, true_params = make_dataset(
+            num_points, noise_level, width_ratio, rng
+        )
+
+        start = time.perf_counter()
+        try:
+            with warnings.catch_warnings():
+                # Poor fits warn that the covariance could not be
+                # estimated; they are counted below instead.
+                warnings.simplefilter("ignore")
+                popt, perr, pcov, info = fit_function(x, y, y_err)
+        except (RuntimeError, ValueError):
+            failures += 1
+            continue
+        times.append(time.perf_counter() - start)
+
+        if not np.all(np.isfinite(pcov)):
+            failures += 1
+            continue
+
+        nfevs.append(info['nfev'])
+        if info.get('njev') is not None:
+            # Analytic Jacobian: one Jacobian evaluation per iteration
+            iterations.append(info['njev'])
+        else:
+            # Numerical Jacobian: each iteration costs one evaluation per
+            # parameter for the finite differences plus one for the step
+            iterations.append(info['nfev'] / (len(popt) + 1))
+
+        true_width = true_params[2]
+        center_errors.append((popt[1] - true_params[1]) / true_width)
+        width_errors.append((abs(popt[2]) - true_width) / true_width)
+
+    def summary(values, function):
+        return float(function(values)) if values else None
+
+    return {
+        'num_points': num_points,
+        'noise_level': noise_level,
+        'width_ratio': width_ratio,
+        'repeats': repeats,
+        'failures': failures,
+        'time_median_s': summary(times, np.median),
+        'time_min_s': summary(times, np.min),
+        'nfev_mean': summary(nfevs, np.mean),
+        'iterations_mean': summary(iterations, np.mean),
+        # Center errors are in units of the true width
+        'center_bias': summary(center_errors, np.mean),
+        'center_scatter': summary(center_errors, np.std),
+        # Width errors are relative to the true width
+        'width_bias': summary(width_errors, np.mean),
+        'width_scatter': summary(width_errors, np.std),
+    }
+
+
+def run_benchmark(variants, noise_levels, point_counts, width_ratios,
+                  repeats, seed=0):
+    """
+    Run every variant over the full grid.
+
+    Returns:
+        dict with run metadata and a list of results per variant
+    """
+    results = {
+        'metadata': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+        },
+        'variants': {},
+    }
+
+    for name in variants:
+        print(f"\nVariant: {name}")
+        cases = []
+        for num_points in point_counts:
+            for noise_level in noise_levels:
+                for width_ratio in width_ratios:
+                    case = run_case(
+                        VARIANTS[name], num_points, noise_level,
+                        width_ratio, repeats, seed
+                    )
+                    cases.append(case)
+
+                    time_ms = (case['time_median_s'] * 1000
+                               if case['time_median_s'] is not None
+                               else float('nan'))
+                    print(f"  N={num_points:>6}  noise={noise_level:<6}"
+                          f"  w/range={width_ratio:<5}"
+                          f"  time={time_ms:8.2f} ms"
+                          f"  failures={case['failures']}")
+        results['variants'][name] = cases
+
+    return results
+
+
+def main():
+    """Run the benchmark and save the results as JSON."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark beam profile fitting on synthetic data."
+    )
+    parser.add_argument('--output', default=None,
+                        help="JSON output file "
+                             "(default: fit_benchmark_YYYYMMDD_HHMMSS.json)")
+    parser.add_argument('--quick', action='store_true',
+                        help="Run a small grid for a quick check")
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS),
+                        default=list(VARIANTS),
+                        help="Fit variants to benchmark")
+    parser.add_argument('--repeats', type=int, default=None,
+                        help="Datasets per grid point")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="Random seed for the synthetic data")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 50)
+    print("PHYS 4430 - Fitting Benchmark")
+    print("=" * 50)
+
+    if args.quick:
+        grid = (QUICK_NOISE_LEVELS, QUICK_POINT_COUNTS, QUICK_WIDTH_RATIOS)
+        repeats = QUICK_REPEATS
+    else:
+        grid = (NOISE_LEVELS, POINT_COUNTS, WIDTH_RATIOS)
+        repeats = REPEATS
+    if args.repeats is not None:
+        repeats = args.repeats
+
+    results = run_benchmark(args.variants, *grid, repeats=repeats,
+                            seed=args.seed)
+
+    filename = args.output
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"fit_benchmark_{timestamp}.json"
+
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\nResults saved to: {filename}")
+
+
+if __name__ == "__main__":
+    main()
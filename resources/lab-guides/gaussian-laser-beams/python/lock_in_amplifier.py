@@ -0,0 +1,421 @@
+"""
+Software Lock-In Amplifier
+==========================
+
+This script implements a digital lock-in amplifier for DAQ data. It can
+pull a weak modulated signal (e.g. a chopped laser beam on a
+photodetector) out of noise that is much larger than the signal itself.
+
+How a lock-in works:
+1. Multiply the signal by a cosine and a sine at the reference
+   frequency. The part of the signal at that frequency becomes a
+   constant (DC) value; everything else becomes an oscillation.
+2. Low-pass filter the products. The oscillations (noise) are removed,
+   leaving the in-phase (X) and quadrature (Y) components.
+3. Compute the amplitude R = sqrt(X^2 + Y^2) and phase theta.
+
+The reference can be:
+- internal: a known frequency (e.g. the chopper setting), or
+- external: a second DAQ channel measuring the chopper's reference
+  output (a square or sine wave). The reference phase is tracked from
+  its rising edges, so the lock-in follows any drift of the chopper
+  frequency. Edges are found with a threshold halfway between the
+  lowest and highest reference values seen so far (or a fixed level),
+  with hysteresis so noise near the threshold gives no false edges.
+
+Data are processed in chunks as they arrive from the DAQ. The filter
+state carries over between chunks, so the output is continuous, and the
+output is decimated to a manageable rate.
+
+Hardware (for the DAQ demo):
+- NI USB-6009 (or compatible NI DAQ device)
+- Photodetector signal on AI0, chopper reference output on AI1
+
+Usage:
+    python lock_in_amplifier.py              # Simulated chopped signal
+    python lock_in_amplifier.py --daq Dev1   # Live DAQ data
+
+Without a DAQ connected (simulated device; see simulated_hardware.py):
+    PHYS4430_SIMULATE=1 python lock_in_amplifier.py --daq Dev1
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+import scipy.signal
+
+# NI-DAQmx imports (only needed for live data). With PHYS4430_SIMULATE=1
+# the simulated DAQ from simulated_hardware.py is used instead
+if os.environ.get("PHYS4430_SIMULATE", "0") not in ("", "0"):
+    from simulated_hardware import nidaqmx, AcquisitionType
+    from simulated_hardware import AnalogMultiChannelReader
+    NIDAQMX_AVAILABLE = True
+else:
+    try:
+        import nidaqmx
+        from nidaqmx.constants import AcquisitionType
+        from nidaqmx.stream_readers import AnalogMultiChannelReader
+        NIDAQMX_AVAILABLE = True
+    except ImportError:
+        NIDAQMX_AVAILABLE = False
+
+
+class LockInAmplifier:
+    """
+    Digital lock-in amplifier that processes data chunk by chunk.
+
+    Outputs X, Y (in-phase and quadrature components), R (amplitude of
+    the signal at the reference frequency, in the same units as the
+    signal) and theta (phase relative to the reference, radians).
+
+    Example usage (internal reference):
+        lock_in = LockInAmplifier(sample_rate=10000,
+                                  reference_frequency=137.0,
+                                  time_constant=0.1)
+        for chunk in chunks:
+            t, X, Y, R, theta = lock_in.process(chunk)
+
+    Example usage (external reference on a second channel):
+        lock_in = LockInAmplifier(sample_rate=10000, time_constant=0.1)
+        for signal_chunk, reference_chunk in chunks:
+            t, X, Y, R, theta = lock_in.process(signal_chunk,
+                                                reference_chunk)
+    """
+
+    def __init__(self, sample_rate, reference_frequency=None,
+                 time_constant=0.1, filter_order=4, decimation=None,
+                 reference_level=None, hysteresis=0.1):
+        """
+        Parameters:
+            sample_rate: DAQ sampling rate in Hz
+            reference_frequency: Internal reference frequency in Hz, or
+                None to use an external reference channel
+            time_constant: Low-pass filter time constant in seconds.
+                Longer means less noise but slower response.
+            filter_order: Order of the Butterworth low-pass filter
+                (each order adds 6 dB/octave of roll-off)
+            decimation: Keep every n-th output sample (default: about
+                20 output samples per time constant)
+            reference_level: Fixed threshold (V) for the external
+                reference edges, or None to use the middle of the
+                reference's range
+            hysteresis: Half-width of the hysteresis band around the
+                threshold, as a fraction of the reference's range
+        """
+        self.sample_rate = sample_rate
+        self.reference_frequency = reference_frequency
+        self.time_constant = time_constant
+        self.reference_level = reference_level
+        self.hysteresis = hysteresis
+
+        cutoff = 1 / (2 * np.pi * time_constant)
+        if decimation is None:
+            decimation = max(1, int(sample_rate * time_constant / 20))
+        self.decimation = decimation
+
+        # Low-pass filter for X and Y (two rows share the same filter)
+        self._sos = scipy.signal.butter(filter_order, cutoff,
+                                        fs=sample_rate, output='sos')
+        self._lowpass_state = np.zeros((self._sos.shape[0], 2, 2))
+        self._settling_time = None
+
+        self._reset_reference()
+        self._samples_processed = 0
+
+    @property
+    def settling_time(self):
+        """
+        Time (s) for the output to settle within 1% of a step change.
+
+        Output from the first settling_time after the start (or after a
+        sudden change of the signal) should be ignored.
+        """
+        if self._settling_time is None:
+            # Step response of the low-pass filter, long enough to settle
+            n = int(np.ceil(50 * self.time_constant * self.sample_rate))
+            step = scipy.signal.sosfilt(self._sos, np.ones(n))
+            unsettled = np.nonzero(np.abs(step - 1) > 0.01)[0]
+            last = unsettled[-1] + 1 if len(unsettled) else 0
+            self._settling_time = last / self.sample_rate
+        return self._settling_time
+
+    def _reset_reference(self):
+        # External reference tracking: time (in samples) of the last
+        # rising edge, the current period estimate, the last sample,
+        # the range of the reference so far, and whether the reference
+        # has been below the hysteresis band since the last edge
+        self._last_edge = None
+        self._period = None
+        self._last_reference = None
+        self._reference_min = np.inf
+        self._reference_max = -np.inf
+        self._armed = False
+
+    def reset(self):
+        """Clear all filter state (e.g. after changing the setup)."""
+        self._lowpass_state[...] = 0
+        self._reset_reference()
+        self._samples_processed = 0
+
+    def _rising_edges(self, reference):
+        """
+        Times (in samples, since the start) where the reference crosses
+        the threshold going upward, found by interpolating between the
+        samples on either side.
+
+        The threshold and the trigger state only depend on the samples
+        before each edge, never on where a chunk starts or ends, so any
+        chunk size gives the same edges.
+        """
+        n = len(reference)
+        if n == 0:
+            return np.empty(0)
+
+        # Range of the reference up to and including each sample
+        low = np.minimum.accumulate(np.minimum(reference, self._reference_min))
+        high = np.maximum.accumulate(np.maximum(reference, self._reference_max))
+        self._reference_min = low[-1]
+        self._reference_max = high[-1]
+
+        if self.reference_level is None:
+            level = 0.5 * (low + high)
+        else:
+            level = np.full(n, float(self.reference_level))
+        band = self.hysteresis * (high - low)
+        valid = high - low > 1e-9  # A flat reference has no edges
+
+        # Schmitt trigger: the state is 1 above the band, 0 below it and
+        # unchanged inside it (-1 marks "unchanged"). It starts at 1, so
+        # the reference must go below the band before the first edge.
+        state = np.where(valid & (reference > level + band), 1,
+                         np.where(valid & (reference < level - band), 0, -1))
+        state = np.concatenate(([0 if self._armed else 1], state))
+        last_defined = np.maximum.accumulate(
+            np.where(state >= 0, np.arange(n + 1), 0))
+        state = state[last_defined]
+        self._armed = bool(state[-1] == 0)
+
+        # Sample j fires the trigger when the state changes from 0 to 1
+        j = np.nonzero((state[:-1] == 0) & (state[1:] == 1))[0]
+        last = (reference[0] if self._last_reference is None
+                else self._last_reference)
+        previous = np.concatenate(([last], reference[:-1]))
+        self._last_reference = reference[-1]
+
+        # Interpolate where the reference crossed the threshold between
+        # the sample before j and sample j
+        rise = reference[j] - previous[j]
+        fraction = (level[j] - previous[j]) / np.where(rise > 0, rise, 1.0)
+        return self._samples_processed + j - 1 + np.clip(fraction, 0, 1)
+
+    def _reference_phasor(self, n, reference):
+        """Return (cos, sin) of the reference phase for this chunk."""
+        if reference is None:
+            if self.reference_frequency is None:
+                raise ValueError("Give a reference chunk or set "
+                                 "reference_frequency")
+            sample_index = self._samples_processed + np.arange(n)
+            phase = 2 * np.pi * self.reference_frequency * sample_index \
+                / self.sample_rate
+            return np.cos(phase), np.sin(phase)
+
+        # The reference phase increases by 2 pi from one rising edge to
+        # the next. Between edges it is interpolated linearly; after the
+        # last edge it is extrapolated using the latest period.
+        edges = self._rising_edges(np.asarray(reference, dtype=float))
+        if self._last_edge is not None:
+            edges = np.concatenate(([self._last_edge], edges))
+        if len(edges) == 0:
+            zeros = np.zeros(n)
+            return zeros, zeros  # Not locked yet: no output
+
+        if len(edges) > 1:
+            self._period = edges[-1] - edges[-2]
+        self._last_edge = edges[-1]
+        if self._period is None:
+            zeros = np.zeros(n)
+            return zeros, zeros  # Need two edges to know the period
+
+        sample_index = self._samples_processed + np.arange(n)
+        k = np.clip(np.searchsorted(edges, sample_index, side='right') - 1,
+                    0, len(edges) - 1)
+        periods = np.append(np.diff(edges), self._period)
+        cycles = (sample_index - edges[k]) / periods[k]
+        phase = 2 * np.pi * cycles
+        return np.cos(phase), np.sin(phase)
+
+    def process(self, signal, reference=None):
+        """
+        Demodulate one chunk of data.
+
+        Parameters:
+            signal: 1D array of signal samples
+            reference: 1D array of reference samples (same length), or
+                None to use the internal reference frequency
+
+        Returns:
+            t: Output times (s) since the first sample processed
+            X: In-phase component
+            Y: Quadrature component
+            R: Amplitude, sqrt(X^2 + Y^2)
+            theta: Phase (radians); with an external reference, relative
+                to the reference's rising edge
+        """
+        signal = np.asarray(signal, dtype=float)
+        n = len(signal)
+        start = self._samples_processed
+
+        cos_ref, sin_ref = self._reference_phasor(n, reference)
+
+        # Mix down: the component at the reference frequency becomes DC.
+        # The factor 2 makes R equal to the sinusoid's amplitude.
+        mixed = np.empty((2, n))
+        mixed[0] = 2 * signal * cos_ref
+        mixed[1] = -2 * signal * sin_ref
+
+        filtered, self._lowpass_state = scipy.signal.sosfilt(
+            self._sos, mixed, axis=-1, zi=self._lowpass_state
+        )
+
+        # Keep every `decimation`-th sample, continuing the pattern
+        # from the previous chunk
+        first = (-start) % self.decimation
+        keep = np.arange(first, n, self.decimation)
+        self._samples_processed += n
+
+        X = filtered[0, keep]
+        Y = filtered[1, keep]
+        t = (start + keep) / self.sample_rate
+        R = np.hypot(X, Y)
+        theta = np.arctan2(Y, X)
+        return t, X, Y, R, theta
+
+
+def simulated_chunks(sample_rate, duration, chunk_size, frequency=137.0,
+                     amplitude=0.01, noise=0.1):
+    """
+    Simulate a chopped photodetector signal buried in noise.
+
+    Yields:
+        (signal_chunk, reference_chunk): the signal is a small square
+        wave at `frequency` plus large noise and a 60 Hz pickup; the
+        reference is a clean 5 V square wave like a chopper's output.
+    """
+    rng = np.random.default_rng()
+    total = int(duration * sample_rate)
+    for start in range(0, total, chunk_size):
+        t = (start + np.arange(min(chunk_size, total - start))) / sample_rate
+        chopped = (np.sin(2 * np.pi * frequency * t) > 0).astype(float)
+        signal = (amplitude * chopped
+                  + 0.05 * np.sin(2 * np.pi * 60 * t)
+                  + noise * rng.standard_normal(len(t)))
+        reference = 5.0 * chopped
+        yield signal, reference
+
+
+def daq_chunks(device, sample_rate, duration, chunk_size,
+               signal_channel="ai0", reference_channel="ai1"):
+    """
+    Read signal and reference channels continuously from the DAQ.
+
+    The DAQ's sample clock times the samples; each read returns the
+    next chunk from the driver's buffer.
+
+    Yields:
+        (signal_chunk, reference_chunk)
+    """
+    if not NIDAQMX_AVAILABLE:
+        raise RuntimeError("NI-DAQmx not available")
+
+    with nidaqmx.Task() as task:
+        task.ai_channels.add_ai_voltage_chan(f"{device}/{signal_channel}")
+        task.ai_channels.add_ai_voltage_chan(f"{device}/{reference_channel}")
+        task.timing.cfg_samp_clk_timing(
+            rate=sample_rate,
+            sample_mode=AcquisitionType.CONTINUOUS,
+            samps_per_chan=10 * chunk_size  # Driver buffer size
+        )
+        reader = AnalogMultiChannelReader(task.in_stream)
+        buffer = np.empty((2, chunk_size))
+
+        task.start()
+        num_chunks = int(duration * sample_rate / chunk_size)
+        for _ in range(num_chunks):
+            reader.read_many_sample(buffer,
+                                    number_of_samples_per_channel=chunk_size)
+            yield buffer[0].copy(), buffer[1].copy()
+
+
+def main():
+    """Run the lock-in on simulated or live data and plot the output."""
+    parser = argparse.ArgumentParser(description="Software lock-in amplifier")
+    parser.add_argument('--daq', default=None,
+                        help="DAQ device name (default: simulated data)")
+    parser.add_argument('--rate', type=float, default=10000,
+                        help="Sample rate in Hz (default 10000)")
+    parser.add_argument('--duration', type=float, default=20,
+                        help="Measurement time in s (default 20)")
+    parser.add_argument('--tau', type=float, default=1.0,
+                        help="Time constant in s (default 1.0)")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 50)
+    print("PHYS 4430 - Software Lock-In Amplifier")
+    print("=" * 50 + "\n")
+
+    chunk_size = int(args.rate / 20)  # 50 ms per chunk
+    if args.daq is None:
+        # The fundamental of a 0-to-10 mV square wave has amplitude
+        # (2 / pi) * 10 mV = 6.4 mV, which is what the lock-in measures
+        print("Using simulated data: 10 mV chopped signal, 100 mV noise")
+        print("Expected R = 6.37 mV (fundamental of the square wave)")
+        chunks = simulated_chunks(args.rate, args.duration, chunk_size)
+    else:
+        print(f"Reading signal from {args.daq}/ai0, "
+              f"reference from {args.daq}/ai1")
+        chunks = daq_chunks(args.daq, args.rate, args.duration, chunk_size)
+
+    lock_in = LockInAmplifier(args.rate, time_constant=args.tau)
+    print(f"Time constant: {args.tau} s, "
+          f"output rate: {args.rate / lock_in.decimation:.0f} Hz")
+
+    outputs = []
+    processing_time = 0.0
+    for signal, reference in chunks:
+        start = time.perf_counter()
+        outputs.append(lock_in.process(signal, reference))
+        processing_time += time.perf_counter() - start
+
+    t, X, Y, R, theta = (np.concatenate(values) for values in zip(*outputs))
+    print(f"Processing took {processing_time / args.duration * 100:.1f}% "
+          "of real time")
+
+    # Ignore the output while the filter settles
+    settled = t > lock_in.settling_time
+    print(f"\nR = {np.mean(R[settled]) * 1000:.3f} "
+          f"± {np.std(R[settled]) * 1000:.3f} mV")
+    print(f"theta = {np.degrees(np.mean(theta[settled])):.1f} degrees")
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+    ax1.plot(t, X * 1000, label='X')
+    ax1.plot(t, Y * 1000, label='Y')
+    ax1.plot(t, R * 1000, 'k', label='R')
+    ax1.set_ylabel('Lock-in output (mV)')
+    ax1.set_title('Lock-In Amplifier Output')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    ax2.plot(t, np.degrees(theta))
+    ax2.set_xlabel('Time (s)')
+    ax2.set_ylabel('Phase (degrees)')
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Scan Storage - Appendable Binary Files for Scans and Long Captures
+==================================================================
+
+Writing every value as text (CSV) is slow: each number has to be
+formatted, and reopening the file for every point adds more overhead.
+For long or fast measurements this module stores data in binary form
+instead:
+
+    beam_profile_20250101_120000.scan/
+        metadata.json       settings, device names, column names, times
+        chunk_00000.npy     rows 0 ... chunk_rows-1
+        chunk_00001.npy     the next rows, ...
+
+Each chunk is an ordinary NumPy .npy file (np.load can read it). Rows
+are appended to the last chunk as they arrive and written to disk at
+least every `flush_interval` seconds, so after a crash or power cut at
+most that much data is lost.
+
+Example usage:
+    with ScanWriter("run1.scan", ["Time (s)", "Voltage (V)"],
+                    metadata={"sample_rate": 1000}) as writer:
+        writer.append(block)          # array with one row per sample
+
+    data, metadata = load_scan("run1.scan")
+    export_csv("run1.scan")           # writes run1.csv
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+METADATA_FILE = "metadata.json"
+
+# CSV number formats by the unit in the column name (see export_csv):
+# positions to 1 nm, times to 1 us, voltages to 10 uV (below one ADC
+# step). Other columns keep nine significant digits.
+CSV_FORMATS = {"(mm)": "%.6f", "(s)": "%.6f", "(V)": "%.5f"}
+DEFAULT_CSV_FORMAT = "%.9g"
+
+
+def _fsync_directory(path):
+    """Make sure new and renamed files in a directory are on disk."""
+    if os.name == "nt":
+        return  # Windows cannot open directories; NTFS journals renames
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ScanWriter:
+    """
+    Append rows of numbers to a chunked binary scan directory.
+
+    Parameters:
+        path: Directory to create (conventionally ending in ".scan")
+        columns: Column names, e.g. ["Position (mm)", "Voltage (V)"]
+        metadata: dict of settings to store (must be JSON serializable)
+        chunk_rows: Rows per chunk file
+        flush_interval: Maximum seconds between writes to disk
+        dtype: Data type of the stored values
+    """
+
+    def __init__(self, path, columns, metadata=None, chunk_rows=1_000_000,
+                 flush_interval=1.0, dtype=np.float64):
+        self.path = os.fspath(path)
+        self.columns = list(columns)
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.dtype = np.dtype(dtype)
+        self.num_rows = 0
+
+        os.makedirs(self.path)
+        self.metadata = {
+            "columns": self.columns,
+            "dtype": self.dtype.str,
+            "chunk_rows": chunk_rows,
+            "num_rows": 0,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "complete": False,
+            "settings": dict(metadata or {}),
+        }
+
+        self._file = None
+        self._chunk_index = -1
+        self._chunk_count = 0
+        self._last_flush = time.monotonic()
+        self._open_chunk()
+        self._write_metadata()
+
+    def _chunk_path(self, index):
+        return os.path.join(self.path, f"chunk_{index:05d}.npy")
+
+    def _write_header(self):
+        """(Re)write the .npy header with the current number of rows."""
+        self._file.seek(0)
+        np.lib.format.write_array_header_1_0(self._file, {
+            "descr": self.dtype.str,
+            "fortran_order": False,
+            "shape": (self._chunk_count, len(self.columns)),
+        })
+        if self._file.tell() != self._header_size:
+            # NumPy pads the header so that the row count can grow in
+            # place; this should never happen
+            raise RuntimeError("npy header changed size")
+        self._file.seek(0, os.SEEK_END)
+
+    def _open_chunk(self):
+        self._chunk_index += 1
+        self._chunk_count = 0
+        self._file = open(self._chunk_path(self._chunk_index), "w+b")
+        np.lib.format.write_array_header_1_0(self._file, {
+            "descr": self.dtype.str,
+            "fortran_order": False,
+            "shape": (0, len(self.columns)),
+        })
+        self._header_size = self._file.tell()
+
+    def _close_chunk(self):
+        self._write_header()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def _write_metadata(self):
+        """Replace metadata.json atomically (never half-written)."""
+        self.metadata["num_rows"] = self.num_rows
+        self.metadata["updated"] = datetime.now().isoformat(timespec="seconds")
+        tmp_path = os.path.join(self.path, METADATA_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.metadata, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, METADATA_FILE))
+        _fsync_directory(self.path)
+
+    def append(self, rows):
+        """
+        Add rows of data.
+
+        Parameters:
+            rows: One row (1D, one value per column) or a 2D array with
+                one row per measurement
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        if rows.ndim == 1:
+            rows = rows[np.newaxis, :]
+        if rows.shape[1] != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns, "
+                             f"got {rows.shape[1]}")
+
+        while len(rows):
+            space = self.chunk_rows - self._chunk_count
+            if space == 0:
+                self._close_chunk()
+                self._open_chunk()
+                space = self.chunk_rows
+            part, rows = rows[:space], rows[space:]
+            self._file.write(np.ascontiguousarray(part).tobytes())
+            self._chunk_count += len(part)
+            self.num_rows += len(part)
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write everything appended so far to disk."""
+        self._write_header()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._write_metadata()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush, close the last chunk and mark the scan complete."""
+        if self._file is None:
+            return
+        self._close_chunk()
+        self.metadata["complete"] = True
+        self._write_metadata()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def read_metadata(path):
+    """Return the metadata dict of a scan directory."""
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def iter_chunks(path, mmap=True):
+    """
+    Yield the data of a scan directory one chunk at a time.
+
+    With mmap=True the chunks are memory-mapped, so even very large
+    recordings can be processed without loading them into memory.
+    """
+    metadata = read_metadata(path)
+    remaining = metadata["num_rows"]
+    index = 0
+    while remaining > 0:
+        chunk = np.load(os.path.join(path, f"chunk_{index:05d}.npy"),
+                        mmap_mode="r" if mmap else None)
+        # A chunk may hold rows written after the last metadata update
+        chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        index += 1
+        yield chunk
+
+
+def load_scan(path):
+    """
+    Load a whole scan directory.
+
+    Returns:
+        data: 2D array, one row per measurement, one column per quantity
+        metadata: dict with 'columns', 'settings', 'num_rows', ...
+    """
+    metadata = read_metadata(path)
+    chunks = list(iter_chunks(path, mmap=False))
+    if chunks:
+        data = np.concatenate(chunks)
+    else:
+        data = np.zeros((0, len(metadata["columns"])))
+    return data, metadata
+
+
+def csv_format(column):
+    """Number format for a column, chosen by its unit (CSV_FORMATS)."""
+    for unit, fmt in CSV_FORMATS.items():
+        if column.endswith(unit):
+            return fmt
+    return DEFAULT_CSV_FORMAT
+
+
+def export_csv(path, csv_file=None, columns=None, fmt=None):
+    """
+    Convert a scan directory to a CSV file with a header row.
+
+    Parameters:
+        path: Scan directory
+        csv_file: Output file (default: same name with .csv)
+        columns: Names or indices of the columns to export (default: all)
+        fmt: Number format, or a list with one format per exported
+            column (default: chosen by the unit of each column, see
+            csv_format)
+
+    Returns:
+        Name of the CSV file
+    """
+    metadata = read_metadata(path)
+    if csv_file is None:
+        csv_file = os.path.splitext(os.path.normpath(path))[0] + ".csv"
+
+    names = metadata["columns"]
+    if columns is None:
+        indices = list(range(len(names)))
+    else:
+        indices = [names.index(c) if isinstance(c, str) else c
+                   for c in columns]
+    if fmt is None:
+        fmt = [csv_format(names[i]) for i in indices]
+
+    with open(csv_file, "w", newline="") as f:
+        f.write(",".join(names[i] for i in indices) + "\n")
+        for chunk in iter_chunks(path):
+            # Format in blocks to keep memory use small
+            for start in range(0, len(chunk), 100_000):
+                np.savetxt(f, chunk[start:start + 100_000, indices],
+                           fmt=fmt, delimiter=",")
+
+    return csv_file
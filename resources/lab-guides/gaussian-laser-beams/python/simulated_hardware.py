@@ -0,0 +1,670 @@
+"""
+Simulated Hardware - Stand-ins for the Kinesis and NI-DAQmx Interfaces
+=====================================================================
+
+This module imitates the parts of the Thorlabs Kinesis (.NET) and
+NI-DAQmx (Python) interfaces used by the lab scripts, so the scripts can
+run, be tested and be timed on a computer with no instruments attached
+(for example a Linux laptop).
+
+The simulation includes:
+- A KST101/ZST225 stepper stage that moves with a trapezoidal velocity
+  profile (limited velocity and acceleration), blocks in MoveTo/Home
+  like the real controller (or reports the end of the move through a
+  callback), and reports its position and status only at polling
+  intervals.
+- A USB-6009 DAQ: setting up a task and single-point reads take time,
+  hardware-timed reads return samples at the exact sample-clock times
+  (blocking until those samples "exist"), continuous tasks overflow if
+  they are not read fast enough, and values are quantized to 14 bits.
+- A shared optical bench: a Gaussian beam partly blocked by a knife edge
+  mounted on the stage, seen by a photodetector on ai0 with noise, slow
+  laser power drift and 60 Hz pickup.
+
+The scripts use the simulation when the environment variable
+PHYS4430_SIMULATE is set (to anything except 0):
+
+    PHYS4430_SIMULATE=1 python 04_beam_profiler.py
+
+Setting PHYS4430_SIMULATE_SPEED (e.g. to 10) makes the simulated
+hardware run that many times faster than real time. All simulated
+clocks (stage motion, polling, DAQ sample clock) run on now(), so code
+that measures or waits for the hardware must use now() and sleep() from
+this module instead of time.perf_counter() and time.sleep(), or its
+timings will be off by the speed factor. The lab scripts do this when
+PHYS4430_SIMULATE is set.
+
+The simulated beam can be changed before running a scan, e.g.:
+    import simulated_hardware
+    simulated_hardware.bench.width = 0.2
+"""
+
+import os
+import threading
+import time
+import types
+from decimal import Decimal
+from enum import Enum
+
+import numpy as np
+from scipy.special import erf
+
+# Simulated time runs this many times faster than real time
+SPEED = float(os.environ.get("PHYS4430_SIMULATE_SPEED", "1"))
+
+# NI USB-6009 timing (seconds) and limits
+TASK_COMMIT_TIME = 0.015     # Verify and reserve the device
+ON_DEMAND_READ_TIME = 0.001  # One software-timed conversion over USB
+MAX_SAMPLE_RATE = 48000.0    # Aggregate, all channels
+ADC_BITS = 14
+
+# KST101 + ZST225 defaults. The travel range is the one the scan code
+# allows (TRAVEL_LIMITS_MM in 04_beam_profiler.py).
+STAGE_TRAVEL = (-12.0, 12.0)  # mm
+HOMING_VELOCITY = 1.0        # mm/s
+
+
+def now():
+    """Current simulated time in seconds."""
+    return time.perf_counter() * SPEED
+
+
+def sleep(seconds):
+    """Wait for a simulated time interval."""
+    if seconds > 0:
+        time.sleep(seconds / SPEED)
+
+
+class SimulatedBench:
+    """
+    The simulated optical setup shared by the stage and the DAQ.
+
+    A Gaussian beam of width w (1/e^2 radius) centered at `center` is
+    cut by a knife edge on the stage. The detector voltage is
+        offset + amplitude * erf(sqrt(2) (x - center) / w)
+    (the model of beam_profile_function in 02_fitting_example.py), times
+    a slow laser power drift, plus 60 Hz pickup and white noise. With no
+    stage connected the knife edge is out of the beam.
+
+    Channels other than ai0 read only noise.
+    """
+
+    def __init__(self, center=2.5, width=0.4, amplitude=1.5, offset=1.5,
+                 noise=0.005, drift=0.01, drift_period=45.0, pickup=0.002,
+                 seed=None):
+        """
+        Parameters:
+            center: Beam center position on the stage (mm)
+            width: Beam width w (mm)
+            amplitude, offset: Knife-edge signal parameters (V)
+            noise: White noise standard deviation (V)
+            drift: Relative amplitude of the slow laser power drift
+            drift_period: Period of the drift (s)
+            pickup: Amplitude of the 60 Hz pickup (V)
+            seed: Random seed for the noise
+        """
+        self.center = center
+        self.width = width
+        self.amplitude = amplitude
+        self.offset = offset
+        self.noise = noise
+        self.drift = drift
+        self.drift_period = drift_period
+        self.pickup = pickup
+        self.stage = None
+        self._rng = np.random.default_rng(seed)
+        self._rng_lock = threading.Lock()
+
+    def knife_edge_position(self, times):
+        """Knife edge position (mm) at the given simulated times."""
+        if self.stage is None:
+            return np.full(len(times), np.inf)
+        return self.stage.position_at(times)
+
+    def voltage(self, channel, times):
+        """Voltage on a DAQ channel ("ai0", ...) at the given times."""
+        times = np.asarray(times, dtype=float)
+        with self._rng_lock:
+            noise = self.noise * self._rng.standard_normal(len(times))
+        if channel != "ai0":
+            return noise
+
+        x = self.knife_edge_position(times)
+        signal = self.offset + self.amplitude * erf(
+            np.sqrt(2) * (x - self.center) / self.width
+        )
+        signal = signal * (1 + self.drift * np.sin(
+            2 * np.pi * times / self.drift_period
+        ))
+        signal += self.pickup * np.sin(2 * np.pi * 60 * times)
+        return signal + noise
+
+
+# The bench used by all simulated instruments
+bench = SimulatedBench()
+
+
+# ---------------------------------------------------------------------
+# Thorlabs Kinesis
+# ---------------------------------------------------------------------
+
+class _Move:
+    """A point-to-point move with a trapezoidal velocity profile."""
+
+    def __init__(self, start, target, start_time, velocity, acceleration):
+        self.start = start
+        self.target = target
+        self.start_time = start_time
+        distance = abs(target - start)
+        self.direction = np.sign(target - start)
+
+        # Accelerate, cruise, decelerate; short moves never reach full
+        # velocity and have a triangular profile instead
+        self.ramp_time = min(velocity / acceleration,
+                             np.sqrt(distance / acceleration))
+        self.peak_velocity = acceleration * self.ramp_time
+        ramp_distance = 0.5 * acceleration * self.ramp_time ** 2
+        cruise_time = ((distance - 2 * ramp_distance) / velocity
+                       if velocity > 0 else 0.0)
+        self.acceleration = acceleration
+        self.cruise_time = max(cruise_time, 0.0)
+        self.duration = 2 * self.ramp_time + self.cruise_time
+        self.end_time = start_time + self.duration
+
+    def position(self, times):
+        """Position (mm) at the given times (array)."""
+        t = np.clip(np.asarray(times, dtype=float) - self.start_time,
+                    0, self.duration)
+        a = self.acceleration
+        ramp = self.ramp_time
+        ramp_distance = 0.5 * a * ramp ** 2
+
+        accelerating = 0.5 * a * t ** 2
+        cruising = ramp_distance + self.peak_velocity * (t - ramp)
+        t_left = self.duration - t
+        decelerating = (2 * ramp_distance + self.peak_velocity
+                        * self.cruise_time - 0.5 * a * t_left ** 2)
+        travelled = np.where(t < ramp, accelerating,
+                             np.where(t < ramp + self.cruise_time,
+                                      cruising, decelerating))
+        return self.start + self.direction * travelled
+
+
+class _VelocityParameters:
+    """Kinesis VelocityParameters (mm/s, mm/s^2)."""
+
+    def __init__(self, max_velocity, acceleration):
+        self.MinVelocity = Decimal(0)
+        self.MaxVelocity = Decimal(max_velocity)
+        self.Acceleration = Decimal(acceleration)
+
+
+class SimulatedKCubeStepper:
+    """
+    Simulated KST101 controller with a ZST225 stage.
+
+    Implements the KCubeStepper methods used by the lab scripts. MoveTo
+    and Home block until the move is complete when given a timeout in
+    milliseconds, and return immediately when the timeout is 0 (the
+    move then continues in the background, as with the real device).
+    Given a callback instead of a timeout, they return immediately and
+    call callback(task_id) from another thread when the move ends.
+    """
+
+    def __init__(self, serial_number):
+        self.serial_number = str(serial_number)
+        self._velocity = _VelocityParameters(2.0, 2.0)
+        self._position = 0.0
+        self._move = None
+        self._homing = False
+        self._polling_interval = None
+        self._polling_start = 0.0
+        self._enabled = False
+        self._task_id = 0
+        self._lock = threading.RLock()
+
+    # Connection -------------------------------------------------------
+
+    def Connect(self, serial_number):
+        sleep(0.1)
+        bench.stage = self
+
+    def Disconnect(self, *args):
+        self.StopPolling()
+        if bench.stage is self:
+            bench.stage = None
+
+    def IsSettingsInitialized(self):
+        return True
+
+    def WaitForSettingsInitialized(self, timeout_ms):
+        return True
+
+    def StartPolling(self, interval_ms):
+        self._polling_interval = interval_ms / 1000
+        self._polling_start = now()
+
+    def StopPolling(self):
+        self._polling_interval = None
+
+    def EnableDevice(self):
+        self._enabled = True
+
+    def DisableDevice(self):
+        self._enabled = False
+
+    def LoadMotorConfiguration(self, serial_number, option=None):
+        return types.SimpleNamespace(
+            DeviceSettingsName="ZST225 (simulated)",
+            Description="Simulated ZST225 stepper actuator"
+        )
+
+    def GetDeviceInfo(self):
+        return types.SimpleNamespace(
+            Description="Simulated KST101 Stepper Controller",
+            SerialNumber=self.serial_number
+        )
+
+    def GetVelocityParams(self):
+        return _VelocityParameters(float(self._velocity.MaxVelocity),
+                                   float(self._velocity.Acceleration))
+
+    def SetVelocityParams(self, params):
+        self._velocity = _VelocityParameters(float(params.MaxVelocity),
+                                             float(params.Acceleration))
+
+    # Motion -----------------------------------------------------------
+
+    def position_at(self, times):
+        """True stage position (mm) at the given simulated times."""
+        with self._lock:
+            move = self._move
+            position = self._position
+        if move is None:
+            return np.full(len(times), position)
+        return move.position(times)
+
+    def _polled_time(self):
+        """Time of the controller's most recent status update."""
+        t = now()
+        if self._polling_interval:
+            elapsed = t - self._polling_start
+            t -= elapsed % self._polling_interval
+        return t
+
+    def _start_move(self, target, velocity, acceleration, homing=False):
+        if not self._enabled:
+            raise RuntimeError("Device is not enabled")
+        low, high = STAGE_TRAVEL
+        if not homing and not low <= target <= high:
+            raise ValueError(
+                f"Position {target:.4f} mm is outside the travel range "
+                f"{low}-{high} mm"
+            )
+        t = now()
+        with self._lock:
+            start = float(self.position_at([t])[0])
+            self._move = _Move(start, target, t, velocity, acceleration)
+            self._homing = homing
+            return self._move
+
+    def _wait(self, move, timeout_ms):
+        if callable(timeout_ms):
+            # Completion message from the controller
+            callback = timeout_ms
+            with self._lock:
+                self._task_id += 1
+                task_id = self._task_id
+            timer = threading.Timer(max(move.end_time - now(), 0) / SPEED,
+                                    callback, args=(task_id,))
+            timer.daemon = True
+            timer.start()
+            return
+        if timeout_ms == 0:
+            return
+        remaining = move.end_time - now()
+        if remaining > timeout_ms / 1000:
+            sleep(timeout_ms / 1000)
+            raise TimeoutError("Move did not complete within the timeout")
+        sleep(remaining)
+
+    def _update(self):
+        """Finish a move whose end time has passed."""
+        with self._lock:
+            if self._move is not None and now() >= self._move.end_time:
+                self._position = self._move.target
+                self._move = None
+                self._homing = False
+
+    def MoveTo(self, position, timeout_ms):
+        """timeout_ms may also be a completion callback (see class docs)."""
+        move = self._start_move(float(position),
+                                float(self._velocity.MaxVelocity),
+                                float(self._velocity.Acceleration))
+        self._wait(move, timeout_ms)
+
+    def Home(self, timeout_ms):
+        move = self._start_move(0.0, HOMING_VELOCITY,
+                                float(self._velocity.Acceleration),
+                                homing=True)
+        self._wait(move, timeout_ms)
+
+    def Stop(self, timeout_ms=0):
+        self.StopImmediate()
+
+    def StopImmediate(self):
+        t = now()
+        with self._lock:
+            if self._move is not None:
+                self._position = float(self._move.position([t])[0])
+                self._move = None
+                self._homing = False
+
+    @property
+    def Position(self):
+        self._update()
+        t = self._polled_time()
+        return Decimal(f"{self.position_at([t])[0]:.6f}")
+
+    @property
+    def Status(self):
+        self._update()
+        t = self._polled_time()
+        with self._lock:
+            moving = self._move is not None and t < self._move.end_time
+            homing = moving and self._homing
+        return types.SimpleNamespace(IsMoving=moving, IsHoming=homing)
+
+
+class _GenericDelegate:
+    """
+    Stand-in for .NET generic delegate types such as Action[UInt64].
+
+    With pythonnet, Action[UInt64](function) wraps a Python function so
+    it can be passed to .NET; here the function is used directly.
+    """
+
+    def __getitem__(self, types):
+        return lambda function: function
+
+
+Action = _GenericDelegate()
+UInt64 = int
+
+
+class DeviceManagerCLI:
+    """Simulated Kinesis device manager: every serial number is present."""
+
+    @staticmethod
+    def BuildDeviceList():
+        pass
+
+    @staticmethod
+    def IsDeviceConnected(serial_number):
+        return True
+
+
+class DeviceConfiguration:
+    class DeviceSettingsUseOptionType:
+        UseDeviceSettings = 0
+        UseFileSettings = 1
+        UseConfiguredSettings = 2
+
+
+class MotorDirection:
+    Forward = 1
+    Backward = 2
+
+
+class KCubeStepper:
+    @staticmethod
+    def CreateKCubeStepper(serial_number):
+        return SimulatedKCubeStepper(serial_number)
+
+
+# ---------------------------------------------------------------------
+# NI-DAQmx
+# ---------------------------------------------------------------------
+
+class AcquisitionType(Enum):
+    FINITE = 10178
+    CONTINUOUS = 10123
+
+
+class TaskMode(Enum):
+    TASK_START = 0
+    TASK_STOP = 1
+    TASK_VERIFY = 2
+    TASK_COMMIT = 3
+    TASK_RESERVE = 4
+    TASK_UNRESERVE = 5
+    TASK_ABORT = 6
+
+
+READ_ALL_AVAILABLE = -1
+
+
+class DaqError(Exception):
+    """Error reported by the (simulated) DAQmx driver."""
+
+    def __init__(self, message, error_code):
+        super().__init__(f"{message}\nStatus Code: {error_code}")
+        self.error_code = error_code
+
+
+class DaqReadError(DaqError):
+    pass
+
+
+class _AIChannels:
+    def __init__(self, task):
+        self._task = task
+
+    def add_ai_voltage_chan(self, physical_channel, name_to_assign_to_channel="",
+                            terminal_config=None, min_val=-10.0, max_val=10.0,
+                            **kwargs):
+        for name in physical_channel.split(","):
+            device, _, channel = name.strip().partition("/")
+            self._task._channels.append((device, channel, min_val, max_val))
+
+
+class _Timing:
+    def __init__(self, task):
+        self._task = task
+
+    def cfg_samp_clk_timing(self, rate, source="", active_edge=None,
+                            sample_mode=AcquisitionType.FINITE,
+                            samps_per_chan=1000):
+        if rate * max(1, len(self._task._channels)) > MAX_SAMPLE_RATE:
+            raise DaqError("Requested sample rate exceeds the maximum "
+                           "sample rate of the device.", -200332)
+        task = self._task
+        task._rate = float(rate)
+        task._sample_mode = sample_mode
+        task._samps_per_chan = int(samps_per_chan)
+
+
+class SimulatedTask:
+    """
+    Simulated nidaqmx.Task for analog input on a USB-6009.
+
+    Without sample clock timing, read() performs software-timed
+    (on-demand) reads. With cfg_samp_clk_timing, samples are taken at
+    exact sample-clock times after start(), and read() waits until the
+    requested samples have been acquired.
+    """
+
+    def __init__(self, new_task_name=""):
+        self.name = new_task_name
+        self._channels = []
+        self._rate = None
+        self._sample_mode = None
+        self._samps_per_chan = None
+        self._committed = False
+        self._running = False
+        self._start_time = None
+        self._samples_read = 0
+        self.ai_channels = _AIChannels(self)
+        self.timing = _Timing(self)
+        self.in_stream = types.SimpleNamespace(task=self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def control(self, action):
+        if action == TaskMode.TASK_COMMIT and not self._committed:
+            sleep(TASK_COMMIT_TIME)
+            self._committed = True
+        elif action == TaskMode.TASK_UNRESERVE:
+            self._committed = False
+
+    def start(self):
+        if not self._committed:
+            sleep(TASK_COMMIT_TIME)
+        self._running = True
+        self._start_time = now()
+        self._samples_read = 0
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        self._running = False
+        self._channels = []
+
+    def _values(self, times):
+        """Bench voltages for all channels, clipped and quantized."""
+        values = []
+        for device, channel, low, high in self._channels:
+            v = bench.voltage(channel, times)
+            lsb = (high - low) / 2 ** ADC_BITS
+            values.append(np.clip(np.round((v - low) / lsb) * lsb + low,
+                                  low, high))
+        return np.array(values)
+
+    def _read_array(self, num_samples, timeout):
+        """Read samples as a (channels, samples) array."""
+        if self._rate is None:
+            # Software-timed read: one conversion per call. An
+            # uncommitted task is set up and released every time.
+            if not self._committed:
+                sleep(TASK_COMMIT_TIME)
+            sleep(ON_DEMAND_READ_TIME)
+            n = 1 if num_samples == READ_ALL_AVAILABLE else num_samples
+            return self._values(np.full(n, now()))
+
+        auto_started = not self._running
+        if auto_started:
+            self.start()
+
+        t = now()
+        acquired = int((t - self._start_time) * self._rate)
+        if self._sample_mode == AcquisitionType.FINITE:
+            acquired = min(acquired, self._samps_per_chan)
+            if num_samples == READ_ALL_AVAILABLE:
+                num_samples = self._samps_per_chan - self._samples_read
+        elif num_samples == READ_ALL_AVAILABLE:
+            num_samples = acquired - self._samples_read
+        elif acquired - self._samples_read > self._samps_per_chan:
+            self._running = False
+            raise DaqReadError(
+                "The application is not able to keep up with the "
+                "hardware acquisition. Increasing the buffer size, reading "
+                "the data more frequently, or specifying a fixed number of "
+                "samples to read instead of reading all available samples "
+                "might correct the problem.", -200279
+            )
+
+        end = self._samples_read + num_samples
+        if (self._sample_mode == AcquisitionType.FINITE
+                and end > self._samps_per_chan):
+            raise DaqReadError("Attempted to read samples beyond the final "
+                               "sample acquired.", -200278)
+
+        # Wait until the last requested sample has been taken
+        wait = self._start_time + end / self._rate - t
+        if wait > timeout:
+            sleep(timeout)
+            raise DaqReadError("Some or all of the samples requested have "
+                               "not yet been acquired.", -200284)
+        sleep(wait)
+
+        times = self._start_time + np.arange(self._samples_read, end) / self._rate
+        self._samples_read = end
+        if auto_started and self._sample_mode == AcquisitionType.FINITE \
+                and end == self._samps_per_chan:
+            self._running = False
+        return self._values(times)
+
+    def read(self, number_of_samples_per_channel=None, timeout=10.0):
+        # Without a sample count, one sample per channel is read
+        values = self._read_array(number_of_samples_per_channel or 1, timeout)
+        if number_of_samples_per_channel is None:
+            values = values[:, 0]
+            return float(values[0]) if len(values) == 1 else values.tolist()
+        if len(values) == 1:
+            return values[0].tolist()
+        return values.tolist()
+
+
+class AnalogSingleChannelReader:
+    def __init__(self, task_in_stream):
+        self._task = task_in_stream.task
+
+    def read_many_sample(self, data, number_of_samples_per_channel=READ_ALL_AVAILABLE,
+                         timeout=10.0):
+        values = self._task._read_array(number_of_samples_per_channel, timeout)
+        data[:values.shape[1]] = values[0]
+        return values.shape[1]
+
+    def read_one_sample(self, timeout=10.0):
+        return float(self._task._read_array(1, timeout)[0, 0])
+
+
+class AnalogMultiChannelReader:
+    def __init__(self, task_in_stream):
+        self._task = task_in_stream.task
+
+    def read_many_sample(self, data, number_of_samples_per_channel=READ_ALL_AVAILABLE,
+                         timeout=10.0):
+        values = self._task._read_array(number_of_samples_per_channel, timeout)
+        data[:, :values.shape[1]] = values
+        return values.shape[1]
+
+
+class SimulatedSystem:
+    """Simulated nidaqmx.system.System with one USB-6009."""
+
+    def __init__(self):
+        self.devices = [types.SimpleNamespace(
+            name="Dev1", product_type="USB-6009 (simulated)", serial_num=0
+        )]
+        self.driver_version = types.SimpleNamespace(
+            major_version=0, minor_version=0, update_version=0
+        )
+
+    @staticmethod
+    def local():
+        return SimulatedSystem()
+
+
+# Drop-in replacement for the nidaqmx package:
+#     from simulated_hardware import nidaqmx
+nidaqmx = types.SimpleNamespace(
+    Task=SimulatedTask,
+    constants=types.SimpleNamespace(
+        AcquisitionType=AcquisitionType,
+        TaskMode=TaskMode,
+        READ_ALL_AVAILABLE=READ_ALL_AVAILABLE,
+    ),
+    stream_readers=types.SimpleNamespace(
+        AnalogSingleChannelReader=AnalogSingleChannelReader,
+        AnalogMultiChannelReader=AnalogMultiChannelReader,
+    ),
+    system=types.SimpleNamespace(System=SimulatedSystem),
+    errors=types.SimpleNamespace(DaqError=DaqError,
+                                 DaqReadError=DaqReadError),
+)
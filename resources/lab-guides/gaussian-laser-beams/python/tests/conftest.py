@@ -0,0 +1,21 @@
+"""
+Shared setup for the tests of the lab scripts.
+
+Run from the python/ directory with:
+    python -m pytest tests
+
+The tests use the simulated instruments (simulated_hardware.py), so no
+DAQ or stage needs to be connected.
+"""
+
+import os
+import sys
+
+# Make the lab scripts (in python/ and the lab guide directory above it)
+# importable, and select the simulated hardware before any script
+# imports nidaqmx or Kinesis
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(PYTHON_DIR))
+sys.path.insert(0, PYTHON_DIR)
+os.environ.setdefault("PHYS4430_SIMULATE", "1")
+os.environ.setdefault("MPLBACKEND", "Agg")
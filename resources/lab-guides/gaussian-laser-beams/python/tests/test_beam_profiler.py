@@ -0,0 +1,360 @@
+"""Tests for 04_beam_profiler.py (functions that do not need hardware)."""
+
+import importlib
+
+import numpy as np
+import pytest
+
+beam_profiler = importlib.import_module("04_beam_profiler")
+fitting = beam_profiler.fitting
+
+POPT = np.array([1.5, 2.5, 0.4, 1.5])
+
+
+@pytest.fixture
+def coarse_scan():
+    """A noisy 15-point uniform scan across the edge."""
+    rng = np.random.default_rng(1)
+    x = np.linspace(0.0, 5.0, 15)
+    y = fitting.beam_profile_function(x, *POPT) + 0.01 * rng.standard_normal(15)
+    return x, y
+
+
+def test_scan_positions_are_on_the_edge(coarse_scan):
+    x, _ = coarse_scan
+    candidates = np.linspace(0.0, 5.0, 501)
+    positions, _ = beam_profiler.choose_scan_positions(
+        x, POPT, 0.01, candidates, num_points=5
+    )
+    assert len(positions) == 5
+    assert np.all(np.abs(positions - POPT[1]) < 2 * POPT[2])
+
+
+def test_scan_positions_predicted_covariance(coarse_scan):
+    x, _ = coarse_scan
+    candidates = np.linspace(0.0, 5.0, 501)
+    positions, predicted = beam_profiler.choose_scan_positions(
+        x, POPT, 0.01, candidates, num_points=3
+    )
+
+    # The Sherman-Morrison updates must agree with inverting the Fisher
+    # information of all points directly
+    J = fitting.beam_profile_jacobian(np.r_[x, positions], *POPT)
+    expected = np.linalg.inv(J.T @ J / 0.01 ** 2)
+    np.testing.assert_allclose(predicted, expected, rtol=1e-6)
+
+    _, current = beam_profiler.choose_scan_positions(x, POPT, 0.01,
+                                                     candidates, 0)
+    assert predicted[1, 1] < current[1, 1]
+    assert predicted[2, 2] < current[2, 2]
+
+
+def test_plan_adaptive_batch(coarse_scan):
+    x, y = coarse_scan
+    profiler = beam_profiler.BeamProfiler("26000001")
+    profiler.positions = list(x)
+    profiler.voltages = list(y)
+    candidates = np.linspace(0.0, 5.0, 501)
+
+    planned, popt, perr = profiler._plan_adaptive_batch(candidates, 5, False)
+
+    np.testing.assert_allclose(popt, POPT, atol=0.05)
+    assert np.all(np.isfinite(perr))
+    assert np.all(np.diff(planned) >= 0)
+    assert np.all((planned >= 0.0) & (planned <= 5.0))
+
+
+def test_plan_adaptive_batch_without_fit(coarse_scan, monkeypatch):
+    x, y = coarse_scan
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("no fit")
+
+    monkeypatch.setattr(fitting, "fit_beam_profile", fail)
+    profiler = beam_profiler.BeamProfiler("26000001")
+    profiler.positions = list(x)
+    profiler.voltages = list(y)
+
+    planned, popt, perr = profiler._plan_adaptive_batch(x, 2, False)
+
+    # Halfway across the two steepest steps, which straddle the center
+    assert popt is None
+    assert np.all(np.isinf(perr))
+    assert len(planned) == 2
+    assert np.all(np.abs(planned - POPT[1]) < x[1] - x[0])
+
+
+def test_check_scan_range():
+    low, high = beam_profiler.TRAVEL_LIMITS_MM
+    beam_profiler.check_scan_range(low, high)
+    with pytest.raises(ValueError):
+        beam_profiler.check_scan_range(0.0, high + 1)
+    with pytest.raises(ValueError):
+        beam_profiler.check_scan_range(low - 1, 0.0)
+
+
+def test_interpolate_positions():
+    # Polled every 10 ms; the controller updates its position every 30 ms
+    # while the stage moves at 1 mm/s starting at t = 0.05 s
+    poll_times = np.arange(0.0, 0.5, 0.01)
+    update_times = np.floor(poll_times / 0.03) * 0.03
+    poll_positions = np.clip(update_times - 0.05, 0.0, 0.3)
+    sample_times = np.arange(0.0, 0.5, 0.001)
+
+    positions, keep = beam_profiler.interpolate_positions(
+        poll_times, poll_positions, sample_times
+    )
+
+    # Only samples between the first and last reported change are kept
+    kept = sample_times[keep]
+    assert kept[0] >= 0.06 - 1e-9
+    assert kept[-1] <= 0.36 + 1e-9
+    assert len(positions) == keep.sum()
+    assert np.all(np.diff(positions) >= 0)
+    # Each new value is first seen at most one poll after it was measured
+    np.testing.assert_allclose(positions, kept - 0.05, atol=0.011)
+
+
+def test_interpolate_positions_without_motion():
+    with pytest.raises(RuntimeError):
+        beam_profiler.interpolate_positions([0.0, 0.1, 0.2], [1.0, 1.0, 1.0],
+                                            [0.05, 0.15])
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    """A connected profiler on the simulated bench, 50x real time."""
+    import simulated_hardware
+    monkeypatch.setattr(simulated_hardware, "SPEED", 50.0)
+    monkeypatch.setattr(beam_profiler.plt, "show", lambda *args, **kwargs: None)
+    monkeypatch.chdir(tmp_path)
+    profiler = beam_profiler.BeamProfiler("26000001")
+    profiler.connect()
+    yield profiler
+    profiler.disconnect()
+
+
+def test_fly_scan_finds_the_beam(profiler):
+    velocity = float(profiler.device.GetVelocityParams().MaxVelocity)
+    positions, voltages = profiler.run_fly_scan(1.5, 3.5, velocity_mm_s=0.5,
+                                                poll_interval_ms=20)
+    popt, _, _ = fitting.fit_beam_profile(positions, voltages, verbose=False)
+    assert popt[1] == pytest.approx(2.5, abs=0.02)
+    assert popt[2] == pytest.approx(0.4, abs=0.02)
+    # The stage velocity is restored after the scan
+    assert float(profiler.device.GetVelocityParams().MaxVelocity) == velocity
+
+
+def test_fly_scan_outside_travel_does_not_move(profiler):
+    before = profiler.get_position()
+    with pytest.raises(ValueError):
+        profiler.run_fly_scan(0.0, beam_profiler.TRAVEL_LIMITS_MM[1] + 1)
+    assert profiler.get_position() == before
+
+
+@pytest.mark.parametrize("storage", ["csv", "binary"])
+def test_step_scan_saves_every_point(profiler, tmp_path, storage):
+    positions, voltages = profiler.run_scan(step_size_mm=0.25,
+                                            wait_time_ms=10, max_steps=20,
+                                            storage=storage)
+    assert len(positions) == 20
+
+    saved, = [path for path in tmp_path.iterdir()
+              if path.suffix in ('.csv', '.scan')]
+    if storage == 'binary':
+        from scan_storage import load_scan
+        data, _ = load_scan(saved)
+    else:
+        data = np.loadtxt(saved, delimiter=',', skiprows=1)
+    np.testing.assert_allclose(data[:, 0], positions)
+    np.testing.assert_allclose(data[:, 1], voltages)
+
+
+@pytest.mark.parametrize("use_callbacks", [True, False])
+def test_async_move_timeout_leaves_no_thread_errors(profiler, monkeypatch,
+                                                    use_callbacks):
+    import asyncio
+    import threading
+
+    errors = []
+    monkeypatch.setattr(threading, "excepthook",
+                        lambda args: errors.append(args.exc_value))
+    profiler.use_callbacks = use_callbacks
+    profiler.set_polling(20)
+
+    async def move():
+        stage = beam_profiler.AsyncBeamProfiler(profiler)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                # Far too short for a 4 mm move
+                await stage.move_to(4.0, timeout_ms=10)
+        finally:
+            await stage.close()
+
+    asyncio.run(move())
+    # Let the stage finish the move and report it
+    beam_profiler.sleep(10.0)
+    assert errors == []
+    assert profiler.get_position() == pytest.approx(4.0)
+
+
+@pytest.mark.parametrize("use_callbacks", [True, False])
+def test_move_reports_latency(profiler, use_callbacks):
+    profiler.use_callbacks = use_callbacks
+    profiler.set_polling(50)
+    result = profiler.move_to(2.0)
+
+    assert result['method'] == ('callback' if use_callbacks else 'polling')
+    assert result['target'] == 2.0
+    assert result['expected'] == pytest.approx(3.0)
+    # Polling finds the end of the move within one polling interval
+    assert 0 <= result['latency'] < 0.1
+    assert profiler.get_position() == pytest.approx(2.0)
+    assert profiler.move_history == [result]
+
+
+def test_home_by_polling_waits_for_homing(profiler):
+    profiler.use_callbacks = False
+    profiler.set_polling(50)
+    profiler.move_to(2.0)
+
+    result = profiler.start_home().result(timeout=10)
+
+    assert result['target'] is None
+    # 2 mm at the simulated homing velocity of 1 mm/s
+    assert result['elapsed'] >= 2.0
+    assert not profiler.device.Status.IsHoming
+    assert profiler.get_position() == pytest.approx(0.0)
+
+
+def test_disconnect_stops_monitor_thread(profiler):
+    profiler.use_callbacks = False
+    profiler.move_to(0.5)
+    monitor = profiler._monitor
+
+    profiler.disconnect()
+
+    assert profiler._monitor is None
+    with pytest.raises(RuntimeError):
+        monitor.submit(print)
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    """Record every DAQ task created, with its commits and closes."""
+    import simulated_hardware
+    created = []
+
+    class RecordingTask(simulated_hardware.SimulatedTask):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.commits = 0
+            self.closed = False
+            created.append(self)
+
+        def control(self, action):
+            if action == simulated_hardware.TaskMode.TASK_COMMIT:
+                self.commits += 1
+            super().control(action)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    monkeypatch.setattr(beam_profiler.nidaqmx, "Task", RecordingTask)
+    return created
+
+
+def test_daq_session_commits_once_and_reuses_task(profiler, tasks):
+    with profiler.daq_session(num_samples=50, sample_rate=1000.0) as session:
+        bursts = [profiler.read_samples(50, 1000.0) for _ in range(3)]
+        # Nested sessions share the outer task
+        with profiler.daq_session(num_samples=50) as inner:
+            assert inner is session
+        assert len(tasks) == 1
+        assert session.task is tasks[0]
+
+    assert [len(burst) for burst in bursts] == [50, 50, 50]
+    assert tasks[0].commits == 1
+    assert tasks[0].closed
+    assert profiler.session is None
+
+
+def test_read_samples_of_other_length_uses_own_task(profiler, tasks):
+    with profiler.daq_session(num_samples=50, sample_rate=1000.0) as session:
+        burst = profiler.read_samples(20, 1000.0)
+        assert len(burst) == 20
+        # A one-off task, released at once; the session's task stays open
+        assert len(tasks) == 2
+        assert tasks[1].closed
+        assert session.task is tasks[0]
+        assert not tasks[0].closed
+        assert len(profiler.read_samples(50, 1000.0)) == 50
+    assert len(tasks) == 2
+
+
+def test_summarize_samples_standard_errors():
+    from scipy import stats
+
+    rng = np.random.default_rng(7)
+    samples = 2.0 + 0.1 * rng.standard_normal(101)
+    mean_error = np.std(samples, ddof=1) / np.sqrt(101)
+
+    value, error = beam_profiler.summarize_samples(samples, 'mean')
+    assert value == pytest.approx(np.mean(samples))
+    assert error == pytest.approx(mean_error)
+
+    value, error = beam_profiler.summarize_samples(samples, 'median')
+    assert value == pytest.approx(np.median(samples))
+    assert error == pytest.approx(np.sqrt(np.pi / 2) * mean_error)
+
+    value, error = beam_profiler.summarize_samples(samples, 'trimmed', 0.1)
+    assert value == pytest.approx(stats.trim_mean(samples, 0.1))
+    assert error == pytest.approx(
+        stats.mstats.trimmed_stde(samples, limits=(0.1, 0.1)))
+
+    with pytest.raises(ValueError):
+        beam_profiler.summarize_samples(samples, 'mode')
+
+
+@pytest.mark.parametrize("estimator", ['mean', 'median', 'trimmed'])
+def test_summarize_samples_error_matches_scatter(estimator):
+    # The quoted error agrees with the scatter of repeated bursts
+    rng = np.random.default_rng(8)
+    bursts = 0.1 * rng.standard_normal((2000, 101))
+    results = np.array([beam_profiler.summarize_samples(burst, estimator)
+                        for burst in bursts])
+    assert np.mean(results[:, 1]) == pytest.approx(np.std(results[:, 0]),
+                                                   rel=0.1)
+
+
+@pytest.mark.parametrize("storage", ["csv", "binary"])
+def test_adaptive_scan_saves_every_point(profiler, tmp_path, storage):
+    positions, voltages, _, _ = profiler.run_adaptive_scan(
+        1.5, 3.5, target_precision=0.0, coarse_points=9, batch_size=3,
+        max_points=15, wait_time_ms=10, storage=storage
+    )
+    assert len(positions) == 15
+
+    saved, = [path for path in tmp_path.iterdir()
+              if path.suffix in ('.csv', '.scan')]
+    if storage == 'binary':
+        from scan_storage import load_scan
+        data, metadata = load_scan(saved)
+        assert metadata["complete"]
+    else:
+        data = np.loadtxt(saved, delimiter=',', skiprows=1)
+    np.testing.assert_allclose(data[:, 0], positions)
+    np.testing.assert_allclose(data[:, 1], voltages)
+
+
+@pytest.mark.parametrize("storage", ["csv", "binary"])
+def test_adaptive_scan_without_daq_creates_no_file(profiler, tmp_path,
+                                                   monkeypatch, storage):
+    def fail(session):
+        raise RuntimeError("DAQ not found")
+
+    monkeypatch.setattr(beam_profiler.DAQSession, "open", fail)
+    with pytest.raises(RuntimeError):
+        profiler.run_adaptive_scan(1.5, 3.5, storage=storage)
+    assert list(tmp_path.iterdir()) == []
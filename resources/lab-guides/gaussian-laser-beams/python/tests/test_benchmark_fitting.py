@@ -0,0 +1,16 @@
+"""Tests for benchmark_fitting.py."""
+
+import pytest
+
+import benchmark_fitting
+
+
+@pytest.mark.parametrize("variant", ["weighted", "unweighted"])
+def test_run_case_reports_iterations(variant):
+    case = benchmark_fitting.run_case(benchmark_fitting.VARIANTS[variant],
+                                      num_points=100, noise_level=0.02,
+                                      width_ratio=0.1, repeats=2, seed=0)
+    assert case['failures'] == 0
+    assert case['nfev_mean'] > 0
+    assert 0 < case['iterations_mean'] < case['nfev_mean']
+    assert abs(case['width_bias']) < 0.1
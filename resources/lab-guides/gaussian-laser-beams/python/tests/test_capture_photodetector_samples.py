@@ -0,0 +1,91 @@
+"""Tests for capture_photodetector_samples.py (lab guide directory)."""
+
+import numpy as np
+import pytest
+import scipy.signal
+
+import capture_photodetector_samples as capture
+
+
+@pytest.fixture
+def jittered():
+    """A 0.05 Hz oscillation sampled every ~0.1 s with timing jitter."""
+    rng = np.random.default_rng(0)
+    t = np.cumsum(rng.normal(0.1, 0.01, 3000))
+    y = 0.01 * np.sin(2 * np.pi * 0.05 * t) + 0.005 * rng.standard_normal(len(t))
+    return t, y
+
+
+def test_lomb_scargle_matches_scipy(jittered):
+    t, y = jittered
+    frequencies, power = capture.lomb_scargle(t, y)
+
+    expected = scipy.signal.lombscargle(t, y - y.mean(),
+                                        2 * np.pi * frequencies,
+                                        normalize=True)
+    np.testing.assert_allclose(power, expected, atol=1e-3)
+
+
+def test_lomb_scargle_finds_peak(jittered):
+    t, y = jittered
+    frequencies, power = capture.lomb_scargle(t, y)
+    assert frequencies[np.argmax(power)] == pytest.approx(0.05, abs=0.001)
+
+
+@pytest.mark.parametrize("output_format, name", [("csv", "run.csv"),
+                                                 ("binary", "run.scan")])
+def test_continuous_capture_streams_to_file(tmp_path, monkeypatch,
+                                            output_format, name):
+    import simulated_hardware
+    monkeypatch.setattr(simulated_hardware, "SPEED", 100.0)
+
+    output_file = tmp_path / name
+    stats = capture.capture_continuous("Dev1/ai0", 1000.0, 20.0, output_file,
+                                       block_duration=0.5,
+                                       output_format=output_format)
+    data = np.concatenate(list(capture.read_capture_blocks(
+        output_file, output_format, block_size=777)))
+
+    assert stats['num_samples'] == len(data) == 20000
+    # CSV values are rounded to 10 uV
+    tolerance = 1e-5 if output_format == "csv" else 1e-12
+    assert stats['mean'] == pytest.approx(np.mean(data), abs=tolerance)
+    assert stats['std'] == pytest.approx(np.std(data, ddof=1), abs=tolerance)
+    assert stats['min'] == pytest.approx(np.min(data), abs=tolerance)
+    np.testing.assert_allclose(stats['first'], data[:10], atol=tolerance)
+
+
+@pytest.mark.parametrize("mode", ["software", "csv", "binary"])
+def test_voltage_is_first_column(tmp_path, monkeypatch, mode):
+    import simulated_hardware
+    from scan_storage import load_scan
+    monkeypatch.setattr(simulated_hardware, "SPEED", 100.0)
+
+    if mode == "software":
+        output_file = tmp_path / "run.csv"
+        samples, timestamps = capture.capture_samples("Dev1/ai0", 5, 0.1)
+        capture.save_samples(output_file, samples, timestamps)
+    else:
+        output_file = tmp_path / ("run.scan" if mode == "binary" else "run.csv")
+        capture.capture_continuous("Dev1/ai0", 1000.0, 1.0, output_file,
+                                   output_format=mode)
+
+    if mode == "binary":
+        data, metadata = load_scan(output_file)
+        assert metadata["columns"] == ["Voltage (V)", "Time (s)"]
+    else:
+        with open(output_file) as f:
+            assert f.readline().strip() == "Voltage (V),Time (s)"
+        data = np.loadtxt(output_file, delimiter=",", skiprows=1)
+    # Times start at zero and increase
+    assert data[0, 1] == 0
+    assert np.all(np.diff(data[:, 1]) > 0)
+
+
+def test_plot_data_writes_no_files(tmp_path, monkeypatch, jittered):
+    t, y = jittered
+    monkeypatch.setattr(capture.plt, "show", lambda *args, **kwargs: None)
+    monkeypatch.chdir(tmp_path)
+    capture.plot_data(y[:200], 0.1, t[:200])
+    capture.plt.close('all')
+    assert list(tmp_path.iterdir()) == []
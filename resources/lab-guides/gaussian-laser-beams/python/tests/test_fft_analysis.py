@@ -0,0 +1,251 @@
+"""Tests for 03_fft_analysis.py."""
+
+import importlib
+
+import numpy as np
+import pytest
+import scipy.signal
+
+fft_analysis = importlib.import_module("03_fft_analysis")
+
+
+@pytest.fixture
+def record():
+    rng = np.random.default_rng(0)
+    t = np.arange(20000) / 1000.0
+    return np.sin(2 * np.pi * 50 * t) + 0.1 * rng.standard_normal(len(t))
+
+
+def scipy_spectrogram(data, window):
+    f, t, Sxx = scipy.signal.spectrogram(data, fs=1000.0, window=window,
+                                         nperseg=256, noverlap=128)
+    return t, f, Sxx.T
+
+
+@pytest.mark.parametrize("window", ['hann', ('tukey', 0.25)])
+def test_array_source_matches_scipy(record, tmp_path, window):
+    times, frequencies, image = fft_analysis.streaming_spectrogram(
+        record, 1000.0, tmp_path / "image.npy", segment_length=256,
+        window=window, pixels_per_block=7
+    )
+    t, f, expected = scipy_spectrogram(record, window)
+    np.testing.assert_allclose(times, t)
+    np.testing.assert_allclose(frequencies, f)
+    np.testing.assert_allclose(image, expected, rtol=1e-4,
+                               atol=1e-6 * expected.max())
+
+
+def test_chunked_source_matches_array_source(record, tmp_path):
+    _, _, from_array = fft_analysis.streaming_spectrogram(
+        record, 1000.0, tmp_path / "a.npy", segment_length=256,
+        frames_per_pixel=3, bins_per_pixel=2
+    )
+    chunks = (record[i:i + 999] for i in range(0, len(record), 999))
+    _, _, from_chunks = fft_analysis.streaming_spectrogram(
+        chunks, 1000.0, tmp_path / "b.npy", segment_length=256,
+        frames_per_pixel=3, bins_per_pixel=2, pixels_per_block=5,
+        num_samples=len(record)
+    )
+    np.testing.assert_allclose(from_chunks, from_array, rtol=1e-5)
+    assert (tmp_path / "b_axes.npz").exists()
+
+
+@pytest.fixture
+def tones():
+    """Two channels of bin-centred tones plus noise, 3 blocks of 500."""
+    rng = np.random.default_rng(4)
+    t = np.arange(1500) / 1000.0
+    signal = np.array([
+        1.5 * np.cos(2 * np.pi * 60 * t + 0.3)
+        + 0.2 * np.cos(2 * np.pi * 250 * t - 2.0),
+        0.5 * np.cos(2 * np.pi * 120 * t + 1.0),
+    ])
+    return signal + 0.05 * rng.standard_normal(signal.shape)
+
+
+def rfft_amplitude_phase(block, sample_rate, frequencies):
+    spectrum = np.fft.rfft(block)
+    bins = np.round(np.asarray(frequencies) * block.shape[-1]
+                    / sample_rate).astype(int)
+    values = spectrum[..., bins]
+    return 2 * np.abs(values) / block.shape[-1], np.angle(values)
+
+
+def test_goertzel_matches_rfft(tones):
+    frequencies = [60.0, 120.0, 250.0]
+    amplitudes, phases = fft_analysis.goertzel(tones[:, :500], 1000.0,
+                                               frequencies)
+    expected_amplitudes, expected_phases = rfft_amplitude_phase(
+        tones[:, :500], 1000.0, frequencies
+    )
+    assert amplitudes.shape == (2, 3)
+    np.testing.assert_allclose(amplitudes, expected_amplitudes, atol=1e-10)
+    np.testing.assert_allclose(phases, expected_phases, atol=1e-9)
+    assert amplitudes[0, 0] == pytest.approx(1.5, abs=0.01)
+    assert phases[0, 0] == pytest.approx(0.3, abs=0.01)
+
+
+def test_goertzel_detector_chunks_and_blocks(tones):
+    frequencies = [60.0, 120.0, 250.0]
+    detector = fft_analysis.GoertzelDetector(1000.0, frequencies, 500)
+    amplitudes = []
+    phases = []
+    for start in range(0, tones.shape[1], 173):
+        block_amplitudes, block_phases = detector.update(
+            tones[:, start:start + 173]
+        )
+        amplitudes.extend(block_amplitudes)
+        phases.extend(block_phases)
+
+    assert len(amplitudes) == 3
+    for i in range(3):
+        expected_amplitudes, expected_phases = rfft_amplitude_phase(
+            tones[:, 500 * i:500 * (i + 1)], 1000.0, frequencies
+        )
+        np.testing.assert_allclose(amplitudes[i], expected_amplitudes,
+                                   atol=1e-10)
+        np.testing.assert_allclose(phases[i], expected_phases, atol=1e-9)
+
+
+def reference_power_spectrum(signal, sample_rate, n_fft=None):
+    """The original full-FFT compute_power_spectrum, with optional padding."""
+    n = len(signal)
+    n_fft = n if n_fft is None else n_fft
+    fft_result = np.fft.fft(signal, n=n_fft)
+    n_unique = n_fft // 2 + 1
+    frequencies = np.abs(np.fft.fftfreq(n_fft, d=1/sample_rate)[:n_unique])
+    power = (np.abs(fft_result[:n_unique]) / n) ** 2
+    power[1:-1] *= 2
+    return frequencies, power
+
+
+@pytest.mark.parametrize("n", [1000, 1001])
+@pytest.mark.parametrize("pad", [False, True])
+def test_power_spectrum_normalization(n, pad):
+    rng = np.random.default_rng(5)
+    records = rng.standard_normal((3, n))
+    n_fft = fft_analysis.fast_fft_length(n) if pad else n
+
+    for record in records:
+        frequencies, power = fft_analysis.compute_power_spectrum(
+            record, 1000.0, pad_to_fast_length=pad
+        )
+        expected_frequencies, expected = reference_power_spectrum(
+            record, 1000.0, n_fft
+        )
+        np.testing.assert_allclose(frequencies, expected_frequencies)
+        np.testing.assert_allclose(power, expected, rtol=1e-10, atol=1e-15)
+
+    # Records along the first axis give the same spectra, record by record
+    _, batched = fft_analysis.compute_power_spectrum(
+        records.T, 1000.0, axis=0, pad_to_fast_length=pad
+    )
+    for record, power in zip(records, batched.T):
+        _, expected = reference_power_spectrum(record, 1000.0, n_fft)
+        np.testing.assert_allclose(power, expected, rtol=1e-10, atol=1e-15)
+
+
+@pytest.mark.parametrize("form", ["array", "list", "chunks"])
+def test_welch_psd_matches_scipy(record, form):
+    if form == "list":
+        signal = list(record)
+    elif form == "chunks":
+        signal = (record[i:i + 333] for i in range(0, len(record), 333))
+    else:
+        signal = record
+
+    frequencies, psd = fft_analysis.compute_welch_psd(signal, 1000.0,
+                                                      segment_length=256)
+    f, expected = scipy.signal.welch(record, fs=1000.0, nperseg=256,
+                                     noverlap=128)
+    np.testing.assert_allclose(frequencies, f)
+    np.testing.assert_allclose(psd, expected, rtol=1e-10)
+
+
+def test_ring_buffer_wraps_around():
+    buffer = fft_analysis.RingBuffer(capacity=10)
+    buffer.extend(np.arange(4.0))
+    np.testing.assert_array_equal(buffer.view(), np.arange(4.0))
+
+    # Chunks that straddle the end of the storage, and one longer than it
+    added = 4
+    for size in (7, 3, 9, 25, 1):
+        buffer.extend(np.arange(added, added + size, dtype=float))
+        added += size
+        expected = np.arange(max(0, added - 10), added, dtype=float)
+        np.testing.assert_array_equal(buffer.view(), expected)
+    assert buffer.size == 10
+    assert buffer.total_samples == added
+
+
+def test_sliding_dft_matches_rfft_of_window():
+    rng = np.random.default_rng(6)
+    data = rng.standard_normal(20000)
+    # Resync rarely, so the recursion itself is tested
+    sdft = fft_analysis.SlidingDFT(window_size=1000, sample_rate=1000.0,
+                                   frequencies=[0, 3, 50, 250, 500],
+                                   resync_interval=10 ** 6)
+    position = 0
+    for size in rng.integers(1, 400, 100):
+        sdft.update(data[position:position + size])
+        position += size
+
+    window = data[position - 1000:position]
+    _, values = sdft.spectrum()
+    np.testing.assert_allclose(values, np.fft.rfft(window)[sdft.bins],
+                               atol=1e-8)
+    _, power = sdft.power_spectrum()
+    _, expected = fft_analysis.compute_power_spectrum(window, 1000.0)
+    np.testing.assert_allclose(power, expected[sdft.bins], atol=1e-12)
+
+
+def test_zoom_spectrum_matches_padded_fft(record):
+    records = np.stack((record[:1000], record[1000:2000]), axis=1)
+    # 1/16 Hz steps from 40 to 60 Hz, the bins of a 16x zero-padded FFT
+    frequencies, power = fft_analysis.compute_zoom_spectrum(
+        records, 1000.0, 40.0, 60.0, num_bins=321, axis=0
+    )
+    padded = np.fft.rfft(records, n=16000, axis=0)
+    bins = np.arange(640, 961)
+    expected = 2 * (np.abs(padded[bins]) / 1000) ** 2
+    np.testing.assert_allclose(frequencies, bins / 16)
+    np.testing.assert_allclose(power, expected, rtol=1e-6,
+                               atol=1e-9 * expected.max())
+
+    # The chirp-z plan is reused for records of the same length
+    hits = fft_analysis._zoom_fft_plan.cache_info().hits
+    fft_analysis.compute_zoom_spectrum(record[2000:3000], 1000.0, 40.0, 60.0,
+                                       num_bins=321)
+    assert fft_analysis._zoom_fft_plan.cache_info().hits == hits + 1
+
+
+@pytest.mark.parametrize("n", [2000, 2001])
+@pytest.mark.parametrize("adaptive", [False, True])
+def test_multitaper_psd_integrates_to_variance(record, n, adaptive):
+    signal = record[:n]
+    frequencies, psd = fft_analysis.compute_multitaper_psd(
+        signal, 1000.0, nw=4, adaptive=adaptive
+    )
+    np.testing.assert_allclose(frequencies, np.fft.rfftfreq(n, 1 / 1000.0))
+    integral = np.sum(psd) * (frequencies[1] - frequencies[0])
+    assert integral == pytest.approx(np.var(signal), rel=0.01)
+
+    # The tapers are computed once and shared read-only
+    tapers, _ = fft_analysis.dpss_tapers(n, 4.0, 7)
+    assert fft_analysis.dpss_tapers(n, 4.0, 7)[0] is tapers
+    assert not tapers.flags.writeable
+
+
+def test_in_memory_spectrogram_writes_no_files(record, tmp_path,
+                                               monkeypatch):
+    _, _, on_disk = fft_analysis.streaming_spectrogram(
+        record, 1000.0, tmp_path / "image.npy", segment_length=256
+    )
+    monkeypatch.chdir(tmp_path)
+    before = sorted(tmp_path.iterdir())
+    _, _, in_memory = fft_analysis.streaming_spectrogram(
+        record, 1000.0, None, segment_length=256
+    )
+    assert sorted(tmp_path.iterdir()) == before
+    assert not isinstance(in_memory, np.memmap)
+    np.testing.assert_array_equal(in_memory, on_disk)
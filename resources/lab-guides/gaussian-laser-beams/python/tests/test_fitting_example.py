@@ -0,0 +1,221 @@
+"""Tests for 02_fitting_example.py."""
+
+import importlib
+import os
+
+import numpy as np
+import pytest
+
+fitting = importlib.import_module("02_fitting_example")
+
+POPT = np.array([1.5, 2.5, 0.4, 1.5])
+
+
+@pytest.fixture
+def scan():
+    rng = np.random.default_rng(2)
+    x = np.linspace(0.0, 5.0, 101)
+    y = fitting.beam_profile_function(x, *POPT) + 0.01 * rng.standard_normal(101)
+    return x, y
+
+
+def make_key(x, y, **settings):
+    return fitting.FitCache.make_key(x, y, None, 'beam_profile_function',
+                                     'heuristic', 'unweighted', **settings)
+
+
+def test_cache_key_covers_fit_settings(scan):
+    x, y = scan
+    base = make_key(x, y, engine='numpy', n_starts=1, seed=None)
+    assert base == make_key(x, y, seed=None, n_starts=1, engine='numpy')
+    assert base != make_key(x, y, engine='numba', n_starts=1, seed=None)
+    assert base != make_key(x, y, engine='numpy', n_starts=8, seed=None)
+    assert base != make_key(x, y, engine='numpy', n_starts=1, seed=0)
+    assert base != make_key(x, y[::-1], engine='numpy', n_starts=1, seed=None)
+
+
+def test_cached_fit(scan, tmp_path):
+    x, y = scan
+    cache = fitting.FitCache(tmp_path)
+    popt, _, pcov, info = fitting.fit_beam_profile(
+        x, y, cache=cache, verbose=False, full_output=True
+    )
+    assert not info['cached']
+
+    cached_popt, _, cached_pcov, info = fitting.fit_beam_profile(
+        x, y, cache=cache, verbose=False, full_output=True
+    )
+    assert info['cached']
+    np.testing.assert_array_equal(cached_popt, popt)
+    np.testing.assert_array_equal(cached_pcov, pcov)
+
+    # A different setting is a different fit
+    _, _, _, info = fitting.fit_beam_profile(
+        x, y, cache=cache, verbose=False, full_output=True,
+        n_starts=4, max_workers=1, seed=0
+    )
+    assert not info['cached']
+
+
+def test_multistart_with_executor(scan):
+    from concurrent.futures import ThreadPoolExecutor
+
+    x, y = scan
+    serial = fitting.fit_beam_profile_multistart(x, y, n_starts=8, seed=0,
+                                                 max_workers=1, verbose=False)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel = fitting.fit_beam_profile_multistart(
+            x, y, n_starts=8, seed=0, max_workers=3, verbose=False,
+            executor=executor
+        )
+    np.testing.assert_allclose(parallel[0], serial[0])
+    np.testing.assert_allclose(parallel[3]['start_popt'], serial[3]['start_popt'])
+
+
+def test_multistart_reuses_process_pool(scan, monkeypatch):
+    x, y = scan
+    monkeypatch.setattr(fitting, "MULTISTART_SERIAL_POINTS", 0)
+    try:
+        popt, _, _, _ = fitting.fit_beam_profile_multistart(
+            x, y, n_starts=4, seed=0, max_workers=2, verbose=False
+        )
+        pool = fitting._pool
+        fitting.fit_beam_profile_multistart(x, y, n_starts=4, seed=1,
+                                            max_workers=2, verbose=False)
+        assert fitting._pool is pool
+    finally:
+        if fitting._pool is not None:
+            fitting._pool.shutdown()
+        fitting._pool = None
+    np.testing.assert_allclose(popt, POPT, atol=0.05)
+
+
+def test_multistart_info_is_cached(scan, tmp_path):
+    x, y = scan
+    cache = fitting.FitCache(tmp_path)
+    _, _, _, info = fitting.fit_beam_profile(
+        x, y, cache=cache, verbose=False, full_output=True,
+        n_starts=6, max_workers=1, seed=0
+    )
+    _, _, _, cached = fitting.fit_beam_profile(
+        x, y, cache=cache, verbose=False, full_output=True,
+        n_starts=6, max_workers=1, seed=0
+    )
+    assert cached['cached']
+    assert cached['n_starts'] == 6
+    assert cached['n_agree'] == info['n_agree']
+    assert cached['start_popt'].shape == (6, 4)
+    np.testing.assert_allclose(cached['start_chi2'], info['start_chi2'])
+
+
+def test_multistart_uses_engine(scan):
+    x, y = scan
+    with pytest.raises(ValueError):
+        fitting.fit_beam_profile(x, y, verbose=False, n_starts=4,
+                                 max_workers=1, engine='bogus')
+    if not fitting.NUMBA_AVAILABLE:
+        pytest.skip("Numba is not installed")
+    numpy_fit = fitting.fit_beam_profile(x, y, verbose=False, n_starts=4,
+                                         max_workers=1, seed=0)
+    numba_fit = fitting.fit_beam_profile(x, y, verbose=False, n_starts=4,
+                                         max_workers=1, seed=0, engine='numba')
+    np.testing.assert_allclose(numba_fit[0], numpy_fit[0], rtol=1e-6)
+
+
+@pytest.mark.skipif(not fitting.NUMBA_AVAILABLE, reason="Numba is not installed")
+def test_compiled_model_matches_numpy():
+    x = np.linspace(0.0, 5.0, 1001)
+    compiled = fitting._CompiledBeamModel(x)
+    compiled._jac[:] = np.nan
+
+    model = compiled.model(x, *POPT)
+    np.testing.assert_allclose(model, fitting.beam_profile_function(x, *POPT),
+                               rtol=1e-12, atol=1e-12)
+    # Evaluating the model alone leaves the Jacobian uncomputed
+    assert np.all(np.isnan(compiled._jac))
+
+    jac = compiled.jacobian(x, *POPT)
+    np.testing.assert_allclose(jac, fitting.beam_profile_jacobian(x, *POPT),
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_engines_share_default():
+    import inspect
+
+    defaults = [inspect.signature(function).parameters['engine'].default
+                for function in (fitting.evaluate_beam_profile,
+                                 fitting.fit_beam_profile,
+                                 fitting.fit_beam_profile_multistart)]
+    assert defaults == ['numpy'] * 3
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "scan.csv"
+    data = np.round(np.column_stack((np.linspace(0.0, 5.0, 50),
+                                     np.linspace(0.1, 3.0, 50),
+                                     np.full(50, 0.01))), 6)
+    np.savetxt(path, data, fmt="%.6f", delimiter=",",
+               header="Position (mm),Voltage (V),Uncertainty (V)",
+               comments="")
+    return path, data
+
+
+def test_csv_readers_agree(csv_file, monkeypatch):
+    path, data = csv_file
+    if not fitting.PYARROW_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    fast = fitting._read_csv_columns(path)
+    monkeypatch.setattr(fitting, "PYARROW_AVAILABLE", False)
+    slow = fitting._read_csv_columns(path)
+    np.testing.assert_array_equal(fast, slow)
+    np.testing.assert_allclose(slow, data)
+
+
+def test_csv_sidecar_is_reused_and_refreshed(csv_file, monkeypatch):
+    path, data = csv_file
+    sidecar = fitting._sidecar_path(path)
+
+    first = fitting.load_csv_data(path)
+    np.testing.assert_allclose(first, data)
+    assert os.path.exists(sidecar)
+    # The sidecar is written through a temporary file and renamed
+    assert sorted(p.name for p in path.parent.iterdir()) == \
+        ["scan.csv", "scan.csv.npz"]
+
+    # Unchanged CSV: the sidecar is used, the CSV is not parsed
+    def fail(filename):
+        raise AssertionError("CSV parsed again")
+
+    monkeypatch.setattr(fitting, "_read_csv_columns", fail)
+    np.testing.assert_array_equal(fitting.load_csv_data(path), first)
+    monkeypatch.undo()
+
+    # Editing the CSV (new size and mtime) rebuilds the sidecar
+    with open(path, "a") as f:
+        f.write("6.000000,3.100000,0.020000\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    x, y, y_err = fitting.load_beam_data_with_errors(path)
+    assert len(x) == 51
+    assert (x[-1], y[-1], y_err[-1]) == (6.0, 3.1, 0.02)
+    with np.load(sidecar) as cached:
+        assert int(cached['mtime_ns']) == os.stat(path).st_mtime_ns
+        assert len(cached['data']) == 51
+
+    # Same signature with and without the cache
+    np.testing.assert_array_equal(
+        np.column_stack(fitting.load_beam_data(path)),
+        np.column_stack(fitting.load_beam_data(path, use_cache=False))
+    )
+
+
+def test_failed_sidecar_write_leaves_no_files(csv_file, monkeypatch):
+    path, data = csv_file
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(fitting.os, "replace", fail)
+    np.testing.assert_allclose(fitting.load_csv_data(path), data)
+    assert [p.name for p in path.parent.iterdir()] == ["scan.csv"]
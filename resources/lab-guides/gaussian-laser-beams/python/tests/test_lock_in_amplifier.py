@@ -0,0 +1,105 @@
+"""Tests for the software lock-in amplifier."""
+
+import numpy as np
+import pytest
+
+from lock_in_amplifier import LockInAmplifier
+
+SAMPLE_RATE = 10000
+FREQUENCY = 137.0
+
+
+def run_lock_in(signal, reference, chunk_size, **kwargs):
+    """Feed signal and reference in chunks; return (t, R, lock_in)."""
+    lock_in = LockInAmplifier(SAMPLE_RATE, **kwargs)
+    outputs = [lock_in.process(signal[i:i + chunk_size],
+                               None if reference is None
+                               else reference[i:i + chunk_size])
+               for i in range(0, len(signal), chunk_size)]
+    t, X, Y, R, theta = (np.concatenate(values) for values in zip(*outputs))
+    return t, R, lock_in
+
+
+def mean_settled_R(signal, reference, chunk_size, **kwargs):
+    t, R, lock_in = run_lock_in(signal, reference, chunk_size, **kwargs)
+    return np.mean(R[t > lock_in.settling_time])
+
+
+@pytest.fixture
+def times():
+    return np.arange(15 * SAMPLE_RATE) / SAMPLE_RATE
+
+
+def test_internal_reference_amplitude(times):
+    signal = 0.01 * np.sin(2 * np.pi * FREQUENCY * times + 0.5)
+    R = mean_settled_R(signal, None, 500, reference_frequency=FREQUENCY,
+                       time_constant=0.5)
+    assert R == pytest.approx(0.01, rel=0.01)
+
+
+@pytest.mark.parametrize("chunk_size", [20, 73, 500, 5000])
+def test_external_sine_reference_any_chunk_size(times, chunk_size):
+    # Chunks of 20 samples are much shorter than one reference period
+    signal = 0.01 * np.sin(2 * np.pi * FREQUENCY * times + 0.3)
+    reference = 5.0 * np.sin(2 * np.pi * FREQUENCY * times)
+    R = mean_settled_R(signal, reference, chunk_size, time_constant=0.5)
+    assert R == pytest.approx(0.01, rel=0.01)
+
+
+@pytest.mark.parametrize("chunk_size", [20, 500, 5000])
+def test_external_square_reference_any_chunk_size(times, chunk_size):
+    # The lock-in measures the fundamental of the chopped signal,
+    # (2 / pi) times its peak-to-peak amplitude
+    chopped = (np.sin(2 * np.pi * FREQUENCY * times) > 0).astype(float)
+    R = mean_settled_R(0.01 * chopped, 5.0 * chopped, chunk_size,
+                       time_constant=0.5)
+    assert R == pytest.approx(0.02 / np.pi, rel=0.01)
+
+
+def test_edges_do_not_depend_on_chunk_size(times):
+    rng = np.random.default_rng(0)
+    reference = (np.sin(2 * np.pi * FREQUENCY * times)
+                 + 0.05 * rng.standard_normal(len(times)))
+
+    edges = []
+    for chunk_size in [17, 1000, len(times)]:
+        lock_in = LockInAmplifier(SAMPLE_RATE)
+        found = []
+        for i in range(0, len(times), chunk_size):
+            found.append(lock_in._rising_edges(reference[i:i + chunk_size]))
+            lock_in._samples_processed += len(reference[i:i + chunk_size])
+        edges.append(np.concatenate(found))
+
+    # Hysteresis: noise near the threshold gives one edge per period
+    assert len(edges[0]) == pytest.approx(FREQUENCY * times[-1], abs=2)
+    for other in edges[1:]:
+        np.testing.assert_allclose(other, edges[0])
+
+
+def test_settling_time():
+    lock_in = LockInAmplifier(SAMPLE_RATE, reference_frequency=FREQUENCY,
+                              time_constant=0.1)
+    # A 4th-order filter takes several time constants to settle
+    assert 0.3 < lock_in.settling_time < 2.0
+
+    step = np.ones(int(3 * lock_in.settling_time * SAMPLE_RATE))
+    t, R, _ = run_lock_in(
+        np.cos(2 * np.pi * FREQUENCY * np.arange(len(step)) / SAMPLE_RATE),
+        None, 1000, reference_frequency=FREQUENCY, time_constant=0.1)
+    settled = t > lock_in.settling_time
+    assert np.all(np.abs(R[settled] - 1) < 0.02)
+
+
+def test_daq_chunks_reads_simulated_daq(monkeypatch):
+    import lock_in_amplifier
+    import simulated_hardware
+    monkeypatch.setattr(simulated_hardware, "SPEED", 100.0)
+
+    chunks = list(lock_in_amplifier.daq_chunks("Dev1", 1000.0, 1.0, 100))
+
+    assert len(chunks) == 10
+    for signal, reference in chunks:
+        assert signal.shape == reference.shape == (100,)
+    # Each chunk is a copy, not the reused read buffer
+    assert chunks[0][0] is not chunks[1][0]
+    assert not np.array_equal(chunks[0][1], chunks[1][1])
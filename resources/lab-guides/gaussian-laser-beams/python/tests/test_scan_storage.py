@@ -0,0 +1,100 @@
+"""Tests for scan_storage.py."""
+
+import os
+
+import numpy as np
+import pytest
+
+from scan_storage import (ScanWriter, export_csv, iter_chunks, load_scan,
+                          read_metadata)
+
+COLUMNS = ["Position (mm)", "Voltage (V)", "Time (s)"]
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(3)
+    n = 2500
+    return np.column_stack((np.linspace(-12.0, 12.0, n),
+                            rng.uniform(-10.0, 10.0, n),
+                            1e4 + np.arange(n) * 1e-3))
+
+
+def test_round_trip_across_chunks(tmp_path, rows):
+    path = tmp_path / "run.scan"
+    with ScanWriter(path, COLUMNS, {"step_size_mm": 0.05},
+                    chunk_rows=1000) as writer:
+        writer.append(rows[0])          # a single row
+        writer.append(rows[1:1700])     # fills and starts chunks
+        writer.append(rows[1700:])
+
+    data, metadata = load_scan(path)
+    np.testing.assert_array_equal(data, rows)
+    assert metadata["columns"] == COLUMNS
+    assert metadata["num_rows"] == len(rows)
+    assert metadata["complete"]
+    assert metadata["settings"] == {"step_size_mm": 0.05}
+    assert [len(chunk) for chunk in iter_chunks(path)] == [1000, 1000, 500]
+
+
+def test_flush_rewrites_header(tmp_path, rows):
+    path = tmp_path / "run.scan"
+    writer = ScanWriter(path, COLUMNS, flush_interval=3600)
+    writer.append(rows[:10])
+    writer.flush()
+    writer.append(rows[10:25])
+    writer.flush()
+
+    # The scan is readable while it is still being written
+    chunk = np.load(os.path.join(path, "chunk_00000.npy"))
+    np.testing.assert_array_equal(chunk, rows[:25])
+    assert not read_metadata(path)["complete"]
+
+    # Rows appended after the last flush are not reported yet
+    writer.append(rows[25:30])
+    data, _ = load_scan(path)
+    assert len(data) == 25
+
+    writer.close()
+    data, metadata = load_scan(path)
+    np.testing.assert_array_equal(data, rows[:30])
+    assert metadata["complete"]
+
+
+def test_wrong_number_of_columns(tmp_path):
+    with ScanWriter(tmp_path / "run.scan", COLUMNS) as writer:
+        with pytest.raises(ValueError):
+            writer.append([1.0, 2.0])
+
+
+def test_export_csv_keeps_precision(tmp_path, rows):
+    path = tmp_path / "run.scan"
+    with ScanWriter(path, COLUMNS) as writer:
+        writer.append(rows)
+
+    csv_file = export_csv(path)
+    assert csv_file == str(tmp_path / "run.csv")
+    with open(csv_file) as f:
+        assert f.readline().strip() == ",".join(COLUMNS)
+        first = f.readline().strip().split(",")
+    assert first == [f"{rows[0, 0]:.6f}", f"{rows[0, 1]:.5f}",
+                     f"{rows[0, 2]:.6f}"]
+
+    exported = np.loadtxt(csv_file, delimiter=",", skiprows=1)
+    np.testing.assert_allclose(exported[:, 0], rows[:, 0], atol=5e-7)
+    np.testing.assert_allclose(exported[:, 1], rows[:, 1], atol=5e-6)
+    # Millisecond steps are still resolved after 10^4 s
+    np.testing.assert_allclose(np.diff(exported[:, 2]), 1e-3, atol=2e-6)
+
+
+def test_export_selected_columns_and_format(tmp_path, rows):
+    path = tmp_path / "run.scan"
+    with ScanWriter(path, COLUMNS) as writer:
+        writer.append(rows)
+
+    csv_file = export_csv(path, tmp_path / "voltage.csv",
+                          columns=["Voltage (V)", 0], fmt="%.3e")
+    with open(csv_file) as f:
+        assert f.readline().strip() == "Voltage (V),Position (mm)"
+        assert f.readline().strip() == (f"{rows[0, 1]:.3e},"
+                                        f"{rows[0, 0]:.3e}")
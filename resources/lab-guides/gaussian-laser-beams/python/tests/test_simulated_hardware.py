@@ -0,0 +1,136 @@
+"""Tests for simulated_hardware.py."""
+
+import threading
+
+import numpy as np
+import pytest
+
+import simulated_hardware as sim
+
+
+@pytest.fixture(autouse=True)
+def fast(monkeypatch):
+    """Run simulated time 50x faster than real time."""
+    monkeypatch.setattr(sim, "SPEED", 50.0)
+
+
+@pytest.fixture
+def stage():
+    stage = sim.SimulatedKCubeStepper("26000001")
+    stage.Connect(stage.serial_number)
+    stage.EnableDevice()
+    yield stage
+    stage.Disconnect()
+
+
+def test_clock_and_sleep_share_time_base():
+    start = sim.now()
+    sim.sleep(1.0)
+    assert sim.now() - start == pytest.approx(1.0, abs=0.2)
+
+
+def test_blocking_move_reaches_target(stage):
+    start = sim.now()
+    stage.MoveTo(sim.Decimal("3.0"), 60000)
+    assert float(stage.Position) == pytest.approx(3.0)
+    assert not stage.Status.IsMoving
+    # 3 mm at 2 mm/s with 2 mm/s^2 acceleration takes 2.5 s
+    assert sim.now() - start == pytest.approx(2.5, abs=0.3)
+
+
+def test_non_blocking_move_runs_in_background(stage):
+    stage.MoveTo(sim.Decimal("1.0"), 0)
+    assert stage.Status.IsMoving
+    sim.sleep(2.0)
+    assert not stage.Status.IsMoving
+    assert float(stage.Position) == pytest.approx(1.0)
+
+
+def test_move_callback_is_called_when_move_ends(stage):
+    done = threading.Event()
+    task_ids = []
+
+    def callback(task_id):
+        task_ids.append(task_id)
+        done.set()
+
+    stage.MoveTo(sim.Decimal("1.0"), sim.Action[sim.UInt64](callback))
+    assert done.wait(5.0)
+    assert task_ids == [1]
+    assert float(stage.Position) == pytest.approx(1.0)
+
+
+def test_home_sets_is_homing(stage):
+    stage.MoveTo(sim.Decimal("0.5"), 60000)
+    stage.Home(0)
+    assert stage.Status.IsHoming
+    sim.sleep(1.5)
+    assert not stage.Status.IsHoming
+    assert float(stage.Position) == pytest.approx(0.0)
+
+
+@pytest.mark.parametrize("target", [sim.STAGE_TRAVEL[0] - 0.1,
+                                    sim.STAGE_TRAVEL[1] + 0.1])
+def test_move_outside_travel_is_rejected(stage, target):
+    with pytest.raises(ValueError):
+        stage.MoveTo(sim.Decimal(str(target)), 60000)
+
+
+def test_blocking_move_times_out(stage):
+    with pytest.raises(TimeoutError):
+        stage.MoveTo(sim.Decimal("10.0"), 100)
+
+
+def test_bench_follows_knife_edge(stage):
+    bench = sim.SimulatedBench(center=0.0, noise=0.0, drift=0.0, pickup=0.0)
+    bench.stage = stage
+    stage.MoveTo(sim.Decimal("-2.0"), 60000)
+    low = bench.voltage("ai0", [sim.now()])[0]
+    stage.MoveTo(sim.Decimal("2.0"), 60000)
+    high = bench.voltage("ai0", [sim.now()])[0]
+    assert low == pytest.approx(0.0, abs=1e-6)
+    assert high == pytest.approx(3.0, abs=1e-6)
+
+
+def test_finite_read_returns_requested_samples():
+    with sim.SimulatedTask() as task:
+        task.ai_channels.add_ai_voltage_chan("Dev1/ai0")
+        task.timing.cfg_samp_clk_timing(
+            1000, sample_mode=sim.AcquisitionType.FINITE, samps_per_chan=500
+        )
+        start = sim.now()
+        data = task.read(number_of_samples_per_channel=500)
+        elapsed = sim.now() - start
+
+    assert len(data) == 500
+    assert elapsed == pytest.approx(0.5 + sim.TASK_COMMIT_TIME, abs=0.2)
+    # Readings are quantized to the ADC resolution
+    lsb = 20.0 / 2 ** sim.ADC_BITS
+    steps = (np.array(data) + 10.0) / lsb
+    np.testing.assert_allclose(steps, np.round(steps), atol=1e-6)
+
+
+def test_software_timed_read_returns_float():
+    with sim.SimulatedTask() as task:
+        task.ai_channels.add_ai_voltage_chan("Dev1/ai0")
+        assert isinstance(task.read(), float)
+
+
+def test_continuous_read_overflow_raises():
+    with sim.SimulatedTask() as task:
+        task.ai_channels.add_ai_voltage_chan("Dev1/ai0")
+        task.timing.cfg_samp_clk_timing(
+            1000, sample_mode=sim.AcquisitionType.CONTINUOUS, samps_per_chan=100
+        )
+        task.start()
+        sim.sleep(0.5)
+        with pytest.raises(sim.DaqReadError) as info:
+            task.read(number_of_samples_per_channel=10)
+    assert info.value.error_code == -200279
+
+
+def test_sample_rate_limit():
+    with sim.SimulatedTask() as task:
+        task.ai_channels.add_ai_voltage_chan("Dev1/ai0")
+        with pytest.raises(sim.DaqError):
+            task.timing.cfg_samp_clk_timing(sim.MAX_SAMPLE_RATE * 2)
@@ -2,6 +2,7 @@
 import numpy as np
 import numpy.matlib as matlib
 from scipy.linalg import expm
+from scipy.signal import zoom_fft
 import matplotlib.pylab as plt
 from math import pi
 
@@ -25,6 +26,13 @@ steps = 3000
 # Number of time steps
 zero_fill = 4*steps
 # Zero-fill the FID to this many samples before FFT
+zoom_band = None
+# Optional (f_start, f_stop) in Hz, e.g. (0., 300.)
+#    If set, the spectrum is computed only in this band with a zoom FFT
+#    (chirp-z transform) instead of zero-filling the whole spectrum.
+#    Much finer frequency spacing is then cheap.
+zoom_points = 4096
+# Number of frequency points in the zoom band
 T2 = 0.3
 # T2 time constant in seconds,
 #    The FID decays with this time constant
@@ -137,13 +145,20 @@ duration = steps * time_step
 window_function = np.exp(-(duration/T2) * np.linspace(0, 1, steps))
 winfid = fid * window_function
 
-# FFT with zero-filling
-# Zero-filling has the effect of interpolating between frequency points
-# which makes the spectrum smoother
-spectrum = np.fft.fftshift(np.fft.fft(winfid, zero_fill))
-
 time_series = np.linspace(0, (steps-1) * time_step, steps)  # in seconds
-freq_series = np.fft.fftshift(np.fft.fftfreq(zero_fill, time_step))  #in Hz
+
+if zoom_band is None:
+    # FFT with zero-filling
+    # Zero-filling has the effect of interpolating between frequency points
+    # which makes the spectrum smoother
+    spectrum = np.fft.fftshift(np.fft.fft(winfid, zero_fill))
+    freq_series = np.fft.fftshift(np.fft.fftfreq(zero_fill, time_step))  #in Hz
+else:
+    # Zoom FFT: the same (unnormalized) DFT values, evaluated only at
+    # zoom_points frequencies inside zoom_band
+    spectrum = zoom_fft(winfid, zoom_band, zoom_points,
+                        fs=sampling_rate, endpoint=True)
+    freq_series = np.linspace(zoom_band[0], zoom_band[1], zoom_points)  #in Hz
 
 # Plots, comment in or out as desired
 # Real part of the apodized FID